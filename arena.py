@@ -0,0 +1,150 @@
+import math
+
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, InputState, Ship, Bullet, Asteroid, Simulation, check_collision, wrapped_distance,
+)
+
+MAX_PLAYERS = 8
+STARTING_LIVES = 3
+RESPAWN_TICKS = 180  # Ticks a ship that ran out of lives sits out before rejoining with fresh lives
+SPAWN_RING = 60      # Ships start spread on a ring this far from the centre
+FIRST_ENTITY_ID = MAX_PLAYERS  # Ids below this are ships, numbered by player
+
+class Player:
+    def __init__(self, player_id, name):
+        self.id = player_id
+        self.name = name
+        self.ship = None
+        self.score = 0
+        self.lives = STARTING_LIVES
+        self.respawn_timer = 0
+
+class Arena(Simulation):
+    """Simulation rules for up to MAX_PLAYERS ships sharing one asteroid field
+
+    Players work together: bullets only hit asteroids, and each destroyed
+    asteroid scores for whoever fired the bullet. Every asteroid and bullet gets
+    a net_id that is fixed for its lifetime, for the network layer to key on.
+    """
+    rewindable = False  # Players and net ids aren't snapshotted
+    def __init__(self, initial_asteroids=5, seed=None):
+        self.players = {}
+        self.next_id = FIRST_ENTITY_ID
+        super().__init__(initial_asteroids, seed)
+        self.ship = None  # Ships belong to players
+
+    def new_id(self):
+        # Ids wrap after 65535; anything alive that long has long since been replaced
+        net_id = self.next_id
+        self.next_id = net_id + 1 if net_id < 0xFFFF else FIRST_ENTITY_ID
+        return net_id
+
+    def spawn_point(self, player_id):
+        angle = 2 * math.pi * player_id / MAX_PLAYERS
+        return SCREEN_WIDTH // 2 + math.cos(angle) * SPAWN_RING, SCREEN_HEIGHT // 2 + math.sin(angle) * SPAWN_RING
+
+    def add_player(self, name):
+        """Seat a player in the lowest free slot; returns the Player, or None when the arena is full"""
+        for player_id in range(MAX_PLAYERS):
+            if player_id not in self.players:
+                player = self.players[player_id] = Player(player_id, name)
+                player.ship = Ship(*self.spawn_point(player_id))
+                return player
+        return None
+
+    def remove_player(self, player_id):
+        self.players.pop(player_id, None)
+
+    def spawn_wave(self, count):
+        """Spawn asteroids away from every ship"""
+        ships = [player.ship for player in self.players.values() if player.ship is not None]
+        for _ in range(count):
+            while True:
+                x = self.rng.randint(0, SCREEN_WIDTH)
+                y = self.rng.randint(0, SCREEN_HEIGHT)
+                # Make sure asteroid doesn't spawn on a ship, including across the wrapping edges
+                if all(wrapped_distance(x, y, ship.pos.x, ship.pos.y) > 100 for ship in ships):
+                    asteroid = Asteroid(x, y, rng=self.rng)
+                    asteroid.net_id = self.new_id()
+                    self.asteroids.append(asteroid)
+                    break
+
+    def step(self, inputs):
+        """Advance one tick; inputs maps player id to InputState, and players without one idle"""
+        self.ticks += 1
+        idle = InputState()
+        phase = self.profiler.phase
+        with phase("ship.update"):
+            for player in self.players.values():
+                ship = player.ship
+                if ship is None:
+                    player.respawn_timer -= 1
+                    if player.respawn_timer <= 0:
+                        player.lives = STARTING_LIVES
+                        player.score = 0
+                        player.ship = Ship(*self.spawn_point(player.id))
+                    continue
+                player_input = inputs.get(player.id, idle)
+                if player_input.shoot:
+                    bullet = Bullet(ship.pos.x, ship.pos.y, ship.angle)
+                    bullet.net_id = self.new_id()
+                    bullet.owner = player.id
+                    self.bullets.append(bullet)
+                ship.update(player_input)
+                if player_input.thrust:
+                    self.effects.thrust(ship.pos.x, ship.pos.y, ship.angle, ship.velocity.x, ship.velocity.y)
+        with phase("move_entities"):
+            self.move_entities()
+        with phase("collide_bullets"):
+            self.collide_bullets()
+        with phase("collide_ship"):
+            self.collide_ship()
+
+        # Check if all asteroids destroyed
+        if not self.asteroids:
+            self.waves_cleared += 1
+            best = max((player.score for player in self.players.values()), default=0)
+            self.spawn_wave(min(5 + best // 1000, 10))
+
+    def collide_bullets(self):
+        hits = self.bullet_hits()
+        if not hits:
+            return
+
+        hit_bullets = {b for b, _ in hits}
+        hit_asteroids = {a for _, a in hits}
+        pairs = [(self.bullets[b], self.asteroids[a]) for b, a in hits]
+        self.bullets = [bullet for i, bullet in enumerate(self.bullets) if i not in hit_bullets]
+        self.asteroids = [asteroid for i, asteroid in enumerate(self.asteroids) if i not in hit_asteroids]
+
+        for bullet, asteroid in pairs:
+            self.effects.asteroid_destroyed(asteroid.pos.x, asteroid.pos.y, asteroid.size)
+            for piece in asteroid.split(self.rng):
+                piece.net_id = self.new_id()
+                self.asteroids.append(piece)
+            # The shooter may have left since firing
+            shooter = self.players.get(bullet.owner)
+            if shooter is not None:
+                shooter.score += (4 - asteroid.size) * 20
+
+    def collide_ship(self):
+        for player in self.players.values():
+            ship = player.ship
+            if ship is None:
+                continue
+            for asteroid in self.asteroids:
+                if check_collision(ship, asteroid):
+                    self.player_hit(player)
+                    break
+
+    def player_hit(self, player):
+        """Lose a life and either bench the player until respawn or reset their ship"""
+        ship = player.ship
+        self.effects.ship_destroyed(ship.pos.x, ship.pos.y)
+        player.lives -= 1
+        if player.lives <= 0:
+            player.ship = None
+            player.respawn_timer = RESPAWN_TICKS
+        else:
+            ship.pos.set(*self.spawn_point(player.id))
+            ship.velocity.set(0, 0)
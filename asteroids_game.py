@@ -1,379 +1,350 @@
+import time
+
+# Startup timing starts before pygame is imported
+IMPORT_STARTED = time.perf_counter()
+
 import pygame
-import math
-import random
 import sys
-import numpy as np
 import json
 import os
 
-# Initialize Pygame
-pygame.init()
-pygame.mixer.init()
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, BLACK, WHITE, FPS,
+    InputState, Simulation,
+)
+from profiler import FrameProfiler
+from controls import InputReader, LatencyMeter
+from render import DirtyRects, draw_asteroids
+from particles import ParticleSystem
+from hud import Fonts, Hud, TextCache
+from leaderboard import Leaderboard
+from audio import Audio
+from sound_bank import SoundBank, THRUST_TONE, BULLET_TONE
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
+
+MUSIC_FILE = "Game Over (8-Bit Music).mp3"
+TRACE_FILE = "frame_trace.json"
+LEADERBOARD_FILE = "high_scores.db"
 
-# Constants
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-FPS = 60
+# The simulation always advances in fixed ticks of 1/FPS seconds; rendering runs at its own rate
+TICK_SECONDS = 1 / FPS
+MAX_CATCH_UP_TICKS = 5  # Ticks run before a frame is drawn at most; time beyond that is dropped
+RENDER_FPS = 144        # Default render cap; 0 renders as fast as possible
+LEGACY_HIGH_SCORES_FILE = "high_scores.json"  # Imported into the leaderboard on first run
+REWIND_SECONDS = 5      # How far back one press of the rewind key goes
+
+# Procedural sound effects, synthesized once and cached on disk between runs
+SOUND_CACHE_DIR = ".sound_cache"
+sound_bank = SoundBank(SOUND_CACHE_DIR)
+
+# Effects play on channels reserved per category, at most MAX_VOICES at once; thrust outranks bullets
+# name: (channels, priority, minimum seconds between identical sounds)
+SOUND_CATEGORIES = {
+    "thrust": (1, 2, 0.0),
+    "bullets": (4, 1, 0.03),
+}
+MAX_VOICES = 4
 
-# Create sound effects using pygame's built-in sound generation
 def create_thrust_sound():
     # Create a thrust sound (low frequency rumble)
-    duration = 0.1
-    sample_rate = 22050
-    frames = int(duration * sample_rate)
-    arr = np.zeros((frames, 2), dtype=np.int16)
-    for i in range(frames):
-        time = float(i) / sample_rate
-        wave = int(4096 * math.sin(2 * math.pi * 80 * time) * math.exp(-time * 5))
-        arr[i] = [wave, wave]
-    sound = pygame.sndarray.make_sound(arr)
-    return sound
+    return sound_bank.sound(THRUST_TONE)
 
 def create_bullet_sound():
     # Create a bullet sound (sharp, quick beep)
-    duration = 0.1  # Shorter duration for better sync
-    sample_rate = 22050
-    frames = int(duration * sample_rate)
-    arr = np.zeros((frames, 2), dtype=np.int16)
-    for i in range(frames):
-        time = float(i) / sample_rate
-        # Sharp attack, quick decay for immediate response
-        wave = int(3000 * math.sin(2 * math.pi * 1200 * time) * math.exp(-time * 15))
-        arr[i] = [wave, wave]
-    sound = pygame.sndarray.make_sound(arr)
-    return sound
-
-class Vector2D:
-    def __init__(self, x=0, y=0):
-        self.x = x
-        self.y = y
-    
-    def __add__(self, other):
-        return Vector2D(self.x + other.x, self.y + other.y)
-    
-    def __mul__(self, scalar):
-        return Vector2D(self.x * scalar, self.y * scalar)
-    
-    def normalize(self):
-        length = math.sqrt(self.x**2 + self.y**2)
-        if length > 0:
-            return Vector2D(self.x / length, self.y / length)
-        return Vector2D(0, 0)
-    
-    def length(self):
-        return math.sqrt(self.x**2 + self.y**2)
-
-class Ship:
-    def __init__(self, x, y):
-        self.pos = Vector2D(x, y)
-        self.velocity = Vector2D(0, 0)
-        self.angle = 0
-        self.radius = 10
-        self.thrust = 0.3
-        self.max_speed = 8
-        self.friction = 0.98
-        self.thrust_sound = create_thrust_sound()
-        self.thrust_channel = None
-        
-    def update(self):
-        # Mouse controls
-        mouse_pos = pygame.mouse.get_pos()
-        mouse_buttons = pygame.mouse.get_pressed()
-        
-        # Calculate angle to mouse position
-        dx = mouse_pos[0] - self.pos.x
-        dy = mouse_pos[1] - self.pos.y
-        target_angle = math.degrees(math.atan2(dy, dx))
-        
-        # Smooth rotation towards mouse
-        angle_diff = target_angle - self.angle
-        # Normalize angle difference to [-180, 180]
-        while angle_diff > 180:
-            angle_diff -= 360
-        while angle_diff < -180:
-            angle_diff += 360
-        
-        # Apply rotation with some smoothing
-        rotation_speed = 8
-        if abs(angle_diff) > rotation_speed:
-            self.angle += rotation_speed if angle_diff > 0 else -rotation_speed
-        else:
-            self.angle = target_angle
-        
-        # Apply thrust with left mouse button
-        if mouse_buttons[0]:  # Left mouse button
-            thrust_x = math.cos(math.radians(self.angle)) * self.thrust
-            thrust_y = math.sin(math.radians(self.angle)) * self.thrust
-            self.velocity = self.velocity + Vector2D(thrust_x, thrust_y)
-            
-            # Play thrust sound
-            if self.thrust_channel is None or not self.thrust_channel.get_busy():
-                self.thrust_channel = self.thrust_sound.play(-1) # Loop the sound
-        else:
-            # Stop thrust sound when not thrusting
-            if self.thrust_channel and self.thrust_channel.get_busy():
-                self.thrust_channel.stop()
-            
-        # Apply friction
-        self.velocity = self.velocity * self.friction
-        
-        # Limit speed
-        if self.velocity.length() > self.max_speed:
-            self.velocity = self.velocity.normalize() * self.max_speed
-        
-        # Update position
-        self.pos = self.pos + self.velocity
-        
-        # Wrap around screen
-        self.pos.x %= SCREEN_WIDTH
-        self.pos.y %= SCREEN_HEIGHT
-    
-    def draw(self, screen):
-        # Calculate ship points
-        angle_rad = math.radians(self.angle)
-        cos_a = math.cos(angle_rad)
-        sin_a = math.sin(angle_rad)
-        
-        # Ship vertices (triangle)
-        points = [
-            (self.pos.x + cos_a * 15, self.pos.y + sin_a * 15),  # Front
-            (self.pos.x + cos_a * -10 + sin_a * -8, self.pos.y + sin_a * -10 + cos_a * 8),  # Back left
-            (self.pos.x + cos_a * -10 + sin_a * 8, self.pos.y + sin_a * -10 + cos_a * -8)   # Back right
-        ]
-        
-        pygame.draw.polygon(screen, WHITE, points, 2)
-
-class Bullet:
-    def __init__(self, x, y, angle):
-        self.pos = Vector2D(x, y)
-        speed = 10
-        self.velocity = Vector2D(
-            math.cos(math.radians(angle)) * speed,
-            math.sin(math.radians(angle)) * speed
-        )
-        self.lifetime = 60  # frames
-        self.radius = 2
-    
-    def update(self):
-        self.pos = self.pos + self.velocity
-        self.lifetime -= 1
-        
-        # Wrap around screen
-        self.pos.x %= SCREEN_WIDTH
-        self.pos.y %= SCREEN_HEIGHT
-        
-        return self.lifetime > 0
-    
-    def draw(self, screen):
-        pygame.draw.circle(screen, WHITE, (int(self.pos.x), int(self.pos.y)), self.radius)
+    return sound_bank.sound(BULLET_TONE)
 
-class Asteroid:
-    def __init__(self, x, y, size=3):
-        self.pos = Vector2D(x, y)
-        angle = random.uniform(0, 360)
-        speed = random.uniform(1, 3)
-        self.velocity = Vector2D(
-            math.cos(math.radians(angle)) * speed,
-            math.sin(math.radians(angle)) * speed
+class Game:
+    def __init__(self, simulation_factory=Simulation, dirty_rects=False, profile=False, record_path=None,
+                 player_name="PLAYER", leaderboard_path=LEADERBOARD_FILE, startup_report=False,
+                 render_fps=RENDER_FPS, sprite_atlas=False, stream_path=None, autopilot=None):
+        # Only the subsystems the game uses are initialized, not everything pygame.init() would start
+        self.startup = {"import": IMPORT_SECONDS}
+        self.init_started = time.perf_counter()
+        self.first_frame_at = None
+        self.startup_report = startup_report
+        
+        # The mixer opens here; sound effects and music are prepared on a background thread while the display opens
+        self.audio = Audio(
+            sound_bank, (BULLET_TONE, THRUST_TONE),
+            (MUSIC_FILE, os.path.join(os.path.dirname(os.path.abspath(__file__)), MUSIC_FILE)),
+            SOUND_CATEGORIES, MAX_VOICES,
         )
-        self.size = size
-        self.radius = size * 10
-        self.rotation = 0
-        self.rotation_speed = random.uniform(-3, 3)
-        
-        # Generate random shape
-        self.points = []
-        num_points = 8
-        for i in range(num_points):
-            angle = (360 / num_points) * i
-            variance = random.uniform(0.8, 1.2)
-            radius = self.radius * variance
-            x = math.cos(math.radians(angle)) * radius
-            y = math.sin(math.radians(angle)) * radius
-            self.points.append((x, y))
-    
-    def update(self):
-        self.pos = self.pos + self.velocity
-        self.rotation += self.rotation_speed
         
-        # Wrap around screen
-        self.pos.x %= SCREEN_WIDTH
-        self.pos.y %= SCREEN_HEIGHT
-    
-    def draw(self, screen):
-        # Rotate and translate points
-        rotated_points = []
-        for point in self.points:
-            cos_r = math.cos(math.radians(self.rotation))
-            sin_r = math.sin(math.radians(self.rotation))
-            
-            rotated_x = point[0] * cos_r - point[1] * sin_r
-            rotated_y = point[0] * sin_r + point[1] * cos_r
-            
-            final_x = rotated_x + self.pos.x
-            final_y = rotated_y + self.pos.y
-            
-            rotated_points.append((final_x, final_y))
-        
-        pygame.draw.polygon(screen, WHITE, rotated_points, 2)
-    
-    def split(self):
-        if self.size > 1:
-            new_asteroids = []
-            for _ in range(2):
-                new_asteroid = Asteroid(self.pos.x, self.pos.y, self.size - 1)
-                new_asteroids.append(new_asteroid)
-            return new_asteroids
-        return []
-
-def check_collision(obj1, obj2):
-    distance = math.sqrt((obj1.pos.x - obj2.pos.x)**2 + (obj1.pos.y - obj2.pos.y)**2)
-    return distance < (obj1.radius + obj2.radius)
-
-class Game:
-    def __init__(self):
+        pygame.display.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Asteroids")
-        self.clock = pygame.time.Clock()
+        self.startup["display"] = time.perf_counter() - self.init_started
         
-        self.ship = Ship(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-        self.bullets = []
-        self.asteroids = []
-        self.score = 0
-        self.lives = 3
+        # Input is read from the event queue once per frame into an immutable snapshot
+        self.input = InputReader()
+        self.controls = self.input.snapshot
+        self.latency = LatencyMeter()
+        self.clock = pygame.time.Clock()
+        self.render_fps = render_fps
+        self.dropped_ticks = 0  # Ticks skipped because the machine fell too far behind
+        
+        # Headless simulation owns ship, bullets, asteroids, score and lives
+        self.simulation_factory = simulation_factory
+        self.sim = simulation_factory()
+        
+        # Per-phase frame timings: F3 toggles the overlay, F4 dumps a Chrome trace
+        self.profiler = FrameProfiler(enabled=profile)
+        self.sim.profiler = self.profiler
+        
+        # Explosions and exhaust, emitted through the simulation's effect hooks
+        self.particles = ParticleSystem(size=(self.sim.width, self.sim.height))
+        self.sim.effects = self.particles
+        
+        # Optional input recording and state streaming, one log and one stream per game
+        self.record_path = record_path
+        self.stream_path = stream_path
+        self.recordings = 0
+        self.recorder = None
+        self.stream = None
+        self.autopilot = autopilot  # Plays instead of the mouse when set
+        self.start_recording()
+        
+        # Recent ticks kept for rewinding, where the simulation supports it
+        self.rewind = None
+        self.start_rewind()
         
         # High score system
-        self.high_scores_file = "high_scores.json"
-        self.high_scores = self.load_high_scores()
+        self.player_name = player_name
+        self.leaderboard = Leaderboard(leaderboard_path, legacy_json=LEGACY_HIGH_SCORES_FILE)
         self.show_high_scores = False
         self.new_high_score = False
+        self.pending_score = None  # Qualifying score of the game just over, saved when its game over screen is left
         
         # Game over system
         self.game_over = False
         self.game_over_timer = 0
         self.game_over_duration = 300  # 5 seconds at 60 FPS
         
-        # Load game over music
-        try:
-            pygame.mixer.music.load("Game Over (8-Bit Music).mp3")
-        except pygame.error:
-            print("Warning: Could not load Game Over (8-Bit Music).mp3")
-            # Try alternative path
-            try:
-                pygame.mixer.music.load(os.path.join(os.path.dirname(__file__), "Game Over (8-Bit Music).mp3"))
-                print("Loaded music from local directory")
-            except pygame.error:
-                print("Could not find Game Over (8-Bit Music).mp3 in any location")
-        
-        # Create sound effects
-        self.bullet_sound = create_bullet_sound()
-        
-        # Track shooting state for proper sync
-        self.mouse_was_pressed = False
-        self.space_was_pressed = False
-        
         # Pause functionality
         self.paused = False
-        self.enter_was_pressed = False
-        
-        # Create initial asteroids
-        for _ in range(5):
-            while True:
-                x = random.randint(0, SCREEN_WIDTH)
-                y = random.randint(0, SCREEN_HEIGHT)
-                # Make sure asteroid doesn't spawn on ship
-                if math.sqrt((x - self.ship.pos.x)**2 + (y - self.ship.pos.y)**2) > 100:
-                    self.asteroids.append(Asteroid(x, y))
-                    break
-        
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        self.large_font = pygame.font.Font(None, 72)
+        self.shot_requested = False
+        
+        # Fonts load on first use
+        self.fonts = Fonts()
+        
+        # Rendered text is cached; the HUD re-renders only when its values change
+        self.text = TextCache()
+        self.hud = Hud(self.text, self.fonts)
+        
+        # Persistent translucent overlays for the game over and pause screens
+        self.overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.overlay.set_alpha(128)
+        self.overlay.fill(BLACK)
+        self.pause_bg = None
+        
+        # Optional dirty-rectangle rendering: only regions drawn last frame or this frame are cleared and pushed
+        self.dirty = DirtyRects(self.screen.get_rect()) if dirty_rects else None
+        
+        # Optional pre-rendered asteroid rotations, blitted instead of rasterizing polygons every frame
+        self.atlas = None
+        if sprite_atlas:
+            from sprite_atlas import AsteroidAtlas
+            self.atlas = AsteroidAtlas()
+        
+        # A world larger than the screen is viewed through a camera that follows the ship
+        self.camera = None
+        if (self.sim.width, self.sim.height) != (SCREEN_WIDTH, SCREEN_HEIGHT):
+            from world import Camera
+            self.camera = Camera()
+        self.frame_signature = None
 
-    def load_high_scores(self):
-        """Load high scores from file"""
-        try:
-            if os.path.exists(self.high_scores_file):
-                with open(self.high_scores_file, 'r') as f:
-                    scores = json.load(f)
-                    # Ensure we have exactly 10 scores, fill with zeros if needed
-                    while len(scores) < 10:
-                        scores.append(0)
-                    return scores[:10]  # Keep only top 10
-            else:
-                return [0] * 10  # Default 10 empty scores
-        except:
-            return [0] * 10  # If file is corrupted, start fresh
-    
-    def save_high_scores(self):
-        """Save high scores to file"""
-        try:
-            with open(self.high_scores_file, 'w') as f:
-                json.dump(self.high_scores, f)
-        except:
-            pass  # If save fails, just continue
-    
     def check_high_score(self, score):
         """Check if score qualifies for high score list"""
-        return score > min(self.high_scores)
+        return self.leaderboard.qualifies(score)
     
     def add_high_score(self, score):
-        """Add new high score and sort the list"""
-        self.high_scores.append(score)
-        self.high_scores.sort(reverse=True)
-        self.high_scores = self.high_scores[:10]  # Keep only top 10
-        self.save_high_scores()
+        """Hold a new high score under the player's name until the game over screen is left"""
+        self.pending_score = score
         self.new_high_score = True
     
+    def save_high_score(self):
+        # Saved only once the game can't be rewound any more, so a rewound game scores once
+        if self.pending_score is not None:
+            self.leaderboard.add(self.player_name, self.pending_score)
+            self.pending_score = None
+    
     def handle_events(self):
-        # Get current input states
-        mouse_buttons = pygame.mouse.get_pressed()
-        keys = pygame.key.get_pressed()
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_h:
-                    self.show_high_scores = not self.show_high_scores
-                elif event.key == pygame.K_r and self.game_over:
-                    # Restart game when R is pressed during game over
-                    self.restart_from_game_over()
-        
-        # Check for pause toggle with Enter key (only if not in game over)
-        if not self.game_over and keys[pygame.K_RETURN]:
-            if not self.enter_was_pressed:  # First frame of press
-                self.paused = not self.paused
-        self.enter_was_pressed = keys[pygame.K_RETURN]
+        controls = self.controls = self.input.poll()
+        if controls.quit:
+            return False
+        pressed = controls.pressed
+        
+        if "high_scores" in pressed:
+            self.show_high_scores = not self.show_high_scores
+            if self.show_high_scores:
+                # Pick up scores other games sharing the file have added
+                self.leaderboard.refresh()
+        if "profiler" in pressed:
+            self.profiler.toggle()
+            if self.dirty is not None:
+                self.dirty.invalidate()
+        if "trace" in pressed:
+            self.profiler.dump_chrome_trace(TRACE_FILE)
+            print(f"Wrote {len(self.profiler.frames)} frames to {TRACE_FILE}")
+        if "restart" in pressed and self.game_over:
+            # Restart game when R is pressed during game over
+            self.restart_from_game_over()
+        if "rewind" in pressed and self.rewind is not None and not self.show_high_scores:
+            self.rewind_game()
+        
+        # Pause toggle (only if not in game over)
+        if "pause" in pressed and not self.game_over:
+            self.paused = not self.paused
         
         # Only handle game inputs when not paused, not showing high scores, and not game over
-        if not self.paused and not self.show_high_scores and not self.game_over:
-            # Check for shooting with right mouse button
-            if mouse_buttons[2]:  # Right mouse button pressed
-                if not self.mouse_was_pressed:  # First frame of press
-                    self.shoot_bullet()
-            self.mouse_was_pressed = mouse_buttons[2]
-            
-            # Check for shooting with spacebar
-            if keys[pygame.K_SPACE]:
-                if not self.space_was_pressed:  # First frame of press
-                    self.shoot_bullet()
-            self.space_was_pressed = keys[pygame.K_SPACE]
+        if "shoot" in pressed and not self.paused and not self.show_high_scores and not self.game_over:
+            self.shoot_bullet()
         
         return True
 
     def shoot_bullet(self):
-        # Play bullet sound immediately and create bullet
-        self.bullet_sound.play()
-        bullet = Bullet(self.ship.pos.x, self.ship.pos.y, self.ship.angle)
-        self.bullets.append(bullet)
+        # Play bullet sound immediately; the bullet is created on the next simulation tick
+        self.audio.play("bullets", BULLET_TONE)
+        self.shot_requested = True
+        self.latency.pressed(self.controls.time)
+    
+    # Simulation state lives in self.sim; these keep the old attribute names working
+    @property
+    def ship(self):
+        return self.sim.ship
+    
+    @property
+    def bullets(self):
+        return self.sim.bullets
+    
+    @property
+    def asteroids(self):
+        return self.sim.asteroids
+    
+    @property
+    def score(self):
+        return self.sim.score
+    
+    @property
+    def lives(self):
+        return self.sim.lives
+    
+    # Sounds are silent until the audio thread is ready
+    @property
+    def bullet_sound(self):
+        return self.audio.sound(BULLET_TONE)
+    
+    @property
+    def thrust_sound(self):
+        return self.audio.sound(THRUST_TONE)
+    
+    @property
+    def font(self):
+        return self.fonts.font
+    
+    @property
+    def small_font(self):
+        return self.fonts.small_font
+    
+    @property
+    def large_font(self):
+        return self.fonts.large_font
+    
+    def startup_times(self):
+        """Startup breakdown in milliseconds; waits for the audio thread to finish"""
+        self.audio.wait()
+        times = dict(self.startup)
+        times["fonts"] = self.fonts.load_seconds
+        times["mixer"] = self.audio.mixer_seconds
+        times["audio"] = self.audio.init_seconds  # In the background, overlapping the others
+        if self.first_frame_at is not None:
+            times["first_frame"] = self.first_frame_at - self.init_started
+            times["total"] = self.first_frame_at - IMPORT_STARTED
+        return {name: round(seconds * 1000, 2) for name, seconds in times.items()}
+    
+    def read_input(self):
+        """Build the simulation input for this tick from the frame's input snapshot, or the autopilot"""
+        if self.autopilot is not None:
+            inputs = self.autopilot(self.sim, self.sim.ticks)
+            if inputs.shoot:
+                self.audio.play("bullets", BULLET_TONE)
+            self.shot_requested = False
+        else:
+            controls = self.controls
+            if controls.stick is not None:
+                # The stick points the way to face, from wherever the ship is
+                aim = (self.ship.pos.x + controls.stick[0] * 100, self.ship.pos.y + controls.stick[1] * 100)
+            elif self.camera is not None:
+                aim = self.camera.to_world(self.sim, controls.pointer)
+            else:
+                aim = controls.pointer
+            inputs = InputState(aim=aim, thrust="thrust" in controls.held, shoot=self.shot_requested)
+            if self.shot_requested:
+                self.latency.applied()
+            self.shot_requested = False
+        if self.recorder is not None:
+            inputs = self.recorder.record(inputs)
+        return inputs
+    
+    def recording_path(self, path):
+        if self.recordings > 1:
+            root, ext = os.path.splitext(path)
+            path = f"{root}-{self.recordings}{ext}"
+        return path
+    
+    def start_recording(self):
+        if self.record_path is None and self.stream_path is None:
+            return
+        self.recordings += 1
+        if self.record_path is not None:
+            from replay import InputRecorder
+            self.recorder = InputRecorder(self.recording_path(self.record_path), self.sim)
+        if self.stream_path is not None:
+            from state_stream import StateStreamWriter
+            self.stream = StateStreamWriter(self.recording_path(self.stream_path), self.sim)
+    
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Recorded {self.recorder.ticks} ticks to {self.recorder.path}")
+            self.recorder = None
+        if self.stream is not None:
+            self.stream.close()
+            print(f"Streamed {self.stream.frames} frames to {self.stream.path}")
+            self.stream = None
+    
+    def start_rewind(self):
+        self.rewind = None
+        if self.sim.rewindable:
+            from rewind import RewindBuffer
+            self.rewind = RewindBuffer()
+            self.rewind.record(self.sim)
+    
+    def rewind_game(self):
+        """Go back REWIND_SECONDS and play on from there, out of the game over screen too"""
+        if self.rewind.rewind(self.sim, REWIND_SECONDS) is None:
+            return
+        # An input log or state stream can't express the jump, so recording ends here
+        self.stop_recording()
+        self.particles.clear()
+        self.shot_requested = False
+        if self.game_over:
+            self.audio.stop_music()
+            self.game_over = False
+            self.game_over_timer = 0
+            self.pending_score = None
+            self.new_high_score = False
+    
+    def update_thrust_sound(self, thrusting):
+        # Loops while thrusting; only a change of state reaches the mixer
+        self.audio.loop("thrust", THRUST_TONE, thrusting)
     
     def update(self):
         # Handle game over timer
         if self.game_over:
             self.game_over_timer += 1
+            self.particles.update()  # Let the last explosion play out
             if self.game_over_timer >= self.game_over_duration:
                 self.restart_from_game_over()
             return
@@ -381,77 +352,45 @@ class Game:
         # Don't update game state when paused or showing high scores
         if self.paused or self.show_high_scores:
             return
-            
-        self.ship.update()
-        
-        # Update bullets
-        self.bullets = [bullet for bullet in self.bullets if bullet.update()]
-        
-        # Update asteroids
-        for asteroid in self.asteroids:
-            asteroid.update()
-        
-        # Check bullet-asteroid collisions
-        for bullet in self.bullets[:]:
-            for asteroid in self.asteroids[:]:
-                if check_collision(bullet, asteroid):
-                    self.bullets.remove(bullet)
-                    self.asteroids.remove(asteroid)
-                    
-                    # Split asteroid
-                    new_asteroids = asteroid.split()
-                    self.asteroids.extend(new_asteroids)
-                    
-                    # Increase score
-                    self.score += (4 - asteroid.size) * 20
-                    break
         
-        # Check ship-asteroid collisions
-        for asteroid in self.asteroids:
-            if check_collision(self.ship, asteroid):
-                self.lives -= 1
-                if self.lives <= 0:
-                    # Trigger game over sequence
-                    self.trigger_game_over()
-                else:
-                    # Reset ship position
-                    self.ship.pos = Vector2D(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-                    self.ship.velocity = Vector2D(0, 0)
-                break
-        
-        # Check if all asteroids destroyed
-        if not self.asteroids:
-            # Spawn more asteroids
-            for _ in range(min(5 + self.score // 1000, 10)):
-                while True:
-                    x = random.randint(0, SCREEN_WIDTH)
-                    y = random.randint(0, SCREEN_HEIGHT)
-                    if math.sqrt((x - self.ship.pos.x)**2 + (y - self.ship.pos.y)**2) > 100:
-                        self.asteroids.append(Asteroid(x, y))
-                        break
+        inputs = self.read_input()
+        with self.profiler.phase("sim.step"):
+            self.sim.step(inputs)
+        if self.stream is not None:
+            with self.profiler.phase("stream.write"):
+                self.stream.write(self.sim, self.leaderboard.best)
+        if self.rewind is not None:
+            with self.profiler.phase("rewind.record"):
+                self.rewind.record(self.sim)
+        with self.profiler.phase("particles.update"):
+            self.particles.update()
+        self.update_thrust_sound(inputs.thrust)
+        
+        if self.sim.game_over:
+            # Trigger game over sequence
+            self.trigger_game_over()
 
     def trigger_game_over(self):
         """Start the game over sequence"""
         self.game_over = True
         self.game_over_timer = 0
+        self.stop_recording()
         
         # Check for high score before showing game over
         if self.check_high_score(self.score):
             self.add_high_score(self.score)
         
         # Stop any playing sounds
-        pygame.mixer.stop()
+        self.audio.stop_all()
         
         # Play game over music
-        try:
-            pygame.mixer.music.play()
-        except pygame.error:
-            print("Could not play game over music")
+        self.audio.play_music()
 
     def restart_from_game_over(self):
         """Restart the game from game over state"""
         # Stop game over music
-        pygame.mixer.music.stop()
+        self.audio.stop_music()
+        self.save_high_score()
         
         # Reset game state
         self.game_over = False
@@ -459,151 +398,164 @@ class Game:
         self.reset_game()
 
     def reset_game(self):
-        self.ship = Ship(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-        self.bullets = []
-        self.asteroids = []
-        self.score = 0
-        self.lives = 3
+        self.stop_recording()
+        self.sim = self.simulation_factory()
+        self.sim.profiler = self.profiler
+        self.particles.clear()
+        self.sim.effects = self.particles
+        self.start_recording()
+        self.start_rewind()
         self.new_high_score = False
         
-        # Reset shooting state tracking
-        self.mouse_was_pressed = False
-        self.space_was_pressed = False
-        
         # Reset pause state
         self.paused = False
-        self.enter_was_pressed = False
+        self.shot_requested = False
         
         # Don't reset game_over state here - let restart_from_game_over handle it
+
+    def draw_entities(self, lag=0.0):
+        """Draw particles, ship, bullets and asteroids lag ticks behind the latest state and return the rects they covered"""
+        origin = self.camera.origin(self.sim, lag) if self.camera is not None else None
+        rects = self.particles.draw(self.screen, lag, origin)
+        if rects is None:
+            # Particles cover too much of the screen for separate rects: repaint and present all of it
+            rects = [self.screen.get_rect()]
+        if self.camera is not None:
+            rects.extend(self.camera.draw(self.screen, self.sim, lag, self.atlas))
+            return rects
+        
+        rects.append(self.ship.draw(self.screen, lag))
+        
+        # Array-backed stores draw themselves in one batch
+        if hasattr(self.bullets, "draw"):
+            rects.extend(self.bullets.draw(self.screen, lag))
+        else:
+            rects.extend(bullet.draw(self.screen, lag) for bullet in self.bullets)
         
-        # Create initial asteroids
-        for _ in range(5):
-            while True:
-                x = random.randint(0, SCREEN_WIDTH)
-                y = random.randint(0, SCREEN_HEIGHT)
-                if math.sqrt((x - self.ship.pos.x)**2 + (y - self.ship.pos.y)**2) > 100:
-                    self.asteroids.append(Asteroid(x, y))
-                    break
+        if hasattr(self.asteroids, "draw"):
+            rects.extend(self.asteroids.draw(self.screen, lag, self.atlas))
+        else:
+            rects.extend(draw_asteroids(self.screen, WHITE, self.asteroids, lag, self.atlas))
+        return rects
+    
+    def mark_dirty(self, rects):
+        if self.dirty is not None:
+            self.dirty.extend(rects)
+    
+    def begin_frame(self):
+        """Clear the screen for a new frame; returns False when nothing on screen needs to change"""
+        if self.dirty is None:
+            self.screen.fill(BLACK)
+            return True
+        
+        # Game over, pause and high score screens are static apart from the countdown,
+        # so they are repainted in full once when they change and otherwise left alone
+        static = self.game_over or self.paused or self.show_high_scores
+        signature = (
+            self.game_over, self.paused, self.show_high_scores,
+            getattr(self, 'show_instructions', True), self.new_high_score,
+            self.game_over_timer // 60 if self.game_over else None,
+        )
+        if signature != self.frame_signature:
+            self.frame_signature = signature
+            self.dirty.invalidate()
+        elif static:
+            return False
+        self.dirty.erase(self.screen, BLACK)
+        return True
+    
+    def present(self):
+        if self.dirty is None:
+            pygame.display.flip()
+        else:
+            self.dirty.present()
+        self.latency.presented(time.perf_counter())
 
-    def draw(self):
-        self.screen.fill(BLACK)
+    def draw(self, lag=0.0):
+        """Draw a frame; lag (0-1 ticks) places moving entities between the previous and latest tick"""
+        if not self.begin_frame():
+            return
         
         # Draw game over screen
         if self.game_over:
             # Draw final game state in background (dimmed)
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(128)
-            overlay.fill(BLACK)
-            
             # Draw game elements dimmed
-            self.ship.draw(self.screen)
-            for bullet in self.bullets:
-                bullet.draw(self.screen)
-            for asteroid in self.asteroids:
-                asteroid.draw(self.screen)
+            self.draw_entities()
             
             # Apply dark overlay
-            self.screen.blit(overlay, (0, 0))
+            self.screen.blit(self.overlay, (0, 0))
             
             # Draw "GAME OVER" text
-            game_over_text = self.large_font.render("GAME OVER", True, WHITE)
+            game_over_text = self.text.render(self.large_font, "GAME OVER")
             game_over_x = SCREEN_WIDTH // 2 - game_over_text.get_width() // 2
             game_over_y = SCREEN_HEIGHT // 2 - 100
             self.screen.blit(game_over_text, (game_over_x, game_over_y))
             
             # Draw final score
-            final_score_text = self.font.render(f"Final Score: {self.score}", True, WHITE)
+            final_score_text = self.text.render(self.font, f"Final Score: {self.score}")
             final_score_x = SCREEN_WIDTH // 2 - final_score_text.get_width() // 2
             final_score_y = game_over_y + 80
             self.screen.blit(final_score_text, (final_score_x, final_score_y))
             
             # Draw high score if achieved
             if self.new_high_score:
-                new_high_text = self.font.render("NEW HIGH SCORE!", True, WHITE)
+                new_high_text = self.text.render(self.font, "NEW HIGH SCORE!")
                 new_high_x = SCREEN_WIDTH // 2 - new_high_text.get_width() // 2
                 new_high_y = final_score_y + 40
                 self.screen.blit(new_high_text, (new_high_x, new_high_y))
             
             # Draw restart instructions
-            restart_text = self.small_font.render("Press R to restart or wait for auto-restart", True, WHITE)
+            restart_text = self.text.render(self.small_font, "Press R to restart, BACKSPACE to rewind, or wait for auto-restart")
             restart_x = SCREEN_WIDTH // 2 - restart_text.get_width() // 2
             restart_y = SCREEN_HEIGHT - 100
             self.screen.blit(restart_text, (restart_x, restart_y))
             
             # Draw countdown timer
             remaining_time = (self.game_over_duration - self.game_over_timer) // 60 + 1
-            timer_text = self.small_font.render(f"Auto-restart in: {remaining_time}s", True, WHITE)
+            timer_text = self.text.render(self.small_font, f"Auto-restart in: {remaining_time}s")
             timer_x = SCREEN_WIDTH // 2 - timer_text.get_width() // 2
             timer_y = restart_y + 30
             self.screen.blit(timer_text, (timer_x, timer_y))
             
         # Normal game drawing
         elif not self.show_high_scores:
-            self.ship.draw(self.screen)
-            
-            for bullet in self.bullets:
-                bullet.draw(self.screen)
-            
-            for asteroid in self.asteroids:
-                asteroid.draw(self.screen)
+            with self.profiler.phase("draw_entities"):
+                self.mark_dirty(self.draw_entities(lag))
         
         # Always draw UI (except during game over)
         if not self.game_over:
-            score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-            lives_text = self.font.render(f"Lives: {self.lives}", True, WHITE)
-            
-            self.screen.blit(score_text, (10, 10))
-            self.screen.blit(lives_text, (10, 50))
-            
-            # Draw high score indicator
-            if self.high_scores[0] > 0:
-                high_score_text = self.small_font.render(f"High Score: {self.high_scores[0]}", True, WHITE)
-                self.screen.blit(high_score_text, (10, 90))
+            with self.profiler.phase("hud"):
+                self.mark_dirty(self.hud.draw_status(self.screen, self.score, self.lives, self.leaderboard.best))
             
             # Draw new high score message (only during gameplay)
             if self.new_high_score and not self.game_over:
-                new_high_text = self.font.render("NEW HIGH SCORE!", True, WHITE)
+                new_high_text = self.text.render(self.font, "NEW HIGH SCORE!")
                 x = SCREEN_WIDTH // 2 - new_high_text.get_width() // 2
                 y = 150
-                self.screen.blit(new_high_text, (x, y))
+                self.mark_dirty([self.screen.blit(new_high_text, (x, y))])
         
         # Draw high scores table
         if self.show_high_scores and not self.game_over:
-            title_text = self.font.render("HIGH SCORES", True, WHITE)
-            title_x = SCREEN_WIDTH // 2 - title_text.get_width() // 2
-            title_y = 100
-            self.screen.blit(title_text, (title_x, title_y))
-            
-            for i, score in enumerate(self.high_scores):
-                if score > 0:  # Only show non-zero scores
-                    rank_text = self.small_font.render(f"{i+1:2d}. {score:,}", True, WHITE)
-                    rank_x = SCREEN_WIDTH // 2 - rank_text.get_width() // 2
-                    rank_y = title_y + 50 + i * 25
-                    self.screen.blit(rank_text, (rank_x, rank_y))
-            
-            # Instructions to close high scores
-            close_text = self.small_font.render("Press H to close", True, WHITE)
-            close_x = SCREEN_WIDTH // 2 - close_text.get_width() // 2
-            close_y = title_y + 50 + 10 * 25 + 20
-            self.screen.blit(close_text, (close_x, close_y))
+            self.hud.draw_high_scores(self.screen, self.leaderboard.entries)
         
         # Draw pause indicator
         elif self.paused and not self.game_over:
-            pause_text = self.font.render("PAUSED", True, WHITE)
+            pause_text = self.text.render(self.font, "PAUSED")
             pause_x = SCREEN_WIDTH // 2 - pause_text.get_width() // 2
             pause_y = SCREEN_HEIGHT // 2 - pause_text.get_height() // 2
             
             # Draw semi-transparent background for pause text
-            pause_bg = pygame.Surface((pause_text.get_width() + 40, pause_text.get_height() + 20))
-            pause_bg.set_alpha(128)
-            pause_bg.fill(BLACK)
-            self.screen.blit(pause_bg, (pause_x - 20, pause_y - 10))
+            if self.pause_bg is None:
+                self.pause_bg = pygame.Surface((pause_text.get_width() + 40, pause_text.get_height() + 20))
+                self.pause_bg.set_alpha(128)
+                self.pause_bg.fill(BLACK)
+            self.screen.blit(self.pause_bg, (pause_x - 20, pause_y - 10))
             
             # Draw pause text
             self.screen.blit(pause_text, (pause_x, pause_y))
             
             # Draw resume instruction
-            resume_text = pygame.font.Font(None, 24).render("Press ENTER to resume", True, WHITE)
+            resume_text = self.text.render(self.small_font, "Press ENTER to resume")
             resume_x = SCREEN_WIDTH // 2 - resume_text.get_width() // 2
             resume_y = pause_y + pause_text.get_height() + 20
             self.screen.blit(resume_text, (resume_x, resume_y))
@@ -613,39 +565,103 @@ class Game:
             instructions = [
                 "Mouse: Point to Aim",
                 "Left Click: Thrust | Right Click: Shoot",
-                "ENTER: Pause | H: High Scores",
+                "ENTER: Pause | H: High Scores | BACKSPACE: Rewind",
                 "Move mouse to start"
             ]
             for i, instruction in enumerate(instructions):
-                text = self.font.render(instruction, True, WHITE)
+                text = self.text.render(self.font, instruction)
                 x = SCREEN_WIDTH // 2 - text.get_width() // 2
                 y = SCREEN_HEIGHT // 2 + i * 40
-                self.screen.blit(text, (x, y))
+                self.mark_dirty([self.screen.blit(text, (x, y))])
+        
+        if self.profiler.enabled:
+            self.mark_dirty(self.profiler.draw_overlay(self.screen, self.text, self.small_font))
         
-        pygame.display.flip()
+        with self.profiler.phase("present"):
+            self.present()
 
+    def advance(self, accumulator):
+        """Run the whole ticks that fit in accumulator seconds, up to the catch-up cap; returns the leftover time"""
+        ticks = 0
+        while accumulator >= TICK_SECONDS and ticks < MAX_CATCH_UP_TICKS:
+            self.update()
+            accumulator -= TICK_SECONDS
+            ticks += 1
+        if accumulator >= TICK_SECONDS:
+            # Too far behind to catch up: drop the backlog instead of spiralling
+            dropped = int(accumulator / TICK_SECONDS)
+            self.dropped_ticks += dropped
+            accumulator -= dropped * TICK_SECONDS
+        return accumulator
+    
     def run(self):
         running = True
         self.show_instructions = True
+        accumulator = 0.0
+        previous = time.perf_counter()
         
         while running:
-            running = self.handle_events()
+            self.profiler.begin_frame()
+            now = time.perf_counter()
+            accumulator += now - previous
+            previous = now
+            
+            with self.profiler.phase("handle_events"):
+                running = self.handle_events()
             
-            # Hide instructions after mouse movement (but not when paused, showing high scores, or game over)
+            # Hide instructions after any input (but not when paused, showing high scores, or game over)
             if not self.paused and not self.show_high_scores and not self.game_over:
-                mouse_pos = pygame.mouse.get_pos()
-                mouse_buttons = pygame.mouse.get_pressed()
-                if mouse_pos != (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2) or any(mouse_buttons):
+                controls = self.controls
+                if controls.pointer != (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2) or controls.held or controls.stick is not None:
                     self.show_instructions = False
             
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
-        
+            with self.profiler.phase("update"):
+                accumulator = self.advance(accumulator)
+            
+            # Interpolate only while the simulation is moving; frozen screens are drawn as they are
+            frozen = self.paused or self.show_high_scores or self.game_over
+            with self.profiler.phase("draw"):
+                self.draw(0.0 if frozen else 1 - accumulator / TICK_SECONDS)
+            if self.first_frame_at is None:
+                self.first_frame_at = time.perf_counter()
+                if self.startup_report:
+                    break
+            with self.profiler.phase("clock.tick"):
+                self.clock.tick(self.render_fps)
+            self.profiler.end_frame()
+        
+        self.stop_recording()
+        self.save_high_score()
+        self.leaderboard.close()
+        if self.startup_report:
+            print(json.dumps(self.startup_times()))
+        if self.profiler.enabled:
+            if self.latency.samples:
+                print(f"Input to present latency: {json.dumps(self.latency.summary())}")
+            if self.audio.available:
+                print(f"Mixer load: {json.dumps(self.audio.voices.stats())}")
+            if self.rewind is not None:
+                print(f"Rewind buffer: {json.dumps(self.rewind.stats())}")
         pygame.quit()
         sys.exit()
 
 # Run the game
 if __name__ == "__main__":
-    game = Game()
+    record_path = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None
+    player_name = sys.argv[sys.argv.index("--name") + 1] if "--name" in sys.argv else "PLAYER"
+    render_fps = int(sys.argv[sys.argv.index("--render-fps") + 1]) if "--render-fps" in sys.argv else RENDER_FPS
+    stream_path = sys.argv[sys.argv.index("--stream") + 1] if "--stream" in sys.argv else None
+    simulation_factory = Simulation
+    if "--world" in sys.argv:
+        if stream_path is not None:
+            sys.exit("--stream records a single screen and can't be used with --world")
+        from world import WorldSimulation
+        simulation_factory = WorldSimulation
+    autopilot = None
+    if "--autopilot" in sys.argv:
+        from spatial_query import Autopilot
+        autopilot = Autopilot()
+    game = Game(simulation_factory=simulation_factory, dirty_rects="--dirty-rects" in sys.argv, profile="--profile" in sys.argv, record_path=record_path,
+                player_name=player_name, startup_report="--startup-report" in sys.argv, render_fps=render_fps,
+                sprite_atlas="--sprite-atlas" in sys.argv, stream_path=stream_path, autopilot=autopilot)
     game.run()
@@ -0,0 +1,247 @@
+import math
+import os
+import threading
+import time
+import pygame
+
+class SilentSound:
+    """Stands in for a Sound while the mixer is starting up or unavailable"""
+    def play(self, loops=0):
+        return None
+
+    def stop(self):
+        pass
+
+SILENT = SilentSound()
+
+class Category:
+    """A kind of sound effect with channels of its own"""
+    def __init__(self, name, channels, priority, min_interval=0.0):
+        self.name = name
+        self.channel_count = channels
+        self.priority = priority          # Higher steals voices from lower when the voice cap is hit
+        self.min_interval = min_interval  # Seconds; the same tone again sooner than this is dropped
+        self.channels = []
+        self.voices = []  # Per channel: [ends at, started at] (perf_counter seconds), or None when idle
+        self.last_played = {}  # Tone -> perf_counter when it last started
+        self.looping = None    # Tone currently looping, if any
+        self.played = self.stolen = self.rate_limited = self.dropped = 0
+
+class VoiceManager:
+    """Plays effects on channels reserved per category, with at most max_voices sounding at once
+
+    Voices are tracked by their known end times, so nothing asks the mixer
+    whether a channel is busy. When a category's channels are all sounding,
+    its oldest voice is cut. When max_voices are sounding across all
+    categories, the oldest voice of the lowest priority not above the new
+    sound's is cut, and if there is none the new sound is dropped.
+    """
+    def __init__(self, categories, max_voices):
+        # categories maps name to (channels, priority, min_interval)
+        self.categories = {name: Category(name, *spec) for name, spec in categories.items()}
+        self.max_voices = max_voices
+        self.peak_voices = 0
+
+    def attach(self):
+        """Take over the mixer's channels; called once the mixer is up"""
+        total = sum(category.channel_count for category in self.categories.values())
+        pygame.mixer.set_num_channels(total)
+        # Reserved channels are never picked by Sound.play, so everything goes through here
+        pygame.mixer.set_reserved(total)
+        first = 0
+        for category in self.categories.values():
+            category.channels = [pygame.mixer.Channel(i) for i in range(first, first + category.channel_count)]
+            category.voices = [None] * category.channel_count
+            first += category.channel_count
+
+    def sounding(self, now):
+        """Voices still sounding at now, as (category, slot); finished ones are cleared"""
+        voices = []
+        for category in self.categories.values():
+            for slot, voice in enumerate(category.voices):
+                if voice is not None:
+                    if voice[0] <= now:
+                        category.voices[slot] = None
+                    else:
+                        voices.append((category, slot))
+        return voices
+
+    def play(self, name, sound, tone, loops=0):
+        """Start sound in a category; returns its Channel, or None when it was limited or dropped"""
+        category = self.categories[name]
+        if not category.channels:
+            return None
+        now = time.perf_counter()
+        if now - category.last_played.get(tone, -math.inf) < category.min_interval:
+            category.rate_limited += 1
+            return None
+
+        voices = self.sounding(now)
+        slot = next((i for i, voice in enumerate(category.voices) if voice is None), None)
+        victim = None
+        if slot is None:
+            # Category full: cut its own oldest voice
+            victim = min(((category, i) for i in range(len(category.voices))), key=lambda v: v[0].voices[v[1]][1])
+        elif len(voices) >= self.max_voices:
+            candidates = [v for v in voices if v[0].priority <= category.priority]
+            if not candidates:
+                category.dropped += 1
+                return None
+            victim = min(candidates, key=lambda v: (v[0].priority, v[0].voices[v[1]][1]))
+        if victim is not None:
+            owner, victim_slot = victim
+            owner.channels[victim_slot].stop()
+            if owner.voices[victim_slot][0] == math.inf:
+                owner.looping = None  # Restarted by the next loop() call that wants it on
+            owner.voices[victim_slot] = None
+            owner.stolen += 1
+            if owner is category:
+                slot = victim_slot
+
+        channel = category.channels[slot]
+        channel.play(sound, loops)
+        length = math.inf if loops < 0 else sound.get_length() * (loops + 1)
+        category.voices[slot] = [now + length, now]
+        category.last_played[tone] = now
+        category.played += 1
+        self.peak_voices = max(self.peak_voices, len(voices) + (victim is None))
+        return channel
+
+    def loop(self, name, sound, tone, on):
+        """Keep tone looping in a category while on; repeated calls cost a comparison"""
+        category = self.categories[name]
+        if on:
+            if category.looping != tone:
+                if self.play(name, sound, tone, -1) is not None:
+                    category.looping = tone
+        elif category.looping is not None:
+            category.looping = None
+            for slot, voice in enumerate(category.voices):
+                if voice is not None and voice[0] == math.inf:
+                    category.channels[slot].stop()
+                    category.voices[slot] = None
+
+    def stop_all(self):
+        for category in self.categories.values():
+            category.voices = [None] * len(category.voices)
+            category.looping = None
+
+    def stats(self):
+        """Mixer load: voices sounding now against the cap, the peak, and per-category counters"""
+        return {
+            "voices": len(self.sounding(time.perf_counter())),
+            "max_voices": self.max_voices,
+            "peak_voices": self.peak_voices,
+            "categories": {
+                name: {"played": c.played, "stolen": c.stolen, "rate_limited": c.rate_limited, "dropped": c.dropped}
+                for name, c in self.categories.items()
+            },
+        }
+
+class Audio:
+    """Mixer, sound effects and music; effects and music are prepared on a background thread so the first frame doesn't wait for them
+
+    The mixer itself opens on the calling thread, as SDL's subsystems must not
+    be initialized concurrently. Until the background thread finishes, sounds
+    are silent and music requests are ignored. Effects played through play()
+    and loop() go through a VoiceManager when categories are given.
+    """
+    def __init__(self, sound_bank, tones=(), music_paths=(), categories=None, max_voices=8):
+        self.sound_bank = sound_bank
+        self.voices = VoiceManager(categories or {}, max_voices)
+        self.tones = tones
+        self.music_paths = music_paths
+        self.available = False
+        self.music_loaded = False
+        self.init_seconds = None
+        self.ready = threading.Event()
+
+        start = time.perf_counter()
+        try:
+            pygame.mixer.init()
+            self.voices.attach()
+            self.available = True
+        except pygame.error as e:
+            print(f"Warning: audio unavailable ({e})")
+        self.mixer_seconds = time.perf_counter() - start
+
+        self.thread = threading.Thread(target=self.start, name="audio-init", daemon=True)
+        self.thread.start()
+
+    def start(self):
+        start = time.perf_counter()
+        try:
+            if self.available:
+                self.prepare()
+        finally:
+            # Set even when preparing fails, so nothing waiting on the audio hangs
+            self.init_seconds = time.perf_counter() - start
+            self.ready.set()
+
+    def prepare(self):
+        # Synthesize (or read back from the disk cache) the effects now, not on first use
+        for tone in self.tones:
+            self.sound_bank.sound(tone)
+        for path in self.music_paths:
+            try:
+                pygame.mixer.music.load(path)
+                self.music_loaded = True
+                break
+            except pygame.error:
+                continue
+        else:
+            if self.music_paths:
+                print(f"Could not find {os.path.basename(self.music_paths[0])} in any location")
+
+    def wait(self, timeout=None):
+        return self.ready.wait(timeout)
+
+    def sound(self, tone):
+        if not self.ready.is_set() or not self.available:
+            return SILENT
+        return self.sound_bank.sound(tone)
+
+    def play(self, category, tone):
+        """Play an effect in a category, subject to its rate limit and the voice cap"""
+        if self.ready.is_set() and self.available:
+            return self.voices.play(category, self.sound_bank.sound(tone), tone)
+        return None
+
+    def loop(self, category, tone, on):
+        """Start or stop a looping effect; cheap to call every tick with the same state"""
+        if self.ready.is_set() and self.available:
+            self.voices.loop(category, self.sound_bank.sound(tone), tone, on)
+
+    def stop_all(self):
+        if self.ready.is_set() and self.available:
+            pygame.mixer.stop()
+            self.voices.stop_all()
+
+    def play_music(self):
+        if self.ready.is_set() and self.music_loaded:
+            try:
+                pygame.mixer.music.play()
+            except pygame.error:
+                print("Could not play game over music")
+
+    def stop_music(self):
+        if self.ready.is_set() and self.music_loaded:
+            pygame.mixer.music.stop()
+
+if __name__ == "__main__":
+    # Bullet spam: a shot every frame at 120 fps for two seconds, with thrust held throughout
+    import json
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from sound_bank import SoundBank, BULLET_TONE, THRUST_TONE
+
+    audio = Audio(SoundBank(), (BULLET_TONE, THRUST_TONE), categories={"thrust": (1, 2, 0.0), "bullets": (4, 1, 0.03)}, max_voices=4)
+    audio.wait()
+    spent = 0.0
+    frames = 240
+    for _ in range(frames):
+        start = time.perf_counter()
+        audio.play("bullets", BULLET_TONE)
+        audio.loop("thrust", THRUST_TONE, True)
+        spent += time.perf_counter() - start
+        time.sleep(1 / 120)
+    print(f"{spent * 1e6 / frames:.1f} us per frame; {json.dumps(audio.voices.stats())}")
@@ -0,0 +1,141 @@
+"""Play many seeded games headlessly across a process pool
+
+Each game runs uncapped with an input policy until game over or a tick limit.
+Per-game results stream out as JSON lines as soon as each game finishes, and a
+summary is printed at the end:
+
+    python batch.py --games 1000 --policy random --output results.jsonl
+"""
+import os
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, InputState, Simulation, scripted_input
+from spatial_query import Autopilot
+
+# Input policies: policy(sim, tick, rng) -> InputState
+def idle_policy(sim, tick, rng):
+    return InputState()
+
+def random_policy(sim, tick, rng):
+    return InputState(
+        aim=(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT)),
+        thrust=rng.random() < 0.3,
+        shoot=rng.random() < 0.1,
+    )
+
+def scripted_policy(sim, tick, rng):
+    return scripted_input(tick)
+
+def nearest_policy(sim, tick, rng):
+    """Aim at the nearest asteroid and fire every 8 ticks; never thrust"""
+    ship = sim.ship.pos
+    nearest = min(sim.asteroids, key=lambda a: (a.pos.x - ship.x) ** 2 + (a.pos.y - ship.y) ** 2, default=None)
+    aim = (nearest.pos.x, nearest.pos.y) if nearest else (ship.x + 1, ship.y)
+    return InputState(aim=aim, shoot=tick % 8 == 0)
+
+AUTOPILOT = Autopilot()  # One per worker process; it keeps no state between ticks besides its timings
+
+def autopilot_policy(sim, tick, rng):
+    """Dodge incoming asteroids and lead shots using the batched spatial queries"""
+    return AUTOPILOT(sim, tick)
+
+POLICIES = {
+    "idle": idle_policy,
+    "random": random_policy,
+    "scripted": scripted_policy,
+    "nearest": nearest_policy,
+    "autopilot": autopilot_policy,
+}
+
+def play_game(job):
+    """Run one seeded game to completion; runs inside a worker process"""
+    seed, policy_name, max_ticks = job
+    policy = POLICIES[policy_name]
+    sim = Simulation(seed=seed)
+    rng = random.Random(seed ^ 0x5EED)  # Policy randomness, separate from the simulation's
+
+    start = time.perf_counter()
+    while not sim.game_over and sim.ticks < max_ticks:
+        sim.step(policy(sim, sim.ticks, rng))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "seed": seed,
+        "policy": policy_name,
+        "score": sim.score,
+        "survival_ticks": sim.ticks,
+        "waves_cleared": sim.waves_cleared,
+        "game_over": sim.game_over,
+        "ticks_per_second": sim.ticks / elapsed if elapsed > 0 else math.inf,
+    }
+
+def run_batch(seeds, policy_name="random", max_ticks=36000, workers=None, on_result=None):
+    """Play one game per seed over a process pool; returns (results, wall seconds)"""
+    jobs = [(seed, policy_name, max_ticks) for seed in seeds]
+    results = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        # Small chunks keep results streaming while still amortizing IPC
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 16))
+        for result in pool.imap_unordered(play_game, jobs, chunksize):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results, time.perf_counter() - start
+
+def summarize(results, wall_seconds):
+    scores = [result["score"] for result in results]
+    survival = [result["survival_ticks"] for result in results]
+    total_ticks = sum(survival)
+    return {
+        "games": len(results),
+        "score_mean": statistics.fmean(scores),
+        "score_median": statistics.median(scores),
+        "score_max": max(scores),
+        "survival_ticks_mean": statistics.fmean(survival),
+        "waves_cleared_mean": statistics.fmean(result["waves_cleared"] for result in results),
+        "games_over": sum(result["game_over"] for result in results),
+        "total_ticks": total_ticks,
+        "wall_seconds": wall_seconds,
+        "aggregate_ticks_per_second": total_ticks / wall_seconds if wall_seconds > 0 else math.inf,
+        "per_game_ticks_per_second_mean": statistics.fmean(result["ticks_per_second"] for result in results),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--max-ticks", type=int, default=36000, help="Stop a game after this many ticks (default: 10 minutes at 60 FPS)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    parser.add_argument("--output", help="Write per-game JSON lines here instead of stdout")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        def emit(result):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+
+        seeds = range(args.first_seed, args.first_seed + args.games)
+        results, wall_seconds = run_batch(seeds, args.policy, args.max_ticks, args.workers, emit)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(json.dumps(summarize(results, wall_seconds), indent=2), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Frame-time benchmarks for scripted game scenarios
+
+Runs Game.update and Game.draw on an offscreen SDL display, reports frames/s,
+simulated ticks/s and p50/p95/p99 frame times and writes the results as JSON so
+two commits can be compared on the same machine. The ship is invulnerable in
+the playing scenarios, so they time the simulation rather than the game over
+screen:
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json
+    python benchmark.py --compare before.json after.json
+"""
+import os
+
+# Offscreen display and silent audio; must be set before pygame initializes
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+
+from asteroids_game import Game
+from entity_store import ArraySimulation
+from simulation import Simulation, scripted_input
+from sound_bank import BULLET_TONE
+from world import WorldSimulation
+
+class ScriptedGame(Game):
+    """Game driven by a scripted input function instead of the mouse"""
+    def __init__(self, input_fn, fire_every, **kwargs):
+        # Never touch the real high score file
+        super().__init__(leaderboard_path=":memory:", **kwargs)
+        self.input_fn = input_fn
+        self.fire_every = fire_every
+        self.tick = 0
+        self.show_instructions = False
+
+    def read_input(self):
+        inputs = self.input_fn(self.tick)
+        inputs.shoot = self.fire_every > 0 and self.tick % self.fire_every == 0
+        if self.camera is not None:
+            inputs.aim = self.camera.to_world(self.sim, inputs.aim)
+        if inputs.shoot:
+            self.audio.play("bullets", BULLET_TONE)
+        self.tick += 1
+        return inputs
+
+def make_game(simulation_factory, fire_every=10, game_over=False, **options):
+    game = ScriptedGame(scripted_input, fire_every, simulation_factory=simulation_factory, **options)
+    game.sim.invulnerable = not game_over
+    if game_over:
+        # Hold the game over screen for the whole run
+        game.game_over_duration = sys.maxsize
+        game.trigger_game_over()
+    return game
+
+# name -> (frames, game factory); factories take Game options such as dirty_rects
+SCENARIOS = {
+    "default_wave": (1200, lambda **options: make_game(Simulation, **options)),
+    "stress_1k": (300, lambda **options: make_game(lambda: ArraySimulation(1000, seed=1), **options)),
+    "stress_10k": (120, lambda **options: make_game(lambda: ArraySimulation(10000, seed=1), **options)),
+    "bullet_spam": (600, lambda **options: make_game(lambda: ArraySimulation(200, seed=1), fire_every=1, **options)),
+    "game_over": (600, lambda **options: make_game(Simulation, game_over=True, **options)),
+    "world_1k": (600, lambda **options: make_game(lambda: WorldSimulation(20, seed=1), **options)),
+}
+
+def run_scenario(name, frames=None, dirty_rects=False, sprite_atlas=False):
+    """Time update+draw for each frame of a scenario"""
+    default_frames, factory = SCENARIOS[name]
+    frames = frames or default_frames
+    random.seed(1)
+    game = factory(dirty_rects=dirty_rects, sprite_atlas=sprite_atlas)
+
+    frame_times = np.empty(frames)
+    start = time.perf_counter()
+    for frame in range(frames):
+        frame_start = time.perf_counter()
+        game.update()
+        game.draw()
+        frame_times[frame] = time.perf_counter() - frame_start
+    elapsed = time.perf_counter() - start
+    sim_ticks = game.tick  # One input is read per simulation tick
+
+    p50, p95, p99 = np.percentile(frame_times, [50, 95, 99]) * 1000
+    return {
+        "frames": frames,
+        "ticks_per_second": frames / elapsed,
+        "sim_ticks": sim_ticks,
+        "sim_ticks_per_second": sim_ticks / elapsed,
+        "mean_ms": float(frame_times.mean() * 1000),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(frame_times.max() * 1000),
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(before_path, after_path):
+    """Print per-scenario changes between two result files"""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{'scenario':<14} {'ticks/s':>21} {'p50 ms':>17} {'p99 ms':>17}")
+    for name, new in after["scenarios"].items():
+        old = before["scenarios"].get(name)
+        if old is None:
+            continue
+        print(f"{name:<14} {old['ticks_per_second']:>8.0f} -> {new['ticks_per_second']:<8.0f}"
+              f"  {old['p50_ms']:>6.2f} -> {new['p50_ms']:<6.2f}"
+              f"  {old['p99_ms']:>6.2f} -> {new['p99_ms']:<6.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--frames", type=int, help="Override the frame count of every scenario")
+    parser.add_argument("--dirty-rects", action="store_true", help="Render with the dirty-rectangle renderer")
+    parser.add_argument("--sprite-atlas", action="store_true", help="Draw asteroids from the rotation sprite atlas")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "dirty_rects": args.dirty_rects,
+        "sprite_atlas": args.sprite_atlas,
+        "scenarios": {},
+    }
+    for name in names:
+        result = run_scenario(name, args.frames, args.dirty_rects, args.sprite_atlas)
+        results["scenarios"][name] = result
+        print(f"{name:<14} {result['ticks_per_second']:>9.1f} frames/s  {result['sim_ticks_per_second']:>9.1f} sim ticks/s  "
+              f"p50 {result['p50_ms']:6.2f} ms  p95 {result['p95_ms']:6.2f} ms  p99 {result['p99_ms']:6.2f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import numpy as np
+
+# Below this many candidate pairs a dense all-pairs test beats building the grid
+BROADPHASE_MIN_PAIRS = 4096
+
+class SpatialHash:
+    """Uniform grid over a wrapping (toroidal) playfield
+
+    build() indexes a set of circles once per tick; query() then returns every
+    (query, indexed) pair whose circles overlap, measuring distance the short
+    way around the screen edges.
+    """
+    def __init__(self, width, height, cell_size):
+        self.width = width
+        self.height = height
+        # Cells are at least cell_size wide, so overlapping circles are always in neighbouring cells
+        self.cols = max(1, int(width // cell_size))
+        self.rows = max(1, int(height // cell_size))
+        self.cell_width = width / self.cols
+        self.cell_height = height / self.rows
+        self.cell_size = cell_size
+        # Neighbour offsets, deduplicated when the grid is too small to have three distinct columns/rows
+        self.col_offsets = range(-1, 2) if self.cols >= 3 else range(self.cols)
+        self.row_offsets = range(-1, 2) if self.rows >= 3 else range(self.rows)
+        self.order = np.zeros(0, dtype=np.intp)
+        self.cell_start = np.zeros(self.cols * self.rows + 1, dtype=np.intp)
+        self.pos = np.zeros((0, 2))
+        self.radius = np.zeros(0)
+
+    def cells(self, pos):
+        """Grid (col, row) of each position"""
+        col = (pos[:, 0] // self.cell_width).astype(np.intp) % self.cols
+        row = (pos[:, 1] // self.cell_height).astype(np.intp) % self.rows
+        return col, row
+
+    def build(self, pos, radius):
+        """Index circles by cell with a counting sort"""
+        self.pos = pos
+        self.radius = radius
+        col, row = self.cells(pos)
+        keys = row * self.cols + col
+        self.order = np.argsort(keys, kind="stable")
+        counts = np.bincount(keys, minlength=self.cols * self.rows)
+        self.cell_start[0] = 0
+        np.cumsum(counts, out=self.cell_start[1:])
+
+    def candidates(self, pos):
+        """Broadphase: (query index, indexed index) for everything in the 3x3 neighbourhood"""
+        col, row = self.cells(pos)
+        query_parts = []
+        index_parts = []
+        for dr in self.row_offsets:
+            neighbour_row = (row + dr) % self.rows
+            for dc in self.col_offsets:
+                keys = neighbour_row * self.cols + (col + dc) % self.cols
+                start = self.cell_start[keys]
+                counts = self.cell_start[keys + 1] - start
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # Expand each query into one row per occupant of its neighbour cell
+                query = np.repeat(np.arange(len(pos)), counts)
+                within = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                query_parts.append(query)
+                index_parts.append(self.order[np.repeat(start, counts) + within])
+        if not query_parts:
+            empty = np.zeros(0, dtype=np.intp)
+            return empty, empty
+        return np.concatenate(query_parts), np.concatenate(index_parts)
+
+    def query(self, pos, radius):
+        """All overlapping (query index, indexed index) pairs, sorted by query then indexed index"""
+        query, index = self.candidates(pos)
+        if not len(query):
+            return query, index
+        hit = overlaps(pos[query], radius[query], self.pos[index], self.radius[index], self.width, self.height)
+        query = query[hit]
+        index = index[hit]
+        order = np.lexsort((index, query))
+        return query[order], index[order]
+
+def wrapped_delta(a, b, width, height):
+    """Shortest offset from b to a on the wrapping playfield"""
+    delta = a - b
+    delta[..., 0] -= np.round(delta[..., 0] / width) * width
+    delta[..., 1] -= np.round(delta[..., 1] / height) * height
+    return delta
+
+def overlaps(pos_a, radius_a, pos_b, radius_b, width, height):
+    """Batched narrowphase: element-wise circle overlap, compared squared so no sqrt is needed"""
+    delta = wrapped_delta(pos_a, pos_b, width, height)
+    reach = radius_a + radius_b
+    return np.einsum("...i,...i->...", delta, delta) < reach * reach
+
+def find_overlaps(grid, query_pos, query_radius, index_pos, index_radius):
+    """All overlapping (query, indexed) pairs, sorted; uses the grid once the pair count is large"""
+    if len(query_pos) * len(index_pos) < BROADPHASE_MIN_PAIRS:
+        hit = overlaps(query_pos[:, None], query_radius[:, None], index_pos[None], index_radius[None], grid.width, grid.height)
+        return np.nonzero(hit)
+    grid.build(index_pos, index_radius)
+    return grid.query(query_pos, query_radius)
+
+def first_hits(query, index):
+    """Pair each query with the first still-unclaimed indexed circle it overlaps, in query order
+
+    Matches the original nested loop: a bullet destroys at most one asteroid and
+    an asteroid is destroyed by at most one bullet.
+    """
+    claimed_query = set()
+    claimed_index = set()
+    hits = []
+    for q, i in zip(query.tolist(), index.tolist()):
+        if q not in claimed_query and i not in claimed_index:
+            claimed_query.add(q)
+            claimed_index.add(i)
+            hits.append((q, i))
+    return hits
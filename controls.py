@@ -0,0 +1,176 @@
+"""Event-driven input: one immutable snapshot per frame from the event queue
+
+InputReader drains pygame's event queue once per frame and folds it into an
+InputSnapshot: which bound actions are held, which were pressed since the
+last frame, where the pointer is and where the gamepad stick points. Game
+code reads only the snapshot, so the mouse and keyboard are never polled and
+a click that goes down and up between two frames still counts as a press.
+
+Actions are bound to any mix of keys, mouse buttons and gamepad buttons; the
+gamepad's left stick aims. LatencyMeter times a press from the frame that
+read it to the present of the first frame drawn after it took effect:
+
+    python controls.py [frames]
+"""
+import os
+import sys
+import time
+from collections import deque, namedtuple
+import pygame
+
+# Binding sources
+KEY = "key"
+MOUSE = "mouse"            # Mouse button number: 1 left, 2 middle, 3 right
+PAD_BUTTON = "pad_button"  # Gamepad button number, as SDL numbers it for the device
+
+DEFAULT_BINDINGS = {
+    "thrust": [(MOUSE, 1), (PAD_BUTTON, 0)],
+    "shoot": [(MOUSE, 3), (KEY, pygame.K_SPACE), (PAD_BUTTON, 1)],
+    "pause": [(KEY, pygame.K_RETURN), (PAD_BUTTON, 7)],
+    "high_scores": [(KEY, pygame.K_h)],
+    "restart": [(KEY, pygame.K_r), (PAD_BUTTON, 6)],
+    "rewind": [(KEY, pygame.K_BACKSPACE), (PAD_BUTTON, 4)],
+    "profiler": [(KEY, pygame.K_F3)],
+    "trace": [(KEY, pygame.K_F4)],
+}
+STICK_AXES = (0, 1)   # Left stick x and y
+STICK_DEADZONE = 0.25
+
+# time: perf_counter when the frame's events were read; pointer: mouse position
+# on screen; stick: unit-scaled stick direction, or None when the mouse aims;
+# held and pressed: frozensets of action names
+InputSnapshot = namedtuple("InputSnapshot", "time quit pointer stick held pressed")
+
+class InputReader:
+    """Folds the event queue into one InputSnapshot per frame"""
+    def __init__(self, bindings=DEFAULT_BINDINGS, gamepads=True):
+        self.actions = {}  # (source, code) -> action names bound to it
+        for action, sources in bindings.items():
+            for source in sources:
+                self.actions.setdefault(source, []).append(action)
+        self.down = set()  # Bound (source, code) pairs currently held
+        self.pointer = pygame.mouse.get_pos()
+        self.axes = [0.0, 0.0]
+        self.stick_aims = False  # Whichever of mouse and stick moved last aims
+        self.pads = {}  # Instance id -> Joystick, kept open while connected
+        if gamepads:
+            # Connected pads arrive as JOYDEVICEADDED events
+            pygame.joystick.init()
+        self.snapshot = InputSnapshot(time.perf_counter(), False, self.pointer, None, frozenset(), frozenset())
+
+    def held_actions(self):
+        return frozenset(action for source in self.down for action in self.actions[source])
+
+    def poll(self):
+        """Drain the event queue and return this frame's snapshot"""
+        now = time.perf_counter()
+        quit_requested = False
+        pressed = set()
+        for event in pygame.event.get():
+            kind = event.type
+            if kind == pygame.MOUSEMOTION:
+                self.pointer = event.pos
+                self.stick_aims = False
+                continue
+            if kind == pygame.KEYDOWN:
+                source, down = (KEY, event.key), True
+            elif kind == pygame.KEYUP:
+                source, down = (KEY, event.key), False
+            elif kind == pygame.MOUSEBUTTONDOWN:
+                source, down = (MOUSE, event.button), True
+            elif kind == pygame.MOUSEBUTTONUP:
+                source, down = (MOUSE, event.button), False
+            elif kind == pygame.JOYBUTTONDOWN:
+                source, down = (PAD_BUTTON, event.button), True
+            elif kind == pygame.JOYBUTTONUP:
+                source, down = (PAD_BUTTON, event.button), False
+            else:
+                if kind == pygame.QUIT:
+                    quit_requested = True
+                elif kind == pygame.JOYAXISMOTION and event.axis in STICK_AXES:
+                    self.axes[STICK_AXES.index(event.axis)] = event.value
+                    if abs(event.value) > STICK_DEADZONE:
+                        self.stick_aims = True
+                elif kind == pygame.JOYDEVICEADDED:
+                    pad = pygame.joystick.Joystick(event.device_index)
+                    self.pads[pad.get_instance_id()] = pad
+                elif kind == pygame.JOYDEVICEREMOVED:
+                    self.pads.pop(event.instance_id, None)
+                    self.axes = [0.0, 0.0]
+                elif kind == pygame.WINDOWFOCUSLOST:
+                    # Releases go to another window; don't leave thrust stuck on
+                    self.down.clear()
+                continue
+            if source not in self.actions:
+                continue
+            if down:
+                if source not in self.down:
+                    self.down.add(source)
+                    pressed.update(self.actions[source])
+            else:
+                self.down.discard(source)
+
+        stick = None
+        if self.stick_aims and self.pads and max(abs(self.axes[0]), abs(self.axes[1])) > STICK_DEADZONE:
+            stick = tuple(self.axes)
+        self.snapshot = InputSnapshot(now, quit_requested, self.pointer, stick, self.held_actions(), frozenset(pressed))
+        return self.snapshot
+
+class LatencyMeter:
+    """Input-to-present latency: from reading a press to presenting the first frame that shows its effect"""
+    def __init__(self, capacity=600):
+        self.samples = deque(maxlen=capacity)  # Seconds
+        self.read_at = None     # Press read, not yet applied by a simulation tick
+        self.applied_at = None  # Applied, waiting for the next present
+
+    def pressed(self, read_at):
+        if self.read_at is None and self.applied_at is None:
+            self.read_at = read_at
+
+    def applied(self):
+        if self.read_at is not None:
+            self.applied_at, self.read_at = self.read_at, None
+
+    def presented(self, now):
+        if self.applied_at is not None:
+            self.samples.append(now - self.applied_at)
+            self.applied_at = None
+
+    def summary(self):
+        """Latency percentiles in milliseconds, or None before any sample"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        percentile = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+        return {"samples": len(ordered), "p50_ms": round(percentile(0.5), 2),
+                "p95_ms": round(percentile(0.95), 2), "max_ms": round(ordered[-1] * 1000, 2)}
+
+if __name__ == "__main__":
+    # Click-to-bullet latency in the real game loop, driven by synthetic right clicks
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    from asteroids_game import Game, RENDER_FPS, TICK_SECONDS
+
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    game = Game(leaderboard_path=":memory:", render_fps=RENDER_FPS)
+    game.show_instructions = False
+    poll_time = 0.0
+    accumulator = 0.0
+    previous = time.perf_counter()
+    for frame in range(frames):
+        if frame % 20 == 0:
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=3, pos=(400, 100)))
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, button=3, pos=(400, 100)))
+        now = time.perf_counter()
+        accumulator += now - previous
+        previous = now
+        game.handle_events()
+        poll_time += time.perf_counter() - now
+        accumulator = game.advance(accumulator)
+        game.draw(1 - accumulator / TICK_SECONDS)
+        game.clock.tick(game.render_fps)
+        if game.game_over:
+            # Keep playing; presses during the game over screen would not fire
+            game.restart_from_game_over()
+    print(f"Event handling {poll_time * 1e6 / frames:.1f} us per frame")
+    print(f"Click to present at {RENDER_FPS} fps render cap: {game.latency.summary()}")
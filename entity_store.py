@@ -0,0 +1,270 @@
+import pygame
+import numpy as np
+import struct
+import sys
+import zlib
+
+from render import draw_polygons, transform_polygons
+from collision import find_overlaps, first_hits, overlaps, wrapped_delta
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, WHITE,
+    Simulation, run_headless, scripted_input,
+)
+
+ASTEROID_POINTS = 8
+BULLET_SPEED = 10
+BULLET_LIFETIME = 60  # frames
+BULLET_RADIUS = 2
+
+class AsteroidStore:
+    """Asteroids kept as contiguous NumPy arrays, one row per asteroid"""
+    def __init__(self, capacity=64, playfield=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.count = 0
+        self.playfield = np.array(playfield, dtype=np.float64)  # Size the asteroids wrap around
+        self.pos = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.rotation = np.zeros(capacity)
+        self.rotation_speed = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.size = np.zeros(capacity, dtype=np.int8)
+        self.points = np.zeros((capacity, ASTEROID_POINTS, 2))  # Shape relative to the centre
+        self.serial = np.zeros(capacity, dtype=np.int64)  # Stable per-asteroid id, for caches keyed by asteroid
+        self.next_serial = 0
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, capacity):
+        """Grow the arrays so at least `capacity` rows fit"""
+        old = len(self.rotation)
+        if capacity <= old:
+            return
+        capacity = max(capacity, old * 2)
+        for name in ("pos", "velocity", "rotation", "rotation_speed", "radius", "size", "points", "serial"):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+
+    def spawn(self, xs, ys, sizes, rng):
+        """Append asteroids at the given positions with random heading, spin and shape"""
+        sizes = np.broadcast_to(np.asarray(sizes, dtype=np.int8), np.shape(xs))
+        n = len(sizes)
+        start = self.count
+        end = start + n
+        self.reserve(end)
+
+        # Same distributions as Asteroid.__init__
+        angle = np.radians(rng.uniform(0, 360, n))
+        speed = rng.uniform(1, 3, n)
+        self.pos[start:end, 0] = xs
+        self.pos[start:end, 1] = ys
+        self.velocity[start:end, 0] = np.cos(angle) * speed
+        self.velocity[start:end, 1] = np.sin(angle) * speed
+        self.size[start:end] = sizes
+        self.radius[start:end] = sizes * 10
+        self.rotation[start:end] = 0
+        self.rotation_speed[start:end] = rng.uniform(-3, 3, n)
+        self.serial[start:end] = np.arange(self.next_serial, self.next_serial + n)
+        self.next_serial += n
+
+        # Generate random shapes
+        vertex_angles = np.radians(np.arange(ASTEROID_POINTS) * (360 / ASTEROID_POINTS))
+        radii = self.radius[start:end, None] * rng.uniform(0.8, 1.2, (n, ASTEROID_POINTS))
+        self.points[start:end, :, 0] = np.cos(vertex_angles) * radii
+        self.points[start:end, :, 1] = np.sin(vertex_angles) * radii
+        self.count = end
+
+    def update(self):
+        """Move, spin and wrap every asteroid"""
+        n = self.count
+        pos = self.pos[:n]
+        pos += self.velocity[:n]
+        np.mod(pos, self.playfield, out=pos)
+        self.rotation[:n] += self.rotation_speed[:n]
+
+    def keep(self, mask):
+        """Compact the arrays down to the rows where mask is True"""
+        n = self.count
+        kept = int(np.count_nonzero(mask))
+        for name in ("pos", "velocity", "rotation", "rotation_speed", "radius", "size", "points", "serial"):
+            array = getattr(self, name)
+            array[:kept] = array[:n][mask]
+        self.count = kept
+
+    def draw(self, screen, lag=0.0, atlas=None):
+        n = self.count
+        pos, rotation = self.pos[:n], self.rotation[:n]
+        if lag:
+            # Interpolated frame: step back along the last update
+            pos = pos - self.velocity[:n] * lag
+            rotation = rotation - self.rotation_speed[:n] * lag
+        if atlas is not None:
+            return atlas.draw(screen, self.serial[:n].tolist(), self.points[:n], rotation, pos)
+        return draw_polygons(screen, WHITE, transform_polygons(self.points[:n], rotation, pos))
+
+class BulletStore:
+    """Bullets kept as contiguous NumPy arrays, one row per bullet"""
+    def __init__(self, capacity=64, playfield=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.count = 0
+        self.playfield = np.array(playfield, dtype=np.float64)  # Size the bullets wrap around
+        self.pos = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.lifetime = np.zeros(capacity, dtype=np.int32)
+
+    def __len__(self):
+        return self.count
+
+    def reserve(self, capacity):
+        """Grow the arrays so at least `capacity` rows fit"""
+        old = len(self.lifetime)
+        if capacity <= old:
+            return
+        capacity = max(capacity, old * 2)
+        for name in ("pos", "velocity", "lifetime"):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            setattr(self, name, grown)
+
+    def spawn(self, xs, ys, angles):
+        """Append bullets fired from the given positions at the given angles (degrees)"""
+        angles = np.radians(np.atleast_1d(angles))
+        n = len(angles)
+        start = self.count
+        end = start + n
+        self.reserve(end)
+        self.pos[start:end, 0] = xs
+        self.pos[start:end, 1] = ys
+        self.velocity[start:end, 0] = np.cos(angles) * BULLET_SPEED
+        self.velocity[start:end, 1] = np.sin(angles) * BULLET_SPEED
+        self.lifetime[start:end] = BULLET_LIFETIME
+        self.count = end
+
+    def update(self):
+        """Move and wrap every bullet, then drop the expired ones"""
+        n = self.count
+        pos = self.pos[:n]
+        pos += self.velocity[:n]
+        np.mod(pos, self.playfield, out=pos)
+        lifetime = self.lifetime[:n]
+        lifetime -= 1
+        alive = lifetime > 0
+        if not alive.all():
+            self.keep(alive)
+
+    def keep(self, mask):
+        """Compact the arrays down to the rows where mask is True"""
+        n = self.count
+        kept = int(np.count_nonzero(mask))
+        for name in ("pos", "velocity", "lifetime"):
+            array = getattr(self, name)
+            array[:kept] = array[:n][mask]
+        self.count = kept
+
+    def draw(self, screen, lag=0.0):
+        pos = self.pos[:self.count]
+        if lag:
+            pos = pos - self.velocity[:self.count] * lag
+        return [
+            pygame.draw.circle(screen, WHITE, (x, y), BULLET_RADIUS)
+            for x, y in pos.astype(np.int32).tolist()
+        ]
+
+class ArraySimulation(Simulation):
+    """Simulation with asteroids and bullets in AsteroidStore/BulletStore, for stress waves"""
+    rewindable = False  # Stores and the numpy generator aren't snapshotted
+    def make_entity_containers(self):
+        # Called from Simulation.__init__ once self.seed is known
+        self.np_rng = np.random.default_rng(self.seed)
+        playfield = (self.width, self.height)
+        return BulletStore(playfield=playfield), AsteroidStore(playfield=playfield)
+
+    def spawn_wave(self, count):
+        """Spawn asteroids away from the ship"""
+        ship = np.array([self.ship.pos.x, self.ship.pos.y])
+        positions = np.empty((0, 2))
+        while len(positions) < count:
+            # Rejection-sample in bulk until enough land away from the ship
+            candidates = np.column_stack((
+                self.np_rng.integers(0, self.width + 1, count),
+                self.np_rng.integers(0, self.height + 1, count),
+            )).astype(np.float64)
+            # Measured the short way across the wrapping edges, like the collision tests
+            offset = wrapped_delta(candidates, ship, self.width, self.height)
+            far = np.hypot(offset[:, 0], offset[:, 1]) > 100
+            positions = np.concatenate((positions, candidates[far]))
+        positions = positions[:count]
+        self.asteroids.spawn(positions[:, 0], positions[:, 1], 3, self.np_rng)
+
+    def shoot_bullet(self):
+        self.bullets.spawn(self.ship.pos.x, self.ship.pos.y, self.ship.angle)
+
+    def move_entities(self):
+        self.bullets.update()
+        self.asteroids.update()
+
+    def collide_bullets(self):
+        bullets = self.bullets
+        asteroids = self.asteroids
+        if not bullets.count or not asteroids.count:
+            return
+
+        # Broadphase over the spatial hash, narrowphase for all candidate pairs at once
+        hits = first_hits(*find_overlaps(
+            self.grid,
+            bullets.pos[:bullets.count], np.full(bullets.count, BULLET_RADIUS, dtype=np.float64),
+            asteroids.pos[:asteroids.count], asteroids.radius[:asteroids.count],
+        ))
+        if not hits:
+            return
+
+        # Each bullet takes out the first surviving asteroid it touches, in bullet order
+        bullet_alive = np.ones(bullets.count, dtype=bool)
+        asteroid_alive = np.ones(asteroids.count, dtype=bool)
+        hit_bullets, destroyed = np.array(hits).T
+        bullet_alive[hit_bullets] = False
+        asteroid_alive[destroyed] = False
+
+        sizes = asteroids.size[destroyed].astype(np.int64)
+        self.score += int(((4 - sizes) * 20).sum())
+        for (x, y), size in zip(asteroids.pos[destroyed].tolist(), sizes.tolist()):
+            self.effects.asteroid_destroyed(x, y, size)
+
+        # Split asteroid: two children per destroyed asteroid above size 1
+        parents = destroyed[sizes > 1]
+        children_pos = np.repeat(asteroids.pos[parents], 2, axis=0)
+        children_size = np.repeat(asteroids.size[parents] - 1, 2)
+
+        bullets.keep(bullet_alive)
+        asteroids.keep(asteroid_alive)
+        if len(parents):
+            asteroids.spawn(children_pos[:, 0], children_pos[:, 1], children_size, self.np_rng)
+
+    def state_digest(self):
+        """CRC32 over ship, bullets, asteroids, score and lives, for checking replays"""
+        ship = np.array([self.ship.pos.x, self.ship.pos.y, self.ship.velocity.x, self.ship.velocity.y, self.ship.angle])
+        bullets = self.bullets
+        asteroids = self.asteroids
+        digest = zlib.crc32(ship.tobytes())
+        for array in (bullets.pos[:bullets.count], bullets.lifetime[:bullets.count],
+                      asteroids.pos[:asteroids.count], asteroids.rotation[:asteroids.count], asteroids.size[:asteroids.count]):
+            digest = zlib.crc32(np.ascontiguousarray(array).tobytes(), digest)
+        return zlib.crc32(struct.pack("<qq", self.score, self.lives), digest)
+
+    def collide_ship(self):
+        asteroids = self.asteroids
+        n = asteroids.count
+        if not n:
+            return
+        ship = np.array([self.ship.pos.x, self.ship.pos.y])
+        if overlaps(asteroids.pos[:n], asteroids.radius[:n], ship, self.ship.radius, self.width, self.height).any():
+            self.ship_hit()
+
+# Measure stress-wave throughput without a display
+if __name__ == "__main__":
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    asteroids = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    sim, rate = run_headless(ticks, scripted_input, lambda: ArraySimulation(asteroids))
+    print(f"{ticks} ticks with {asteroids} asteroids at {rate:,.0f} ticks/s "
+          f"({len(sim.asteroids)} asteroids, {len(sim.bullets)} bullets left)")
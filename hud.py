@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+import pygame
+
+from simulation import SCREEN_WIDTH, WHITE
+
+class Fonts:
+    """The game's fonts, each loaded the first time it is used"""
+    def __init__(self, name=None):
+        self.name = name
+        self.loaded = {}
+        self.load_seconds = 0.0
+
+    def get(self, size):
+        font = self.loaded.get(size)
+        if font is None:
+            start = time.perf_counter()
+            if not pygame.font.get_init():
+                pygame.font.init()
+            font = self.loaded[size] = pygame.font.Font(self.name, size)
+            self.load_seconds += time.perf_counter() - start
+        return font
+
+    @property
+    def font(self):
+        return self.get(36)
+
+    @property
+    def small_font(self):
+        return self.get(24)
+
+    @property
+    def large_font(self):
+        return self.get(72)
+
+class TextCache:
+    """Rendered text surfaces keyed by (font, text, colour), evicting the least recently used"""
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, colour=WHITE):
+        key = (font, text, colour)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, colour)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def __len__(self):
+        return len(self.surfaces)
+
+class Hud:
+    """In-game score/lives lines and the high score table, rebuilt only when their values change"""
+    def __init__(self, text_cache, fonts):
+        self.text = text_cache
+        self.fonts = fonts
+        self.status_values = None
+        self.status_lines = []
+        self.table_values = None
+        self.table_lines = []
+
+    def draw_status(self, screen, score, lives, high_score):
+        values = (score, lives, high_score)
+        if values != self.status_values:
+            self.status_values = values
+            self.status_lines = [
+                (self.text.render(self.fonts.font, f"Score: {score}"), (10, 10)),
+                (self.text.render(self.fonts.font, f"Lives: {lives}"), (10, 50)),
+            ]
+            # Draw high score indicator
+            if high_score > 0:
+                self.status_lines.append((self.text.render(self.fonts.small_font, f"High Score: {high_score}"), (10, 90)))
+        return screen.blits(self.status_lines)
+
+    def draw_high_scores(self, screen, entries):
+        """Draw the high score table from (name, score) pairs, best first"""
+        values = tuple(entries)
+        if values != self.table_values:
+            self.table_values = values
+            title_text = self.text.render(self.fonts.font, "HIGH SCORES")
+            title_x = SCREEN_WIDTH // 2 - title_text.get_width() // 2
+            title_y = 100
+            self.table_lines = [(title_text, (title_x, title_y))]
+
+            for i, (name, score) in enumerate(entries):
+                if score > 0:  # Only show non-zero scores
+                    rank_text = self.text.render(self.fonts.small_font, f"{i+1:2d}. {name}  {score:,}")
+                    rank_x = SCREEN_WIDTH // 2 - rank_text.get_width() // 2
+                    rank_y = title_y + 50 + i * 25
+                    self.table_lines.append((rank_text, (rank_x, rank_y)))
+
+            # Instructions to close high scores
+            close_text = self.text.render(self.fonts.small_font, "Press H to close")
+            close_x = SCREEN_WIDTH // 2 - close_text.get_width() // 2
+            close_y = title_y + 50 + 10 * 25 + 20
+            self.table_lines.append((close_text, (close_x, close_y)))
+        return screen.blits(self.table_lines)
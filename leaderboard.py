@@ -0,0 +1,106 @@
+"""High scores kept in an SQLite file shared by every game writing to it
+
+Each score is one row inserted in its own transaction, so a crash mid-write
+never loses the table and several games can add scores to the same file at
+once (writers wait on SQLite's lock for up to LOCK_TIMEOUT seconds). Top-N
+reads use an index on score. The best entries are also held in memory, so
+drawing the table never touches the disk.
+
+The default rollback journal is used rather than WAL because WAL needs shared
+memory, which network-mounted score volumes don't provide.
+"""
+import json
+import os
+import sqlite3
+import time
+
+LOCK_TIMEOUT = 5.0  # Seconds a writer waits for another game's write to finish
+MAX_NAME_LENGTH = 12
+LEGACY_NAME = "---"  # Name given to scores imported from high_scores.json, which had none
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id);
+"""
+
+class Leaderboard:
+    """Top scores as (name, score) pairs, best first"""
+    def __init__(self, path, size=10, legacy_json=None):
+        self.path = path
+        self.size = size
+        self.entries = []
+        self.db = None
+        try:
+            self.db = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+            self.db.executescript(SCHEMA)
+            if legacy_json is not None:
+                self.import_json(legacy_json)
+            self.refresh()
+        except sqlite3.Error as e:
+            # A corrupt or unreachable file is left untouched for inspection; scores are kept in memory only
+            print(f"Warning: high score database {path} unavailable ({e}); scores will not be saved")
+            self.close()
+
+    def import_json(self, json_path):
+        """One-off import of an old high_scores.json list into an empty table"""
+        if not os.path.exists(json_path):
+            return
+        if self.db.execute("SELECT 1 FROM scores LIMIT 1").fetchone():
+            return
+        try:
+            with open(json_path) as f:
+                scores = [int(score) for score in json.load(f)]
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Warning: could not import {json_path} ({e})")
+            return
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO scores (name, score, created) VALUES (?, ?, ?)",
+                [(LEGACY_NAME, score, now) for score in scores if score > 0],
+            )
+
+    def top(self, n):
+        return self.db.execute("SELECT name, score FROM scores ORDER BY score DESC, id LIMIT ?", (n,)).fetchall()
+
+    def refresh(self):
+        """Reload the cached entries, picking up scores other games have added"""
+        if self.db is not None:
+            self.entries = self.top(self.size)
+
+    @property
+    def best(self):
+        return self.entries[0][1] if self.entries else 0
+
+    def qualifies(self, score):
+        """Whether a score would make the table"""
+        lowest = self.entries[-1][1] if len(self.entries) >= self.size else 0
+        return score > lowest
+
+    def add(self, name, score):
+        name = (name.strip() or "PLAYER")[:MAX_NAME_LENGTH]
+        if self.db is not None:
+            try:
+                with self.db:
+                    self.db.execute(
+                        "INSERT INTO scores (name, score, created) VALUES (?, ?, ?)",
+                        (name, score, time.time()),
+                    )
+                self.refresh()
+                return
+            except sqlite3.Error as e:
+                print(f"Warning: could not save high score ({e})")
+        # Not saved; still show it for the rest of the session
+        self.entries.append((name, score))
+        self.entries.sort(key=lambda entry: -entry[1])
+        del self.entries[self.size:]
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,730 @@
+"""Authoritative multiplayer for two to eight ships over UDP
+
+The server owns the game: it steps an Arena at the simulation's fixed tick
+using the inputs clients send, and every SNAPSHOT_INTERVAL ticks sends each
+client the world as a quantized snapshot, delta-encoded against the latest
+snapshot that client has acknowledged. A client predicts its own ship by
+replaying its not-yet-processed inputs on top of every snapshot, and draws
+everything else interpolated between snapshots a little in the past.
+
+    python netplay.py server [--port 7777]
+    python netplay.py client [--host 127.0.0.1] [--port 7777] [--name NAME]
+    python netplay.py selftest [--clients 8] [--seconds 3]
+
+Snapshots are built once per snapshot tick and the encoding for each
+baseline is cached, so clients acknowledging the same snapshot share one
+encode and the per-client cost is a header and a send. selftest runs a server
+here and bot clients in a child process, joining one at a time, and reports
+the server's tick cost and the bandwidth per client at each player count.
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import socket
+import struct
+import time
+from collections import deque
+
+from arena import Arena, MAX_PLAYERS
+from replay import RECORD, THRUST, SHOOT, quantize
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, InputState, Ship, scripted_input
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7777
+TICK_SECONDS = 1 / FPS
+MAX_CATCH_UP_TICKS = 5
+SNAPSHOT_INTERVAL = 3      # Ticks between snapshots: 20 a second
+HISTORY = 32               # Snapshots kept on both ends as possible delta baselines
+INPUT_REDUNDANCY = 4       # Latest inputs repeated in every input packet, so a lost packet costs nothing
+MAX_INPUT_BACKLOG = 8      # Queued inputs beyond this are skipped, bounding a fast client's input latency
+INTERPOLATION_TICKS = 2 * SNAPSHOT_INTERVAL  # How far behind the latest snapshot other entities are drawn
+CLIENT_TIMEOUT = 3.0       # Seconds of silence before the server drops a client
+MAX_PACKET = 65507
+MAX_NAME_BYTES = 32        # Longest player name a join packet may carry, in UTF-8
+
+# Quantization: positions and velocities share a unit so extrapolating a record is exact integer arithmetic
+POSITION_SCALE = 64        # 1/64 pixel (per tick for velocities)
+TURN = 65536               # Angles in 1/65536 of a turn
+RADIUS_SCALE = 4           # Asteroid outline radii in 1/4 pixel
+WORLD_X = SCREEN_WIDTH * POSITION_SCALE
+WORLD_Y = SCREEN_HEIGHT * POSITION_SCALE
+POSITION_TOLERANCE = POSITION_SCALE // 2  # A position within half a pixel of its extrapolation is published as extrapolated
+ROTATION_TOLERANCE = TURN // 360          # Likewise a rotation within a degree
+
+# Packets
+JOIN, WELCOME, INPUT, SNAPSHOT, LEAVE = range(1, 6)
+PACKET_TYPE = struct.Struct("<B")
+WELCOME_PACKET = struct.Struct("<BBI")    # type, player id (ARENA_FULL when refused), server tick
+INPUT_HEADER = struct.Struct("<BIB")      # type, latest snapshot tick received, input count
+INPUT_SEQ = struct.Struct("<I")           # precedes each replay.RECORD in an input packet
+SNAPSHOT_HEADER = struct.Struct("<BBI")   # type, player id, last input sequence number applied
+BODY_HEADER = struct.Struct("<IIHHH")     # tick, baseline tick (0 for none), new, changed and removed counts
+NEW_PREFIX = struct.Struct("<BH")         # kind, id; then the full record
+CHANGED_PREFIX = struct.Struct("<HB")     # id, field mask; then the changed fields
+ARENA_FULL = 0xFF
+
+# Entity kinds. Ship ids are player ids; asteroids and bullets use the arena's net ids
+SHIP, ASTEROID, BULLET = range(3)
+FIELDS = {
+    SHIP: "HHhhHBI",     # x, y, vx, vy, angle, lives (| DEAD while waiting to respawn), score
+    ASTEROID: "HHhhHh",  # x, y, vx, vy, rotation, rotation per tick
+    BULLET: "HHhh",      # x, y, vx, vy
+}
+RECORDS = {kind: struct.Struct("<" + fields) for kind, fields in FIELDS.items()}
+SHAPE = struct.Struct("<8B")  # Asteroid outline radii, sent only with a new asteroid's full record
+DEAD = 0x80
+
+# Structs for each (kind, field mask) combination, made when first needed
+changed_structs = {}
+
+def changed_struct(kind, mask):
+    packer = changed_structs.get((kind, mask))
+    if packer is None:
+        fields = FIELDS[kind]
+        packer = changed_structs[kind, mask] = struct.Struct(
+            "<" + "".join(field for i, field in enumerate(fields) if mask & (1 << i)))
+    return packer
+
+# Quantizing the arena
+
+def quantize_motion(pos, velocity):
+    return (
+        int(round(pos.x * POSITION_SCALE)) % WORLD_X,
+        int(round(pos.y * POSITION_SCALE)) % WORLD_Y,
+        int(round(velocity.x * POSITION_SCALE)),
+        int(round(velocity.y * POSITION_SCALE)),
+    )
+
+def quantize_angle(degrees):
+    return int(round(degrees * TURN / 360)) % TURN
+
+def ship_record(player):
+    ship = player.ship
+    if ship is None:
+        return (0, 0, 0, 0, 0, DEAD, player.score)
+    return quantize_motion(ship.pos, ship.velocity) + (quantize_angle(ship.angle), player.lives, player.score)
+
+def asteroid_record(asteroid):
+    return quantize_motion(asteroid.pos, asteroid.velocity) + (
+        quantize_angle(asteroid.rotation), int(round(asteroid.rotation_speed * TURN / 360)))
+
+def asteroid_shape(asteroid):
+    return SHAPE.pack(*[min(255, int(round(math.hypot(x, y) * RADIUS_SCALE))) for x, y in asteroid.points])
+
+def extrapolate(kind, record, ticks):
+    """A record carried forward by its own velocity (and spin) for a number of ticks"""
+    x, y, vx, vy = record[:4]
+    moved = ((x + vx * ticks) % WORLD_X, (y + vy * ticks) % WORLD_Y) + record[2:]
+    if kind == ASTEROID:
+        moved = moved[:4] + ((record[4] + record[5] * ticks) % TURN, record[5])
+    return moved
+
+def wrapped_difference(a, b, size):
+    return abs((a - b + size // 2) % size - size // 2)
+
+def settle(kind, record, previous, ticks):
+    """Publish the extrapolation of the previous record instead of the measured position when they nearly agree
+
+    Snapshots then repeat exactly what a client extrapolates from its baseline,
+    so slow drift costs no bandwidth until it grows past the tolerance.
+    """
+    if previous is None or previous[0] != kind:
+        return record
+    expected = extrapolate(kind, previous[1], ticks)
+    settled = list(record)
+    if wrapped_difference(record[0], expected[0], WORLD_X) <= POSITION_TOLERANCE:
+        settled[0] = expected[0]
+    if wrapped_difference(record[1], expected[1], WORLD_Y) <= POSITION_TOLERANCE:
+        settled[1] = expected[1]
+    if kind == ASTEROID and wrapped_difference(record[4], expected[4], TURN) <= ROTATION_TOLERANCE:
+        settled[4] = expected[4]
+    return tuple(settled)
+
+# Snapshot states are dicts of id -> (kind, record, shape), shape being None except for asteroids
+
+def encode_delta(tick, state, baseline_tick, baseline):
+    """Snapshot body for state, relative to a baseline state the client holds (or to nothing when baseline is None)"""
+    new = []
+    changed = []
+    ticks = tick - baseline_tick
+    for net_id, (kind, record, shape) in state.items():
+        old = baseline.get(net_id) if baseline is not None else None
+        if old is None or old[0] != kind:
+            new.append(NEW_PREFIX.pack(kind, net_id) + RECORDS[kind].pack(*record) + (shape or b""))
+            continue
+        expected = extrapolate(kind, old[1], ticks)
+        mask = 0
+        for i in range(len(record)):
+            if record[i] != expected[i]:
+                mask |= 1 << i
+        if mask:
+            values = [value for i, value in enumerate(record) if mask & (1 << i)]
+            changed.append(CHANGED_PREFIX.pack(net_id, mask) + changed_struct(kind, mask).pack(*values))
+    removed = [net_id for net_id in baseline if net_id not in state] if baseline is not None else []
+    return b"".join([
+        BODY_HEADER.pack(tick, baseline_tick if baseline is not None else 0, len(new), len(changed), len(removed)),
+        *new, *changed, struct.pack(f"<{len(removed)}H", *removed),
+    ])
+
+def decode_delta(body, baselines, offset=0):
+    """(tick, state) from a snapshot body, or None when its baseline is no longer held"""
+    tick, baseline_tick, new, changed, removed = BODY_HEADER.unpack_from(body, offset)
+    offset += BODY_HEADER.size
+    state = {}
+    if baseline_tick:
+        baseline = baselines.get(baseline_tick)
+        if baseline is None:
+            return None
+        ticks = tick - baseline_tick
+        for net_id, (kind, record, shape) in baseline.items():
+            state[net_id] = (kind, extrapolate(kind, record, ticks), shape)
+    for _ in range(new):
+        kind, net_id = NEW_PREFIX.unpack_from(body, offset)
+        offset += NEW_PREFIX.size
+        record = RECORDS[kind].unpack_from(body, offset)
+        offset += RECORDS[kind].size
+        shape = None
+        if kind == ASTEROID:
+            shape = body[offset:offset + SHAPE.size]
+            offset += SHAPE.size
+        state[net_id] = (kind, record, shape)
+    for _ in range(changed):
+        net_id, mask = CHANGED_PREFIX.unpack_from(body, offset)
+        offset += CHANGED_PREFIX.size
+        kind, record, shape = state[net_id]
+        packer = changed_struct(kind, mask)
+        values = iter(packer.unpack_from(body, offset))
+        offset += packer.size
+        state[net_id] = (kind, tuple(next(values) if mask & (1 << i) else value for i, value in enumerate(record)), shape)
+    for net_id in struct.unpack_from(f"<{removed}H", body, offset):
+        del state[net_id]
+    return tick, state
+
+class SnapshotPublisher:
+    """The arena quantized at each snapshot tick, kept for HISTORY snapshots, with encodings cached per baseline"""
+    def __init__(self, arena):
+        self.arena = arena
+        self.states = {}
+        self.ticks = deque()
+        self.tick = 0
+        self.state = {}
+        self.bodies = {}  # Baseline tick -> encoded body of the latest snapshot
+        self.encodes = 0
+
+    def publish(self):
+        tick = self.arena.ticks
+        previous = self.state
+        ticks = tick - self.tick
+        state = {}
+        for player in self.arena.players.values():
+            state[player.id] = (SHIP, settle(SHIP, ship_record(player), previous.get(player.id), ticks), None)
+        for asteroid in self.arena.asteroids:
+            old = previous.get(asteroid.net_id)
+            shape = old[2] if old is not None and old[0] == ASTEROID else asteroid_shape(asteroid)
+            state[asteroid.net_id] = (ASTEROID, settle(ASTEROID, asteroid_record(asteroid), old, ticks), shape)
+        for bullet in self.arena.bullets:
+            record = quantize_motion(bullet.pos, bullet.velocity)
+            state[bullet.net_id] = (BULLET, settle(BULLET, record, previous.get(bullet.net_id), ticks), None)
+
+        self.tick = tick
+        self.state = self.states[tick] = state
+        self.ticks.append(tick)
+        while len(self.ticks) > HISTORY:
+            del self.states[self.ticks.popleft()]
+        self.bodies = {}
+
+    def body(self, baseline_tick):
+        """The latest snapshot encoded against a baseline, or in full when that baseline has been dropped"""
+        baseline = self.states.get(baseline_tick)
+        if baseline is None:
+            baseline_tick = 0
+        body = self.bodies.get(baseline_tick)
+        if body is None:
+            body = self.bodies[baseline_tick] = encode_delta(self.tick, self.state, baseline_tick, baseline)
+            self.encodes += 1
+        return body
+
+# Input packets
+
+def encode_inputs(acked_tick, inputs):
+    """An input packet carrying (seq, InputState) pairs, oldest first"""
+    parts = [INPUT_HEADER.pack(INPUT, acked_tick, len(inputs))]
+    for seq, state in inputs:
+        flags = (THRUST if state.thrust else 0) | (SHOOT if state.shoot else 0)
+        parts.append(INPUT_SEQ.pack(seq) + RECORD.pack(state.aim[0], state.aim[1], flags))
+    return b"".join(parts)
+
+def decode_inputs(packet):
+    """(acked tick, [(seq, InputState), ...]) from an input packet, or None when its length doesn't match its count"""
+    if len(packet) < INPUT_HEADER.size:
+        return None
+    _, acked_tick, count = INPUT_HEADER.unpack_from(packet)
+    if len(packet) != INPUT_HEADER.size + count * (INPUT_SEQ.size + RECORD.size):
+        return None
+    offset = INPUT_HEADER.size
+    inputs = []
+    for _ in range(count):
+        seq, = INPUT_SEQ.unpack_from(packet, offset)
+        x, y, flags = RECORD.unpack_from(packet, offset + INPUT_SEQ.size)
+        offset += INPUT_SEQ.size + RECORD.size
+        inputs.append((seq, InputState(aim=(x, y), thrust=bool(flags & THRUST), shoot=bool(flags & SHOOT))))
+    return acked_tick, inputs
+
+class RemoteClient:
+    """Server-side view of one connected player"""
+    def __init__(self, player, address):
+        self.player = player
+        self.address = address
+        self.inputs = {}       # Sequence number -> InputState not yet applied
+        self.last_seq = 0      # Last input applied
+        self.held = InputState()  # Repeated (without shooting) while no new input has arrived
+        self.acked_tick = 0
+        self.last_heard = time.perf_counter()
+
+    def next_input(self):
+        if not self.inputs:
+            return self.held
+        seq = min(self.inputs)
+        if len(self.inputs) > MAX_INPUT_BACKLOG:
+            seq = max(self.inputs) - MAX_INPUT_BACKLOG + 1
+            for stale in [stale for stale in self.inputs if stale < seq]:
+                del self.inputs[stale]
+        state = self.inputs.pop(seq)
+        self.last_seq = seq
+        self.held = InputState(aim=state.aim, thrust=state.thrust)
+        return state
+
+class TickStats:
+    """Server cost and traffic for the ticks run with a given number of players"""
+    def __init__(self):
+        self.ticks = 0
+        self.sim_seconds = 0.0
+        self.net_seconds = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshots = 0
+        self.encodes = 0
+        self.bad_packets = 0  # Malformed or unexpected packets dropped
+
+class Server:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, seed=None):
+        self.arena = Arena(seed=seed)
+        self.publisher = SnapshotPublisher(self.arena)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.setblocking(False)
+        self.address = self.sock.getsockname()
+        self.clients = {}  # Address -> RemoteClient
+        self.stats = {}    # Player count -> TickStats
+
+    def send(self, packet, address, stats):
+        try:
+            self.sock.sendto(packet, address)
+        except OSError:
+            return  # Full send buffer or an unreachable client; the next snapshot supersedes this one
+        stats.bytes_sent += len(packet)
+
+    def receive(self, stats):
+        while True:
+            try:
+                packet, address = self.sock.recvfrom(MAX_PACKET)
+            except (BlockingIOError, ConnectionResetError):
+                return
+            stats.bytes_received += len(packet)
+            try:
+                handled = self.handle(packet, address, stats)
+            except struct.error:
+                handled = False  # A length check missed something; the packet is still only dropped
+            if not handled:
+                stats.bad_packets += 1
+
+    def handle(self, packet, address, stats):
+        """Act on one packet; returns False, having done nothing, when it is malformed or unexpected"""
+        if not packet:
+            return False
+        kind = packet[0]
+        client = self.clients.get(address)
+        if kind == INPUT and client is not None:
+            decoded = decode_inputs(packet)
+            if decoded is None:
+                return False
+            acked_tick, inputs = decoded
+            client.acked_tick = max(client.acked_tick, acked_tick)
+            for seq, state in inputs:
+                if seq > client.last_seq:
+                    client.inputs[seq] = state
+        elif kind == JOIN and len(packet) <= PACKET_TYPE.size + MAX_NAME_BYTES:
+            if client is None:
+                player = self.arena.add_player(packet[PACKET_TYPE.size:].decode("utf-8", "replace"))
+                if player is None:
+                    self.send(WELCOME_PACKET.pack(WELCOME, ARENA_FULL, self.arena.ticks), address, stats)
+                    return True
+                client = self.clients[address] = RemoteClient(player, address)
+            # Sent again for a repeated join, in case the first welcome was lost
+            self.send(WELCOME_PACKET.pack(WELCOME, client.player.id, self.arena.ticks), address, stats)
+        elif kind == LEAVE and client is not None and len(packet) == PACKET_TYPE.size:
+            self.drop(client)
+            return True
+        else:
+            return False
+        client.last_heard = time.perf_counter()
+        return True
+
+    def drop(self, client):
+        del self.clients[client.address]
+        self.arena.remove_player(client.player.id)
+
+    def broadcast(self, stats):
+        self.publisher.publish()
+        encodes = self.publisher.encodes
+        for client in self.clients.values():
+            body = self.publisher.body(client.acked_tick)
+            self.send(SNAPSHOT_HEADER.pack(SNAPSHOT, client.player.id, client.last_seq) + body, client.address, stats)
+        stats.snapshots += 1
+        stats.encodes += self.publisher.encodes - encodes
+
+    def tick(self):
+        stats = self.stats.get(len(self.clients))
+        if stats is None:
+            stats = self.stats[len(self.clients)] = TickStats()
+        start = time.perf_counter()
+        self.receive(stats)
+        inputs = {client.player.id: client.next_input() for client in self.clients.values()}
+        sim_start = time.perf_counter()
+        self.arena.step(inputs)
+        sim_end = time.perf_counter()
+        if self.arena.ticks % SNAPSHOT_INTERVAL == 0:
+            self.broadcast(stats)
+        silent = [client for client in self.clients.values() if sim_end - client.last_heard > CLIENT_TIMEOUT]
+        for client in silent:
+            self.drop(client)
+        stats.ticks += 1
+        stats.sim_seconds += sim_end - sim_start
+        stats.net_seconds += (sim_start - start) + (time.perf_counter() - sim_end)
+
+    def serve(self, seconds=None):
+        """Run ticks on the fixed timestep, for a number of seconds or until interrupted"""
+        start = next_tick = time.perf_counter()
+        try:
+            while seconds is None or next_tick - start < seconds:
+                now = time.perf_counter()
+                if now < next_tick:
+                    time.sleep(next_tick - now)
+                    continue
+                self.tick()
+                next_tick += TICK_SECONDS
+                if now - next_tick > MAX_CATCH_UP_TICKS * TICK_SECONDS:
+                    next_tick = now  # Too far behind to catch up; carry on from here
+        except KeyboardInterrupt:
+            pass
+
+    def report(self):
+        print(f"{'players':>7} {'ticks':>6} {'sim ms':>7} {'net ms':>7} {'encodes':>8} {'kB/s out':>9} {'kB/s in':>8}  per client")
+        for count in sorted(self.stats):
+            stats = self.stats[count]
+            if not count or not stats.ticks:
+                continue
+            seconds = stats.ticks * TICK_SECONDS
+            print(f"{count:>7} {stats.ticks:>6} {stats.sim_seconds * 1000 / stats.ticks:>7.3f} "
+                  f"{stats.net_seconds * 1000 / stats.ticks:>7.3f} {stats.encodes / max(stats.snapshots, 1):>8.2f} "
+                  f"{stats.bytes_sent / seconds / count / 1000:>9.2f} {stats.bytes_received / seconds / count / 1000:>8.2f}")
+        bad_packets = sum(stats.bad_packets for stats in self.stats.values())
+        if bad_packets:
+            print(f"{bad_packets} malformed or unexpected packets dropped")
+
+    def close(self):
+        self.sock.close()
+
+def ship_from_record(record):
+    x, y, vx, vy, angle = record[:5]
+    ship = Ship(x / POSITION_SCALE, y / POSITION_SCALE)
+    ship.velocity.set(vx / POSITION_SCALE, vy / POSITION_SCALE)
+    ship.angle = ship.previous_angle = angle * 360 / TURN
+    return ship
+
+def lerp_wrapped(a, b, t, size):
+    return (a + ((b - a + size / 2) % size - size / 2) * t) % size
+
+class NetClient:
+    """One player's end: sends inputs, decodes snapshots and predicts its own ship"""
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, name="PLAYER"):
+        self.server = (host, port)
+        self.name = name
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.player_id = None
+        self.seq = 0
+        self.pending = deque()  # (seq, InputState) sent but not yet applied by the server
+        self.states = {}        # Snapshot tick -> state, kept as baselines and for interpolation
+        self.ticks = deque()
+        self.tick = 0           # Latest snapshot tick
+        self.render_tick = 0.0  # Server tick that other entities are drawn at
+        self.ship = None        # Own ship, predicted ahead of the latest snapshot
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.corrections = 0
+        self.correction_pixels = 0.0  # Total distance predictions were moved by snapshots
+
+    def send(self, packet):
+        self.sock.sendto(packet, self.server)
+        self.bytes_sent += len(packet)
+
+    def join(self, timeout=2.0):
+        """Ask for a seat until the server answers; returns whether one was given"""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            self.send(PACKET_TYPE.pack(JOIN) + self.name.encode("utf-8")[:MAX_NAME_BYTES])
+            time.sleep(0.05)
+            self.receive()
+            if self.player_id is not None:
+                return self.player_id != ARENA_FULL
+        return False
+
+    def leave(self):
+        if self.player_id is not None:
+            self.send(PACKET_TYPE.pack(LEAVE))
+        self.sock.close()
+
+    def receive(self):
+        while True:
+            try:
+                packet = self.sock.recv(MAX_PACKET)
+            except (BlockingIOError, ConnectionResetError):
+                return
+            self.bytes_received += len(packet)
+            if not packet:
+                continue
+            try:
+                if packet[0] == WELCOME:
+                    _, self.player_id, tick = WELCOME_PACKET.unpack(packet)
+                elif packet[0] == SNAPSHOT:
+                    _, _, last_seq = SNAPSHOT_HEADER.unpack_from(packet)
+                    decoded = decode_delta(packet, self.states, SNAPSHOT_HEADER.size)
+                    if decoded is None or decoded[0] <= self.tick:
+                        continue  # Baseline already dropped, or arrived out of order
+                    self.store(*decoded)
+                    self.reconcile(last_seq)
+            except (struct.error, KeyError):
+                continue  # Truncated or corrupt; the next snapshot supersedes it
+
+    def store(self, tick, state):
+        if not self.tick:
+            self.render_tick = tick - INTERPOLATION_TICKS
+        self.tick = tick
+        self.states[tick] = state
+        self.ticks.append(tick)
+        while len(self.ticks) > HISTORY:
+            del self.states[self.ticks.popleft()]
+
+    def reconcile(self, last_seq):
+        """Restart prediction from the server's ship and replay the inputs it hasn't applied yet"""
+        while self.pending and self.pending[0][0] <= last_seq:
+            self.pending.popleft()
+        own = self.states[self.tick].get(self.player_id)
+        if own is None or own[1][5] & DEAD:
+            self.ship = None
+            return
+        predicted = self.ship
+        self.ship = ship_from_record(own[1])
+        for _, state in self.pending:
+            self.ship.update(state)
+        if predicted is not None:
+            error = math.hypot(wrapped_difference(predicted.pos.x, self.ship.pos.x, SCREEN_WIDTH),
+                               wrapped_difference(predicted.pos.y, self.ship.pos.y, SCREEN_HEIGHT))
+            self.corrections += 1
+            self.correction_pixels += error
+
+    def send_input(self, inputs):
+        """Send this tick's input, with the previous few, and apply it to the predicted ship"""
+        inputs = quantize(inputs)
+        self.seq += 1
+        self.pending.append((self.seq, inputs))
+        self.send(encode_inputs(self.tick, list(self.pending)[-INPUT_REDUNDANCY:]))
+        if self.ship is not None:
+            self.ship.update(inputs)
+        # Keep the interpolation point a steady distance behind the newest snapshot
+        self.render_tick += 1
+        target = self.tick - INTERPOLATION_TICKS
+        if abs(self.render_tick - target) > 2 * SNAPSHOT_INTERVAL:
+            self.render_tick = target
+
+    def view(self):
+        """Entities other than the own ship as (kind, x, y, angle, record, shape), interpolated at render_tick"""
+        older = newer = None
+        for tick in self.ticks:
+            if tick <= self.render_tick:
+                older = tick
+            elif newer is None:
+                newer = tick
+        if older is None:
+            older = newer
+        if older is None:
+            return []
+        if newer is None:
+            newer = older
+        t = (self.render_tick - older) / (newer - older) if newer != older else 0.0
+        before, after = self.states[older], self.states[newer]
+        entities = []
+        for net_id, (kind, record, shape) in after.items():
+            if net_id == self.player_id:
+                continue
+            if kind == SHIP and record[5] & DEAD:
+                continue
+            x, y = record[0] / POSITION_SCALE, record[1] / POSITION_SCALE
+            angle = record[4] * 360 / TURN if kind != BULLET else 0.0
+            old = before.get(net_id)
+            if old is not None and old[0] == kind and t:
+                x = lerp_wrapped(old[1][0] / POSITION_SCALE, x, t, SCREEN_WIDTH)
+                y = lerp_wrapped(old[1][1] / POSITION_SCALE, y, t, SCREEN_HEIGHT)
+                if kind != BULLET:
+                    angle = lerp_wrapped(old[1][4] * 360 / TURN, angle, t, 360)
+            entities.append((kind, x, y, angle, record, shape))
+        return entities
+
+def bot_input(bot, tick):
+    """scripted_input, phase-shifted per bot so the ships spread out"""
+    return scripted_input(tick + 37 * bot)
+
+def run_bots(port, count, stage_seconds, seconds):
+    """Join count bot clients one every stage_seconds, play for a total of seconds, then report what they saw"""
+    bots = []
+    start = time.perf_counter()
+    tick = 0
+    next_tick = start
+    while time.perf_counter() - start < seconds:
+        if len(bots) < count and time.perf_counter() - start >= len(bots) * stage_seconds:
+            bot = NetClient(port=port, name=f"BOT{len(bots) + 1}")
+            if bot.join():
+                bots.append(bot)
+            else:
+                print(f"BOT{len(bots) + 1} could not join")
+                count = len(bots)
+        for i, bot in enumerate(bots):
+            bot.receive()
+            bot.send_input(bot_input(i, tick))
+            bot.view()
+        tick += 1
+        next_tick += TICK_SECONDS
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    for bot in bots:
+        average = bot.correction_pixels / bot.corrections if bot.corrections else 0.0
+        print(f"{bot.name}: received {bot.bytes_received / 1000:.1f} kB, sent {bot.bytes_sent / 1000:.1f} kB, "
+              f"prediction corrected by {average:.2f} px on average over {bot.corrections} snapshots")
+        bot.leave()
+
+# Malformed packets the server must drop without disturbing anyone
+JUNK_PACKETS = (
+    b"",
+    bytes([INPUT, 1]),                                   # Truncated header
+    INPUT_HEADER.pack(INPUT, 0, 3),                      # Claims three inputs, carries none
+    INPUT_HEADER.pack(INPUT, 0, 0) + b"\0" * 5,          # Trailing bytes
+    PACKET_TYPE.pack(JOIN) + b"x" * (MAX_NAME_BYTES + 1),  # Name too long
+    PACKET_TYPE.pack(LEAVE),                             # From an address that never joined
+    bytes([SNAPSHOT, 0, 0]),                             # Server-to-client type
+    bytes([255]) * 16,                                   # Unknown type
+)
+
+def send_junk(address):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for packet in JUNK_PACKETS:
+        sock.sendto(packet, address)
+    sock.close()
+
+def selftest(clients, seconds):
+    server = Server(port=0, seed=1)
+    port = server.address[1]
+    send_junk(server.address)
+    bots = multiprocessing.Process(target=run_bots, args=(port, clients, seconds, clients * seconds + 0.5))
+    bots.start()
+    server.serve(clients * seconds + 1.0)
+    bots.join()
+    server.close()
+    server.report()
+
+def play(host, port, name):
+    """Play in a window: aim with the mouse, thrust with the left button, fire with space or the right button"""
+    import pygame
+    from controls import InputReader
+    from render import draw_polygons, ship_polygon, transform_polygons
+    from simulation import BLACK, WHITE
+    import numpy as np
+
+    client = NetClient(host, port, name)
+    if not client.join():
+        print(f"Could not join {host}:{port}")
+        return
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption(f"Asteroids - player {client.player_id + 1}")
+    font = pygame.font.Font(None, 24)
+    clock = pygame.time.Clock()
+    unit_circle = np.radians(np.arange(8) * 45.0)
+    controls_reader = InputReader(gamepads=False)
+    running = True
+    while running:
+        controls = controls_reader.poll()
+        running = not controls.quit
+        client.receive()
+        client.send_input(InputState(aim=controls.pointer, thrust="thrust" in controls.held, shoot="shoot" in controls.pressed))
+
+        screen.fill(BLACK)
+        entities = client.view()
+        asteroids = [entity for entity in entities if entity[0] == ASTEROID]
+        if asteroids:
+            radii = np.array([list(shape) for *_, shape in asteroids], dtype=np.float64) / RADIUS_SCALE
+            points = np.stack((np.cos(unit_circle) * radii, np.sin(unit_circle) * radii), -1)
+            rotation = np.array([entity[3] for entity in asteroids])
+            pos = np.array([(entity[1], entity[2]) for entity in asteroids])
+            draw_polygons(screen, WHITE, transform_polygons(points, rotation, pos))
+        for kind, x, y, angle, record, shape in entities:
+            if kind == BULLET:
+                pygame.draw.circle(screen, WHITE, (int(x), int(y)), 2)
+            elif kind == SHIP:
+                pygame.draw.polygon(screen, WHITE, ship_polygon(x, y, angle).tolist(), 2)
+        if client.ship is not None:
+            client.ship.draw(screen)
+        latest = client.states.get(client.tick, {})
+        ships = sorted((net_id, entry[1]) for net_id, entry in latest.items() if entry[0] == SHIP)
+        for row, (net_id, record) in enumerate(ships):
+            marker = "*" if net_id == client.player_id else " "
+            lives = "out" if record[5] & DEAD else record[5]
+            text = font.render(f"{marker}P{net_id + 1}  {record[6]:>6}  lives {lives}", True, WHITE)
+            screen.blit(text, (10, 10 + row * 20))
+        pygame.display.flip()
+        clock.tick(FPS)
+    client.leave()
+    pygame.quit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    server_parser = commands.add_parser("server", help="run an authoritative server until interrupted")
+    server_parser.add_argument("--host", default=DEFAULT_HOST)
+    server_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    client_parser = commands.add_parser("client", help="join a server and play in a window")
+    client_parser.add_argument("--host", default=DEFAULT_HOST)
+    client_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    client_parser.add_argument("--name", default="PLAYER")
+    selftest_parser = commands.add_parser("selftest", help="server plus bot clients over localhost, reporting cost per player count")
+    selftest_parser.add_argument("--clients", type=int, default=MAX_PLAYERS)
+    selftest_parser.add_argument("--seconds", type=float, default=3.0, help="seconds played at each player count")
+    args = parser.parse_args()
+
+    if args.command == "server":
+        server = Server(args.host, args.port)
+        print(f"Serving on {server.address[0]}:{server.address[1]}; Ctrl+C to stop")
+        server.serve()
+        server.close()
+        server.report()
+    elif args.command == "client":
+        play(args.host, args.port, args.name)
+    else:
+        selftest(min(args.clients, MAX_PLAYERS), args.seconds)
+
+if __name__ == "__main__":
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    main()
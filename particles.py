@@ -0,0 +1,205 @@
+"""Pooled particles for explosions and ship exhaust
+
+Particles live in fixed-capacity NumPy arrays. Free slots are kept on an
+index stack, so emitting pops slots and writes random values drawn into
+preallocated scratch buffers, and expiring pushes them back; neither creates
+Python objects per particle. Particles are purely visual: they use their own
+random generator and never feed back into the simulation.
+
+    python particles.py [particles] [frames]
+"""
+import math
+import os
+import sys
+import time
+import pygame
+import numpy as np
+
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, NullEffects
+
+PARTICLE_CAPACITY = 65536
+PARTICLE_DRAG = 0.97
+FULL_REDRAW_SHARE = 0.5  # draw() returns None once its rects add up to more than this share of the screen
+
+class ParticleSystem(NullEffects):
+    """Fixed pool of particles, driven by the simulation's effect hooks"""
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None, size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.capacity = capacity
+        self.size = np.array(size, dtype=np.float32)  # Playfield the particles wrap around
+        self.rng = np.random.default_rng(seed)
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)      # Ticks left
+        self.max_life = np.ones(capacity, dtype=np.float32)   # Ticks at emission, for fading
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.burst = np.zeros(capacity, dtype=np.int64)  # Which emit() call each particle came from
+        self.bursts = 0
+
+        # Free slots as a stack; popping from the top hands out low indices first
+        self.all_free = np.arange(capacity - 1, -1, -1, dtype=np.int64)
+        self.free = self.all_free.copy()
+        self.free_count = capacity
+        self.high = 0  # Every live particle is below this index
+
+        # Scratch buffers for emission: angle, speed, and a work column
+        self.scratch = np.zeros((3, capacity), dtype=np.float32)
+        self.dropped = 0  # Particles not emitted because the pool was full
+
+    def __len__(self):
+        return self.capacity - self.free_count
+
+    def clear(self):
+        self.alive[:self.high] = False
+        self.free[:] = self.all_free
+        self.free_count = self.capacity
+        self.high = 0
+
+    def emit(self, count, x, y, vx, vy, speed, angle, spread, life):
+        """Emit up to count particles at (x, y) moving along angle ± spread (radians) at up to speed, plus (vx, vy)"""
+        n = min(count, self.free_count)
+        self.dropped += count - n
+        if not n:
+            return
+        top = self.free_count
+        slots = self.free[top - n:top]
+        self.free_count = top - n
+        self.high = max(self.high, int(slots.max()) + 1)
+
+        angles, speeds, work = self.scratch[0, :n], self.scratch[1, :n], self.scratch[2, :n]
+        self.rng.random(out=angles, dtype=np.float32)
+        angles -= 0.5
+        angles *= 2 * spread
+        angles += angle
+        self.rng.random(out=speeds, dtype=np.float32)
+        speeds *= speed
+
+        np.cos(angles, out=work)
+        work *= speeds
+        work += vx
+        self.velocity[slots, 0] = work
+        np.sin(angles, out=work)
+        work *= speeds
+        work += vy
+        self.velocity[slots, 1] = work
+
+        # Lifetimes between half and all of `life` ticks
+        self.rng.random(out=work, dtype=np.float32)
+        work *= life / 2
+        work += life / 2
+        self.life[slots] = work
+        self.max_life[slots] = work
+        self.pos[slots, 0] = x
+        self.pos[slots, 1] = y
+        self.alive[slots] = True
+        self.burst[slots] = self.bursts
+        self.bursts += 1
+
+    # Simulation effect hooks
+
+    def asteroid_destroyed(self, x, y, size):
+        self.emit(12 * size, x, y, 0.0, 0.0, 1.0 + size, 0.0, math.pi, 20 + 10 * size)
+
+    def ship_destroyed(self, x, y):
+        self.emit(120, x, y, 0.0, 0.0, 5.0, 0.0, math.pi, 60)
+
+    def thrust(self, x, y, angle, vx, vy):
+        # Exhaust leaves the tail, opposite the nose
+        backwards = math.radians(angle) + math.pi
+        self.emit(3, x + math.cos(backwards) * 10, y + math.sin(backwards) * 10, vx, vy, 3.0, backwards, 0.3, 15)
+
+    def update(self):
+        """Move, slow and age every particle and return expired slots to the free stack"""
+        h = self.high
+        if not h:
+            return
+        pos = self.pos[:h]
+        pos += self.velocity[:h]
+        self.velocity[:h] *= PARTICLE_DRAG
+        np.mod(pos, self.size, out=pos)
+        life = self.life[:h]
+        life -= 1
+
+        expired = np.flatnonzero(self.alive[:h] & (life <= 0))
+        if len(expired):
+            self.alive[expired] = False
+            self.free[self.free_count:self.free_count + len(expired)] = expired
+            self.free_count += len(expired)
+            if self.free_count == self.capacity:
+                # Pool empty again: restore the low-indices-first order
+                self.clear()
+
+    def draw(self, screen, lag=0.0, origin=None):
+        """Plot live particles as single pixels fading with age; returns a rect per burst they came from
+
+        Returns None instead when the rects would cover more than
+        FULL_REDRAW_SHARE of the screen, so the caller repaints all of it.
+        origin is the playfield point at the screen's top-left corner, for a
+        playfield larger than the screen; particles off screen are skipped.
+        """
+        live = np.flatnonzero(self.alive[:self.high])
+        if not len(live):
+            return []
+        pos = self.pos[live]
+        if lag:
+            pos -= self.velocity[live] * lag
+        if origin is not None:
+            pos -= np.array(origin, dtype=np.float32)
+            np.mod(pos, self.size, out=pos)
+            visible = (pos[:, 0] < screen.get_width()) & (pos[:, 1] < screen.get_height())
+            live, pos = live[visible], pos[visible]
+            if not len(live):
+                return []
+        xs = np.clip(pos[:, 0].astype(np.int32), 0, screen.get_width() - 1)
+        ys = np.clip(pos[:, 1].astype(np.int32), 0, screen.get_height() - 1)
+        brightness = (np.clip(self.life[live] / self.max_life[live], 0, 1) * 255).astype(np.uint32)
+
+        # One scattered write into the locked pixel array; grey is the same byte in every channel
+        if screen.get_bytesize() == 4:
+            pixels = pygame.surfarray.pixels2d(screen)
+            pixels[xs, ys] = brightness * 0x010101
+        else:
+            pixels = pygame.surfarray.pixels3d(screen)
+            pixels[xs, ys] = brightness[:, None]
+        del pixels
+
+        # Particles of one burst stay close together, so each burst gets its own bounding rect
+        order = np.argsort(self.burst[live])
+        bursts = self.burst[live][order]
+        starts = np.flatnonzero(np.concatenate(([True], bursts[1:] != bursts[:-1])))
+        xs, ys = xs[order], ys[order]
+        lefts, tops = np.minimum.reduceat(xs, starts), np.minimum.reduceat(ys, starts)
+        widths = np.maximum.reduceat(xs, starts) - lefts + 1
+        heights = np.maximum.reduceat(ys, starts) - tops + 1
+        if int((widths * heights).sum()) > FULL_REDRAW_SHARE * screen.get_width() * screen.get_height():
+            return None
+        return [pygame.Rect(*rect) for rect in zip(lefts.tolist(), tops.tolist(), widths.tolist(), heights.tolist())]
+
+if __name__ == "__main__":
+    # Update and draw cost with the pool held at a steady particle count
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    particles = ParticleSystem(max(count * 2, PARTICLE_CAPACITY), seed=1)
+    rng = np.random.default_rng(1)
+    per_frame = max(1, count // 60)  # Lifetimes of 40-80 ticks average 60
+
+    # Warm up to the steady count before timing
+    for frame in range(80):
+        particles.emit(per_frame, rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT), 0.0, 0.0, 4.0, 0.0, math.pi, 80)
+        particles.update()
+
+    update_time = draw_time = 0.0
+    for frame in range(frames):
+        start = time.perf_counter()
+        particles.emit(per_frame, rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT), 0.0, 0.0, 4.0, 0.0, math.pi, 80)
+        particles.update()
+        update_time += time.perf_counter() - start
+        screen.fill((0, 0, 0))
+        start = time.perf_counter()
+        particles.draw(screen)
+        draw_time += time.perf_counter() - start
+
+    print(f"{len(particles)} live particles: emit+update {update_time * 1000 / frames:.2f} ms, "
+          f"draw {draw_time * 1000 / frames:.2f} ms per frame")
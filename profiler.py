@@ -0,0 +1,125 @@
+import json
+import time
+from collections import deque
+
+FRAME_BUDGET = 1 / 60  # Seconds; frames over this count as spikes
+
+class NullPhase:
+    """Context manager that does nothing, handed out while profiling is off"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_PHASE = NullPhase()
+
+class Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.current.append((self.name, self.start, time.perf_counter()))
+        return False
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a ring buffer of the most recent frames
+
+    While disabled, phase() returns a shared no-op context manager, so the
+    instrumentation costs one attribute check per phase.
+    """
+    def __init__(self, capacity=600, enabled=False):
+        self.enabled = enabled
+        self.frames = deque(maxlen=capacity)  # (frame start, frame end, [(phase, start, end), ...])
+        self.current = []
+        self.frame_start = None
+        self.frame_count = 0  # Frames ever recorded; the ring buffer's length stops growing once full
+        self.overlay_frame = None  # frame_count when the overlay text was last worked out
+        self.overlay_lines = []
+
+    def phase(self, name):
+        if not self.enabled:
+            return NULL_PHASE
+        return Phase(self, name)
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+            self.current = []
+
+    def end_frame(self):
+        if self.enabled and self.frame_start is not None:
+            self.frames.append((self.frame_start, time.perf_counter(), self.current))
+            self.frame_start = None
+            self.frame_count += 1
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame_start = None
+        self.overlay_lines = []
+
+    def summary(self, window=60):
+        """Rolling per-phase averages (ms) over the last frames, plus frame average, worst frame and spike count"""
+        recent = list(self.frames)[-window:]
+        if not recent:
+            return {}, 0.0, 0.0, 0
+        totals = {}
+        for _, _, phases in recent:
+            for name, start, end in phases:
+                totals[name] = totals.get(name, 0.0) + (end - start)
+        averages = {name: total * 1000 / len(recent) for name, total in totals.items()}
+        frame_times = [end - start for start, end, _ in recent]
+        spikes = sum(1 for frame_time in frame_times if frame_time > FRAME_BUDGET)
+        return averages, sum(frame_times) * 1000 / len(recent), max(frame_times) * 1000, spikes
+
+    def draw_overlay(self, screen, text_cache, font, colour=(255, 255, 0)):
+        """Draw rolling averages in the top-right corner; returns the rects drawn"""
+        # Text only changes every 15 frames so the text cache isn't flooded
+        if not self.overlay_lines or self.frame_count - self.overlay_frame >= 15:
+            self.overlay_frame = self.frame_count
+            averages, frame_avg, worst, spikes = self.summary()
+            lines = [f"frame {frame_avg:5.2f} ms  worst {worst:5.2f} ms  spikes {spikes}"]
+            for name, avg in sorted(averages.items(), key=lambda item: -item[1]):
+                lines.append(f"{name} {avg:5.2f} ms")
+            self.overlay_lines = lines
+
+        rects = []
+        y = 10
+        for line in self.overlay_lines:
+            text = text_cache.render(font, line, colour)
+            rects.append(screen.blit(text, (screen.get_width() - text.get_width() - 10, y)))
+            y += text.get_height() + 2
+        return rects
+
+    def chrome_trace(self):
+        """Buffered frames as Chrome trace-event JSON (load in chrome://tracing or Perfetto)"""
+        if not self.frames:
+            return {"traceEvents": []}
+        origin = self.frames[0][0]
+        events = []
+        for index, (frame_start, frame_end, phases) in enumerate(self.frames):
+            events.append({
+                "name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                "ts": (frame_start - origin) * 1e6, "dur": (frame_end - frame_start) * 1e6,
+                "args": {"frame": index},
+            })
+            for name, start, end in phases:
+                events.append({
+                    "name": name, "ph": "X", "pid": 1, "tid": 1,
+                    "ts": (start - origin) * 1e6, "dur": (end - start) * 1e6,
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+# Shared, never-enabled profiler for code running without one
+NULL_PROFILER = FrameProfiler(capacity=1)
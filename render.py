@@ -0,0 +1,85 @@
+import pygame
+import numpy as np
+
+# Ship outline in its own frame, nose along +x
+SHIP_SHAPE = np.array([(15, 0), (-10, 8), (-10, -8)], dtype=np.float64)
+
+def transform_polygons(points, rotation, pos):
+    """Rotate (degrees) and translate a stack of polygons in one operation
+
+    points is (N, V, 2) in each polygon's own frame, rotation is (N,) and pos is (N, 2).
+    Returns (N, V, 2) screen coordinates.
+    """
+    rotation = np.radians(rotation)
+    cos_r = np.cos(rotation)
+    sin_r = np.sin(rotation)
+    # Stacked 2x2 rotation matrices, applied to every vertex of every polygon at once
+    matrices = np.stack((np.stack((cos_r, -sin_r), -1), np.stack((sin_r, cos_r), -1)), -2)
+    return np.einsum("nij,nvj->nvi", matrices, points) + pos[:, None, :]
+
+def draw_polygons(screen, colour, polygons, width=2):
+    """Hand finished point lists to the rasterizer; returns the rects touched"""
+    return [pygame.draw.polygon(screen, colour, polygon, width) for polygon in polygons.tolist()]
+
+def asteroid_arrays(asteroids, lag=0.0):
+    """Outline points, rotation and position arrays of a list of Asteroid objects, lag ticks behind their latest update"""
+    points = np.array([asteroid.points for asteroid in asteroids], dtype=np.float64)
+    rotation = np.array([asteroid.rotation - asteroid.rotation_speed * lag for asteroid in asteroids], dtype=np.float64)
+    pos = np.array([
+        (asteroid.pos.x - asteroid.velocity.x * lag, asteroid.pos.y - asteroid.velocity.y * lag)
+        for asteroid in asteroids
+    ], dtype=np.float64)
+    return points, rotation, pos
+
+def draw_asteroids(screen, colour, asteroids, lag=0.0, atlas=None):
+    """Draw a list of Asteroid objects with one batched transform, or as atlas blits when an atlas is given"""
+    if not asteroids:
+        return []
+    points, rotation, pos = asteroid_arrays(asteroids, lag)
+    if atlas is not None:
+        return atlas.draw(screen, asteroids, points, rotation, pos)
+    return draw_polygons(screen, colour, transform_polygons(points, rotation, pos))
+
+def ship_polygon(x, y, angle):
+    """Screen-space ship triangle"""
+    return transform_polygons(SHIP_SHAPE[None], np.array([angle], dtype=np.float64), np.array([(x, y)], dtype=np.float64))[0]
+
+class DirtyRects:
+    """Screen regions drawn last frame and this frame, for partial display updates
+
+    Each entity contributes its own clipped rect, so something wrapping from one
+    screen edge to the other dirties both edges rather than one huge span.
+    """
+    def __init__(self, screen_rect, max_rects=512):
+        self.screen_rect = screen_rect
+        self.max_rects = max_rects
+        self.previous = []
+        self.current = []
+        self.full = True  # The next frame must repaint and present the whole screen
+
+    def invalidate(self):
+        self.full = True
+
+    def add(self, rect):
+        self.current.append(rect)
+
+    def extend(self, rects):
+        self.current.extend(rects)
+
+    def erase(self, screen, colour):
+        """Clear what the previous frame drew, or the whole screen when too much changed"""
+        if self.full or len(self.previous) > self.max_rects:
+            self.full = True
+            screen.fill(colour)
+        else:
+            for rect in self.previous:
+                screen.fill(colour, rect)
+
+    def present(self):
+        if self.full:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.previous + self.current)
+        self.previous = [rect.clip(self.screen_rect) for rect in self.current]
+        self.current = []
+        self.full = False
@@ -0,0 +1,147 @@
+"""Binary input logs and headless max-speed replay
+
+A log is a header (seed, starting wave, simulation kind), one 5-byte record
+per simulation tick and, once the session ends, a footer with the final tick
+count, score, lives and state digest. Replaying re-runs the ticks headlessly
+as fast as the CPU allows and checks the final state against the footer:
+
+    python replay.py session.bin
+"""
+import struct
+import sys
+import time
+
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, InputState, Simulation
+
+MAGIC = b"ASTR"
+VERSION = 1
+HEADER = struct.Struct("<4sBBQI")    # magic, version, kind, seed, initial asteroids
+RECORD = struct.Struct("<hhB")       # aim x, aim y, flags
+MAX_AIM = 2 ** 15 - 1                # Largest aim coordinate a record holds; playfields must fit within it
+FOOTER = struct.Struct("<4sIqqI")    # magic, ticks, score, lives, state digest
+FOOTER_MAGIC = b"END!"
+
+# Record flags
+THRUST = 1
+SHOOT = 2
+
+# Simulation kinds stored in the header
+KIND_OBJECTS = 0
+KIND_ARRAYS = 1
+KIND_WORLD = 2
+
+def simulation_kind(sim):
+    if type(sim) is Simulation:
+        return KIND_OBJECTS
+    from world import WorldSimulation
+    return KIND_WORLD if isinstance(sim, WorldSimulation) else KIND_ARRAYS
+
+def make_simulation(kind, seed, initial_asteroids):
+    if kind == KIND_WORLD:
+        from world import WorldSimulation
+        return WorldSimulation(initial_asteroids, seed)
+    if kind == KIND_ARRAYS:
+        from entity_store import ArraySimulation
+        return ArraySimulation(initial_asteroids, seed)
+    return Simulation(initial_asteroids, seed)
+
+def quantize(inputs):
+    """The input exactly as it will be stored (aim rounded to whole pixels)"""
+    return InputState(
+        aim=(int(round(inputs.aim[0])), int(round(inputs.aim[1]))),
+        thrust=bool(inputs.thrust),
+        shoot=bool(inputs.shoot),
+    )
+
+class InputRecorder:
+    """Appends per-tick inputs for one simulation to a binary log"""
+    def __init__(self, path, sim):
+        # Aim is in playfield coordinates, up to a screen past the far edge when aiming across it,
+        # which the record's 16-bit fields must be able to hold
+        if max(sim.width + SCREEN_WIDTH, sim.height + SCREEN_HEIGHT) > MAX_AIM:
+            raise ValueError(f"a {sim.width}x{sim.height} playfield's aim doesn't fit a {RECORD.format} record")
+        self.path = path
+        self.sim = sim
+        self.ticks = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, simulation_kind(sim), sim.seed, sim.initial_asteroids))
+
+    def record(self, inputs):
+        """Log one tick's input and return it quantized, so the live game steps with what replay will see"""
+        inputs = quantize(inputs)
+        flags = (THRUST if inputs.thrust else 0) | (SHOOT if inputs.shoot else 0)
+        self.file.write(RECORD.pack(inputs.aim[0], inputs.aim[1], flags))
+        self.ticks += 1
+        return inputs
+
+    def close(self):
+        """Write the final-state footer and close the log"""
+        if self.file.closed:
+            return
+        self.file.write(FOOTER.pack(FOOTER_MAGIC, self.ticks, self.sim.score, self.sim.lives, self.sim.state_digest()))
+        self.file.close()
+
+class InputLog:
+    def __init__(self, kind, seed, initial_asteroids, records, final=None):
+        self.kind = kind
+        self.seed = seed
+        self.initial_asteroids = initial_asteroids
+        self.records = records  # Raw record bytes
+        self.final = final      # (ticks, score, lives, digest) or None for a truncated log
+
+    def __len__(self):
+        return len(self.records) // RECORD.size
+
+    def inputs(self):
+        for x, y, flags in RECORD.iter_unpack(self.records):
+            yield InputState(aim=(x, y), thrust=bool(flags & THRUST), shoot=bool(flags & SHOOT))
+
+def read_log(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, kind, seed, initial_asteroids = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} input log")
+    body = data[HEADER.size:]
+
+    final = None
+    if len(body) >= FOOTER.size and body[-FOOTER.size:-FOOTER.size + 4] == FOOTER_MAGIC:
+        footer_magic, ticks, score, lives, digest = FOOTER.unpack(body[-FOOTER.size:])
+        if ticks * RECORD.size == len(body) - FOOTER.size:
+            final = (ticks, score, lives, digest)
+            body = body[:-FOOTER.size]
+    # A log cut short (crash, kill) still replays up to its last whole record
+    body = body[:len(body) - len(body) % RECORD.size]
+    return InputLog(kind, seed, initial_asteroids, body, final)
+
+def replay(log):
+    """Re-run a log headlessly; returns (simulation, ticks per second)"""
+    sim = make_simulation(log.kind, log.seed, log.initial_asteroids)
+    inputs = list(log.inputs())
+    start = time.perf_counter()
+    for tick_input in inputs:
+        sim.step(tick_input)
+    elapsed = time.perf_counter() - start
+    return sim, len(inputs) / elapsed if elapsed > 0 else float("inf")
+
+def check(sim, log):
+    """True when the replayed state matches the log's footer"""
+    if log.final is None:
+        return False
+    ticks, score, lives, digest = log.final
+    return (sim.ticks, sim.score, sim.lives, sim.state_digest()) == (ticks, score, lives, digest)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(2)
+    log = read_log(sys.argv[1])
+    sim, rate = replay(log)
+    print(f"Replayed {len(log)} ticks at {rate:,.0f} ticks/s: score {sim.score}, lives {sim.lives}")
+    if log.final is None:
+        print("Log has no footer (session did not end cleanly); final state not checked")
+        sys.exit(1)
+    if not check(sim, log):
+        print(f"MISMATCH: log ended at tick {log.final[0]} with score {log.final[1]}, lives {log.final[2]}")
+        sys.exit(1)
+    print("Final state matches")
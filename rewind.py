@@ -0,0 +1,245 @@
+"""Compact binary snapshots of the simulation and a rewind buffer built on them
+
+serialize() packs everything a Simulation needs to carry on exactly where
+it was: the ship, every bullet, every asteroid with its outline, score,
+lives and the random generator's state, as float64 so a restored game
+replays bit for bit. RewindBuffer keeps one snapshot per tick within a
+fixed byte budget: every KEYFRAME_INTERVAL ticks a zlib-compressed full
+snapshot, and in between each tick XORed against a prediction from the tick
+before (every asteroid and bullet moved on one tick, as if nothing hit). The
+prediction is exact for whatever flew straight, so a delta is mostly zeros
+and compresses to a small fraction of the snapshot. Seeking decodes forward
+from the keyframe before the target:
+
+    python rewind.py [ticks]
+"""
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+import numpy as np
+
+from simulation import FPS, Vector2D, Bullet, Asteroid, Simulation, scripted_input
+
+HEADER = struct.Struct("<IqqBIHH")  # ticks, score, lives, game over, waves cleared, bullet count, asteroid count
+SHIP = struct.Struct("<6d")         # x, y, vx, vy, angle, previous angle
+RNG = struct.Struct("<625Id")       # Mersenne Twister words and position, pending gauss value (nan when none)
+BULLET_COLUMNS = 5                  # x, y, vx, vy, lifetime
+ASTEROID_POINTS = 8
+ASTEROID_COLUMNS = 7 + 2 * ASTEROID_POINTS  # x, y, vx, vy, rotation, rotation speed, size, outline points
+FIXED_SIZE = HEADER.size + SHIP.size + RNG.size  # Entity rows follow: asteroids, then bullets
+
+KEYFRAME_INTERVAL = FPS  # Ticks between full snapshots; seeking decodes at most this many deltas
+REWIND_BUDGET = 4 * 1024 * 1024  # Bytes of encoded snapshots kept
+COMPRESSION = 1  # zlib level: the deltas are mostly zeros, so the fastest level loses little
+
+def serialize(sim):
+    """The simulation's full state as bytes"""
+    if not sim.rewindable:
+        raise TypeError(f"{type(sim).__name__} state can't be snapshotted")
+    ship = sim.ship
+    bullets = np.array(
+        [(b.pos.x, b.pos.y, b.velocity.x, b.velocity.y, b.lifetime) for b in sim.bullets], dtype=np.float64)
+    asteroids = np.array([
+        (a.pos.x, a.pos.y, a.velocity.x, a.velocity.y, a.rotation, a.rotation_speed, a.size, *[c for p in a.points for c in p])
+        for a in sim.asteroids
+    ], dtype=np.float64)
+    _, words, gauss = sim.rng.getstate()
+    return b"".join((
+        HEADER.pack(sim.ticks, sim.score, sim.lives, sim.game_over, sim.waves_cleared, len(sim.bullets), len(sim.asteroids)),
+        SHIP.pack(ship.pos.x, ship.pos.y, ship.velocity.x, ship.velocity.y, ship.angle, ship.previous_angle),
+        RNG.pack(*words, float("nan") if gauss is None else gauss),
+        asteroids.tobytes(),
+        bullets.tobytes(),
+    ))
+
+def restore(sim, data):
+    """Put a simulation back in the state serialize() captured"""
+    sim.ticks, sim.score, sim.lives, game_over, sim.waves_cleared, bullet_count, asteroid_count = HEADER.unpack_from(data)
+    sim.game_over = bool(game_over)
+    offset = HEADER.size
+    x, y, vx, vy, angle, previous_angle = SHIP.unpack_from(data, offset)
+    offset += SHIP.size
+    ship = sim.ship
+    ship.pos.set(x, y)
+    ship.velocity.set(vx, vy)
+    ship.angle, ship.previous_angle = angle, previous_angle
+
+    *words, gauss = RNG.unpack_from(data, offset)
+    sim.rng.setstate((3, tuple(words), None if gauss != gauss else gauss))
+    offset += RNG.size
+
+    rows = np.frombuffer(data, np.float64, asteroid_count * ASTEROID_COLUMNS, offset).reshape(-1, ASTEROID_COLUMNS)
+    offset += rows.nbytes
+    sim.asteroids = []
+    for row in rows.tolist():
+        # Built without __init__, which would draw a new shape from the generator
+        asteroid = Asteroid.__new__(Asteroid)
+        asteroid.pos = Vector2D(row[0], row[1])
+        asteroid.velocity = Vector2D(row[2], row[3])
+        asteroid.rotation, asteroid.rotation_speed = row[4], row[5]
+        asteroid.size = int(row[6])
+        asteroid.radius = asteroid.size * 10
+        asteroid.points = list(zip(row[7::2], row[8::2]))
+        sim.asteroids.append(asteroid)
+
+    rows = np.frombuffer(data, np.float64, bullet_count * BULLET_COLUMNS, offset).reshape(-1, BULLET_COLUMNS)
+    sim.bullets = []
+    for x, y, vx, vy, lifetime in rows.tolist():
+        # Built without __init__, which would work out the velocity from an angle
+        bullet = Bullet.__new__(Bullet)
+        bullet.pos = Vector2D(x, y)
+        bullet.velocity = Vector2D(vx, vy)
+        bullet.lifetime = int(lifetime)
+        bullet.radius = 2
+        sim.bullets.append(bullet)
+
+def entity_rows(data, counts_from=None):
+    """(asteroid rows, bullet rows) of a snapshot, as float64 views; counts are read from counts_from when given"""
+    *_, bullet_count, asteroid_count = HEADER.unpack_from(data if counts_from is None else counts_from)
+    asteroids = np.frombuffer(data, np.float64, asteroid_count * ASTEROID_COLUMNS, FIXED_SIZE)
+    bullets = np.frombuffer(data, np.float64, bullet_count * BULLET_COLUMNS, FIXED_SIZE + asteroids.nbytes)
+    return asteroids.reshape(-1, ASTEROID_COLUMNS), bullets.reshape(-1, BULLET_COLUMNS)
+
+def predict(data, width, height):
+    """A snapshot's asteroid and bullet rows moved on one tick, the way their update() methods do it"""
+    asteroids, bullets = entity_rows(data)
+    asteroids = asteroids.copy()
+    asteroids[:, :2] += asteroids[:, 2:4]
+    asteroids[:, :2] %= (width, height)
+    asteroids[:, 4] += asteroids[:, 5]
+    bullets = bullets[bullets[:, 4] > 1]  # Expired bullets are dropped from the front
+    bullets[:, :2] += bullets[:, 2:4]
+    bullets[:, :2] %= (width, height)
+    bullets[:, 4] -= 1
+    return asteroids, bullets
+
+def xor_delta(data, previous, width, height, decoding=False):
+    """data XOR previous's prediction for it, section by section; the same call with decoding=True undoes it"""
+    out = np.frombuffer(data, np.uint8).copy()
+    out[:FIXED_SIZE] ^= np.frombuffer(previous, np.uint8, FIXED_SIZE)
+    # Entity rows are laid out by the counts of the snapshot being encoded, which a delta only holds once decoded
+    rows = entity_rows(out if decoding else data, out[:FIXED_SIZE].tobytes() if decoding else None)
+    offset = FIXED_SIZE
+    for actual, predicted in zip(rows, predict(previous, width, height)):
+        common = min(len(actual), len(predicted)) * actual.shape[1] * 8
+        out[offset:offset + common] ^= np.frombuffer(predicted.tobytes(), np.uint8, common)
+        offset += actual.nbytes
+    return out.tobytes()
+
+class RewindBuffer:
+    """Ring buffer of per-tick snapshots within a byte budget, oldest keyframe groups evicted first"""
+    def __init__(self, budget=REWIND_BUDGET, keyframe_interval=KEYFRAME_INTERVAL):
+        self.budget = budget
+        self.keyframe_interval = keyframe_interval
+        # Each group is a keyframe followed by deltas: [first tick, [encoded snapshot, ...]]
+        self.groups = deque()
+        self.bytes = 0
+        self.previous = None  # Raw bytes of the last snapshot recorded, the base for the next delta
+        self.size = None      # Playfield the snapshots wrap around, for predicting motion
+        self.record_seconds = 0.0
+        self.records = 0
+
+    def __len__(self):
+        return sum(len(snapshots) for _, snapshots in self.groups)
+
+    def oldest_tick(self):
+        return self.groups[0][0] if self.groups else None
+
+    def newest_tick(self):
+        if not self.groups:
+            return None
+        first, snapshots = self.groups[-1]
+        return first + len(snapshots) - 1
+
+    def record(self, sim):
+        """Snapshot the simulation's current tick"""
+        start = time.perf_counter()
+        data = serialize(sim)
+        self.size = (sim.width, sim.height)
+        if self.previous is None or sim.ticks != self.newest_tick() + 1 \
+                or len(self.groups[-1][1]) >= self.keyframe_interval:
+            self.groups.append([sim.ticks, [zlib.compress(data, COMPRESSION)]])
+        else:
+            self.groups[-1][1].append(zlib.compress(xor_delta(data, self.previous, *self.size), COMPRESSION))
+        self.bytes += len(self.groups[-1][1][-1])
+        self.previous = data
+        # Whole groups go, as their deltas can't be decoded without the keyframe; the newest always stays
+        while self.bytes > self.budget and len(self.groups) > 1:
+            self.bytes -= sum(len(snapshot) for snapshot in self.groups.popleft()[1])
+        self.record_seconds += time.perf_counter() - start
+        self.records += 1
+
+    def snapshot(self, tick):
+        """Raw bytes of the snapshot taken at tick, or None when it isn't held"""
+        for first, snapshots in self.groups:
+            if first <= tick < first + len(snapshots):
+                data = zlib.decompress(snapshots[0])
+                for delta in snapshots[1:tick - first + 1]:
+                    data = xor_delta(zlib.decompress(delta), data, *self.size, decoding=True)
+                return data
+        return None
+
+    def seek(self, sim, ticks_back):
+        """Restore the simulation to ticks_back ticks ago, or as far back as is held
+
+        Snapshots after the restored one are discarded, so recording carries
+        on from there. Returns the tick restored, or None when the buffer is empty.
+        """
+        if not self.groups:
+            return None
+        tick = max(self.oldest_tick(), self.newest_tick() - ticks_back)
+        data = self.snapshot(tick)
+        restore(sim, data)
+        while self.groups[-1][0] > tick:
+            self.bytes -= sum(len(snapshot) for snapshot in self.groups.pop()[1])
+        first, snapshots = self.groups[-1]
+        for snapshot in snapshots[tick - first + 1:]:
+            self.bytes -= len(snapshot)
+        del snapshots[tick - first + 1:]
+        self.previous = data
+        return tick
+
+    def rewind(self, sim, seconds):
+        return self.seek(sim, round(seconds * FPS))
+
+    def stats(self):
+        """Memory use, time held and average cost of record()"""
+        held = len(self)
+        return {
+            "snapshots": held,
+            "seconds_held": round(held / FPS, 1),
+            "bytes": self.bytes,
+            "bytes_per_snapshot": round(self.bytes / held) if held else 0,
+            "record_ms": round(self.record_seconds * 1000 / self.records, 4) if self.records else 0.0,
+        }
+
+if __name__ == "__main__":
+    # Record a scripted game, then rewind five seconds and check the replayed ticks match the originals
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 3600
+    sim = Simulation(seed=1)
+    buffer = RewindBuffer()
+    digests = {}
+    costs = []
+    for tick in range(ticks):
+        sim.step(scripted_input(tick))
+        start = time.perf_counter()
+        buffer.record(sim)
+        costs.append(time.perf_counter() - start)
+        digests[sim.ticks] = sim.state_digest()
+        if sim.game_over:
+            break
+    costs = np.array(costs) * 1000
+    print(f"{len(costs)} ticks, {len(sim.asteroids)} asteroids and {len(sim.bullets)} bullets at the end")
+    print(f"record: mean {costs.mean():.3f} ms, p99 {np.percentile(costs, 99):.3f} ms, max {costs.max():.3f} ms")
+    print(f"buffer: {buffer.stats()} (keyframes {len(zlib.compress(serialize(sim), COMPRESSION))} bytes)")
+
+    start = time.perf_counter()
+    tick = buffer.rewind(sim, 5)
+    print(f"rewound to tick {tick} in {(time.perf_counter() - start) * 1000:.2f} ms")
+    mismatches = 0
+    while sim.ticks < len(costs):
+        sim.step(scripted_input(sim.ticks))
+        mismatches += sim.state_digest() != digests[sim.ticks]
+    print(f"replayed {len(costs) - tick} ticks after rewinding: {mismatches} mismatched digests")
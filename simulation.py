@@ -0,0 +1,436 @@
+import pygame
+import math
+import random
+import sys
+import time
+import struct
+import zlib
+import numpy as np
+
+from render import draw_asteroids, ship_polygon
+from profiler import NULL_PROFILER
+from collision import BROADPHASE_MIN_PAIRS, SpatialHash, first_hits
+
+# Constants
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+FPS = 60
+COLLISION_CELL = 32  # Largest asteroid radius plus bullet radius
+
+class NullEffects:
+    """Hooks the simulation calls for visual effects; these do nothing, for headless runs"""
+    def asteroid_destroyed(self, x, y, size):
+        pass
+
+    def ship_destroyed(self, x, y):
+        pass
+
+    def thrust(self, x, y, angle, vx, vy):
+        pass
+
+NULL_EFFECTS = NullEffects()
+
+class Vector2D:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+
+    def __add__(self, other):
+        return Vector2D(self.x + other.x, self.y + other.y)
+
+    def __mul__(self, scalar):
+        return Vector2D(self.x * scalar, self.y * scalar)
+
+    # In-place variants for per-tick physics; these never allocate a new vector
+    def __iadd__(self, other):
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def __imul__(self, scalar):
+        self.x *= scalar
+        self.y *= scalar
+        return self
+
+    def set(self, x, y):
+        self.x = x
+        self.y = y
+
+    def add_xy(self, x, y):
+        self.x += x
+        self.y += y
+
+    def clamp_length(self, max_length):
+        """Scale down in place so the length is at most max_length"""
+        length_sq = self.x * self.x + self.y * self.y
+        if length_sq > max_length * max_length:
+            scale = max_length / math.sqrt(length_sq)
+            self.x *= scale
+            self.y *= scale
+
+    def wrap(self, width, height):
+        """Wrap around the screen in place"""
+        self.x %= width
+        self.y %= height
+
+    def normalize(self):
+        length = math.sqrt(self.x**2 + self.y**2)
+        if length > 0:
+            return Vector2D(self.x / length, self.y / length)
+        return Vector2D(0, 0)
+
+    def length(self):
+        return math.sqrt(self.x**2 + self.y**2)
+
+class InputState:
+    """Player input for a single simulation tick"""
+    def __init__(self, aim=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2), thrust=False, shoot=False):
+        self.aim = aim        # Point the ship turns towards (mouse position)
+        self.thrust = thrust  # Left mouse button held
+        self.shoot = shoot    # A shot was requested this tick (already edge-detected)
+
+class Ship:
+    bounds = (SCREEN_WIDTH, SCREEN_HEIGHT)  # Size of the playfield the ship wraps around
+
+    def __init__(self, x, y):
+        self.pos = Vector2D(x, y)
+        self.velocity = Vector2D(0, 0)
+        self.angle = 0
+        self.previous_angle = 0  # Angle before the last update, for interpolated drawing
+        self.radius = 10
+        self.thrust = 0.3
+        self.max_speed = 8
+        self.friction = 0.98
+
+    def update(self, inputs):
+        self.previous_angle = self.angle
+
+        # Calculate angle to aim position
+        dx = inputs.aim[0] - self.pos.x
+        dy = inputs.aim[1] - self.pos.y
+        target_angle = math.degrees(math.atan2(dy, dx))
+
+        # Smooth rotation towards mouse
+        angle_diff = target_angle - self.angle
+        # Normalize angle difference to [-180, 180]
+        while angle_diff > 180:
+            angle_diff -= 360
+        while angle_diff < -180:
+            angle_diff += 360
+
+        # Apply rotation with some smoothing
+        rotation_speed = 8
+        if abs(angle_diff) > rotation_speed:
+            self.angle += rotation_speed if angle_diff > 0 else -rotation_speed
+        else:
+            self.angle = target_angle
+
+        # Apply thrust
+        if inputs.thrust:
+            angle_rad = math.radians(self.angle)
+            self.velocity.add_xy(math.cos(angle_rad) * self.thrust, math.sin(angle_rad) * self.thrust)
+
+        # Apply friction
+        self.velocity *= self.friction
+
+        # Limit speed
+        self.velocity.clamp_length(self.max_speed)
+
+        # Update position
+        self.pos += self.velocity
+
+        # Wrap around screen
+        self.pos.wrap(*self.bounds)
+
+    def draw(self, screen, lag=0.0):
+        # lag is how far (in ticks) before the latest update to draw; motion is undone along the last step
+        turn = (self.angle - self.previous_angle + 180) % 360 - 180
+        x = self.pos.x - self.velocity.x * lag
+        y = self.pos.y - self.velocity.y * lag
+        # Ship vertices (triangle), rotated by the shared polygon kernel
+        return pygame.draw.polygon(screen, WHITE, ship_polygon(x, y, self.angle - turn * lag).tolist(), 2)
+
+class Bullet:
+    bounds = (SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    def __init__(self, x, y, angle):
+        self.pos = Vector2D(x, y)
+        speed = 10
+        self.velocity = Vector2D(
+            math.cos(math.radians(angle)) * speed,
+            math.sin(math.radians(angle)) * speed
+        )
+        self.lifetime = 60  # frames
+        self.radius = 2
+
+    def update(self):
+        self.pos += self.velocity
+        self.lifetime -= 1
+
+        # Wrap around screen
+        self.pos.wrap(*self.bounds)
+
+        return self.lifetime > 0
+
+    def draw(self, screen, lag=0.0):
+        x = self.pos.x - self.velocity.x * lag
+        y = self.pos.y - self.velocity.y * lag
+        return pygame.draw.circle(screen, WHITE, (int(x), int(y)), self.radius)
+
+class Asteroid:
+    bounds = (SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    def __init__(self, x, y, size=3, rng=random):
+        self.pos = Vector2D(x, y)
+        angle = rng.uniform(0, 360)
+        speed = rng.uniform(1, 3)
+        self.velocity = Vector2D(
+            math.cos(math.radians(angle)) * speed,
+            math.sin(math.radians(angle)) * speed
+        )
+        self.size = size
+        self.radius = size * 10
+        self.rotation = 0
+        self.rotation_speed = rng.uniform(-3, 3)
+
+        # Generate random shape
+        self.points = []
+        num_points = 8
+        for i in range(num_points):
+            angle = (360 / num_points) * i
+            variance = rng.uniform(0.8, 1.2)
+            radius = self.radius * variance
+            x = math.cos(math.radians(angle)) * radius
+            y = math.sin(math.radians(angle)) * radius
+            self.points.append((x, y))
+
+    def update(self):
+        self.pos += self.velocity
+        self.rotation += self.rotation_speed
+
+        # Wrap around screen
+        self.pos.wrap(*self.bounds)
+
+    def draw(self, screen, lag=0.0):
+        # Rotate and translate points (draw_asteroids does this for many asteroids at once)
+        return draw_asteroids(screen, WHITE, [self], lag)[0]
+
+    def split(self, rng=random):
+        if self.size > 1:
+            new_asteroids = []
+            for _ in range(2):
+                new_asteroid = type(self)(self.pos.x, self.pos.y, self.size - 1, rng)
+                new_asteroids.append(new_asteroid)
+            return new_asteroids
+        return []
+
+def check_collision(obj1, obj2, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+    # Shortest distance across the wrapping playfield edges, compared squared to skip the sqrt
+    dx = (obj1.pos.x - obj2.pos.x + width / 2) % width - width / 2
+    dy = (obj1.pos.y - obj2.pos.y + height / 2) % height - height / 2
+    reach = obj1.radius + obj2.radius
+    return dx * dx + dy * dy < reach * reach
+
+def wrapped_distance(x1, y1, x2, y2, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+    """Distance between two points the short way across the wrapping playfield edges"""
+    dx = (x1 - x2 + width / 2) % width - width / 2
+    dy = (y1 - y2 + height / 2) % height - height / 2
+    return math.hypot(dx, dy)
+
+class Simulation:
+    """Headless game state stepped from explicit InputState objects"""
+    width = SCREEN_WIDTH  # Playfield size; entities wrap around its edges
+    height = SCREEN_HEIGHT
+    rewindable = True  # Whether rewind.serialize() captures all of its state
+    invulnerable = False  # Asteroids pass through the ship; benchmarks set this so the game never ends
+
+    def __init__(self, initial_asteroids=5, seed=None):
+        # All randomness comes from this seeded generator, so a seed plus the inputs reproduce a session
+        self.seed = random.randrange(2**63) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.initial_asteroids = initial_asteroids
+
+        self.ship = self.make_ship()
+        self.bullets, self.asteroids = self.make_entity_containers()
+        self.score = 0
+        self.lives = 3
+        self.game_over = False
+        self.ticks = 0
+        self.waves_cleared = 0
+        self.grid = SpatialHash(self.width, self.height, COLLISION_CELL)
+        self.profiler = NULL_PROFILER
+        self.effects = NULL_EFFECTS  # Visual effect hooks; never affect the simulation
+
+        # Create initial asteroids
+        self.spawn_wave(initial_asteroids)
+
+    def make_ship(self):
+        """Return the player's ship at the centre of the playfield"""
+        return Ship(self.width // 2, self.height // 2)
+
+    def make_entity_containers(self):
+        """Return empty (bullets, asteroids) containers"""
+        return [], []
+
+    def spawn_wave(self, count):
+        """Spawn asteroids away from the ship"""
+        for _ in range(count):
+            while True:
+                x = self.rng.randint(0, SCREEN_WIDTH)
+                y = self.rng.randint(0, SCREEN_HEIGHT)
+                # Make sure asteroid doesn't spawn on ship, including across the wrapping edges
+                if wrapped_distance(x, y, self.ship.pos.x, self.ship.pos.y, self.width, self.height) > 100:
+                    self.asteroids.append(Asteroid(x, y, rng=self.rng))
+                    break
+
+    def shoot_bullet(self):
+        bullet = Bullet(self.ship.pos.x, self.ship.pos.y, self.ship.angle)
+        self.bullets.append(bullet)
+
+    def step(self, inputs):
+        """Advance the simulation by one tick"""
+        if self.game_over:
+            return
+
+        self.ticks += 1
+        if inputs.shoot:
+            self.shoot_bullet()
+
+        phase = self.profiler.phase
+        with phase("ship.update"):
+            self.ship.update(inputs)
+        if inputs.thrust:
+            ship = self.ship
+            self.effects.thrust(ship.pos.x, ship.pos.y, ship.angle, ship.velocity.x, ship.velocity.y)
+        with phase("move_entities"):
+            self.move_entities()
+        with phase("collide_bullets"):
+            self.collide_bullets()
+        with phase("collide_ship"):
+            self.collide_ship()
+
+        # Check if all asteroids destroyed
+        if not self.asteroids_left():
+            # Spawn more asteroids
+            self.waves_cleared += 1
+            self.spawn_wave(min(5 + self.score // 1000, 10))
+
+    def asteroids_left(self):
+        return len(self.asteroids)
+
+    def move_entities(self):
+        # Update bullets; all share one lifetime, so expired ones are always at the front
+        expired = 0
+        for bullet in self.bullets:
+            if not bullet.update():
+                expired += 1
+        if expired:
+            del self.bullets[:expired]
+
+        # Update asteroids
+        for asteroid in self.asteroids:
+            asteroid.update()
+
+    def bullet_hits(self):
+        """(bullet index, asteroid index) pairs: each bullet, in order, takes the first unclaimed asteroid it touches"""
+        if not self.bullets or not self.asteroids:
+            return []
+        if len(self.bullets) * len(self.asteroids) < BROADPHASE_MIN_PAIRS:
+            # Few pairs: test them directly, skipping array setup
+            hits = []
+            claimed = set()
+            for b, bullet in enumerate(self.bullets):
+                for a, asteroid in enumerate(self.asteroids):
+                    if a not in claimed and check_collision(bullet, asteroid, self.width, self.height):
+                        hits.append((b, a))
+                        claimed.add(a)
+                        break
+        else:
+            # Many pairs: broadphase through the spatial hash
+            self.grid.build(
+                np.array([(asteroid.pos.x, asteroid.pos.y) for asteroid in self.asteroids]),
+                np.array([asteroid.radius for asteroid in self.asteroids], dtype=np.float64),
+            )
+            hits = first_hits(*self.grid.query(
+                np.array([(bullet.pos.x, bullet.pos.y) for bullet in self.bullets]),
+                np.array([bullet.radius for bullet in self.bullets], dtype=np.float64),
+            ))
+        return hits
+
+    def collide_bullets(self):
+        # Check bullet-asteroid collisions
+        hits = self.bullet_hits()
+        if not hits:
+            return
+
+        hit_bullets = {b for b, _ in hits}
+        hit_asteroids = {a for _, a in hits}
+        destroyed = [self.asteroids[a] for _, a in hits]
+        self.bullets = [bullet for i, bullet in enumerate(self.bullets) if i not in hit_bullets]
+        self.asteroids = [asteroid for i, asteroid in enumerate(self.asteroids) if i not in hit_asteroids]
+
+        for asteroid in destroyed:
+            self.effects.asteroid_destroyed(asteroid.pos.x, asteroid.pos.y, asteroid.size)
+
+            # Split asteroid
+            self.asteroids.extend(asteroid.split(self.rng))
+
+            # Increase score
+            self.score += (4 - asteroid.size) * 20
+
+    def collide_ship(self):
+        # Check ship-asteroid collisions
+        for asteroid in self.asteroids:
+            if check_collision(self.ship, asteroid, self.width, self.height):
+                self.ship_hit()
+                break
+
+    def state_digest(self):
+        """CRC32 over ship, bullets, asteroids, score and lives, for checking replays"""
+        values = [self.ship.pos.x, self.ship.pos.y, self.ship.velocity.x, self.ship.velocity.y, self.ship.angle]
+        for bullet in self.bullets:
+            values.extend((bullet.pos.x, bullet.pos.y, bullet.lifetime))
+        for asteroid in self.asteroids:
+            values.extend((asteroid.pos.x, asteroid.pos.y, asteroid.rotation, asteroid.size))
+        digest = zlib.crc32(struct.pack(f"<{len(values)}d", *values))
+        return zlib.crc32(struct.pack("<qq", self.score, self.lives), digest)
+
+    def ship_hit(self):
+        """Lose a life and either end the game or reset the ship"""
+        if self.invulnerable:
+            return
+        self.effects.ship_destroyed(self.ship.pos.x, self.ship.pos.y)
+        self.lives -= 1
+        if self.lives <= 0:
+            self.game_over = True
+        else:
+            # Reset ship position
+            self.ship.pos.set(self.width // 2, self.height // 2)
+            self.ship.velocity.set(0, 0)
+
+def scripted_input(tick):
+    """Deterministic input pattern for headless runs: circle the aim, pulse thrust, fire steadily"""
+    angle = math.radians(tick * 3)
+    aim = (SCREEN_WIDTH // 2 + math.cos(angle) * 200, SCREEN_HEIGHT // 2 + math.sin(angle) * 200)
+    return InputState(aim=aim, thrust=(tick // 30) % 2 == 0, shoot=tick % 10 == 0)
+
+def run_headless(ticks, input_fn=scripted_input, simulation_factory=Simulation):
+    """Step a fresh simulation for a number of ticks and return (simulation, ticks per second)"""
+    sim = simulation_factory()
+    start = time.perf_counter()
+    for tick in range(ticks):
+        if sim.game_over:
+            sim = simulation_factory()
+        sim.step(input_fn(tick))
+    elapsed = time.perf_counter() - start
+    return sim, ticks / elapsed if elapsed > 0 else float("inf")
+
+# Measure simulation throughput without a display
+if __name__ == "__main__":
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    sim, rate = run_headless(ticks)
+    print(f"{ticks} ticks at {rate:,.0f} ticks/s (score {sim.score}, lives {sim.lives})")
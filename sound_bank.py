@@ -0,0 +1,92 @@
+import pygame
+import numpy as np
+import hashlib
+import os
+from collections import namedtuple
+
+# A synthesized sound: an oscillator shaped by an exponential decay envelope
+Tone = namedtuple("Tone", "waveform frequency amplitude decay duration sample_rate seed")
+Tone.__new__.__defaults__ = (0.1, 22050, 0)
+
+THRUST_TONE = Tone("sine", 80, 4096, 5)      # Low frequency rumble
+BULLET_TONE = Tone("sine", 1200, 3000, 15)   # Sharp attack, quick decay
+
+def time_axis(duration, sample_rate):
+    """Sample times in seconds"""
+    return np.arange(int(duration * sample_rate)) / sample_rate
+
+def oscillator(waveform, frequency, t, rng=None):
+    """Unit-amplitude waveform sampled at times t"""
+    phase = frequency * t
+    if waveform == "sine":
+        return np.sin(2 * np.pi * phase)
+    if waveform == "square":
+        return np.where(phase % 1 < 0.5, 1.0, -1.0)
+    if waveform == "saw":
+        return 2 * (phase % 1) - 1
+    if waveform == "noise":
+        return rng.uniform(-1, 1, len(t))
+    raise ValueError(f"Unknown waveform: {waveform}")
+
+def envelope(decay, t):
+    """Exponential decay envelope"""
+    return np.exp(-t * decay)
+
+def synthesize(tone):
+    """Render a tone to a stereo int16 buffer"""
+    t = time_axis(tone.duration, tone.sample_rate)
+    rng = np.random.default_rng(tone.seed)
+    wave = tone.amplitude * oscillator(tone.waveform, tone.frequency, t, rng) * envelope(tone.decay, t)
+    # astype truncates towards zero, like int() did per sample
+    mono = wave.astype(np.int16)
+    return np.column_stack((mono, mono))
+
+class SoundBank:
+    """Memoizes synthesized buffers and pygame Sounds by tone, optionally persisting buffers to disk"""
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.buffers = {}
+        self.sounds = {}
+
+    def cache_path(self, tone):
+        key = hashlib.sha1(repr(tuple(tone)).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{tone.waveform}-{key}.npy")
+
+    def buffer(self, tone):
+        """Rendered samples for a tone, from memory, the disk cache or fresh synthesis"""
+        if tone in self.buffers:
+            return self.buffers[tone]
+
+        arr = None
+        if self.cache_dir:
+            path = self.cache_path(tone)
+            try:
+                arr = np.load(path)
+            except (OSError, ValueError):
+                arr = None  # Missing or unreadable: synthesize again
+
+        if arr is None:
+            arr = synthesize(tone)
+            if self.cache_dir:
+                self.store(tone, arr)
+
+        self.buffers[tone] = arr
+        return arr
+
+    def store(self, tone, arr):
+        """Write a buffer to the disk cache atomically; failures only cost a resynthesis next time"""
+        path = self.cache_path(tone)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, arr)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write sound cache {path}: {e}")
+
+    def sound(self, tone):
+        """pygame Sound for a tone, created once per bank"""
+        if tone not in self.sounds:
+            self.sounds[tone] = pygame.sndarray.make_sound(self.buffer(tone))
+        return self.sounds[tone]
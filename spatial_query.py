@@ -0,0 +1,219 @@
+"""Batched spatial queries over the live asteroids, for bots and assists
+
+AsteroidQuery takes one snapshot of the asteroids' positions, velocities and
+radii as arrays (straight from an AsteroidStore, or gathered once from
+Asteroid objects) and answers every query against it with whole-array
+operations, measuring distances the short way around the wrapping edges:
+
+- nearest(points, k): the k nearest asteroids to each point
+- within(points, radius): every asteroid whose outline comes within radius of each point
+- approach(pos, velocity, radius): per asteroid, when it would first touch a
+  body moving in a straight line, and when and how close it passes
+
+Autopilot is a reference bot built on them, usable as a batch policy or with
+asteroids_game.py --autopilot:
+
+    python spatial_query.py [ticks]
+"""
+import math
+import sys
+import time
+import numpy as np
+
+from collision import wrapped_delta
+from entity_store import AsteroidStore
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, InputState, Simulation
+
+HORIZON = 120        # Ticks ahead that approach() looks for impacts
+BULLET_SPEED = 10
+BULLET_LIFETIME = 60
+
+class AsteroidQuery:
+    """The asteroids of one tick as arrays, with batched queries over them"""
+    def __init__(self, pos, velocity, radius, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.pos = pos
+        self.velocity = velocity
+        self.radius = radius
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_simulation(cls, sim):
+        asteroids = sim.asteroids
+        if isinstance(asteroids, AsteroidStore):
+            # Array store: views of the live rows, no copying
+            n = asteroids.count
+            return cls(asteroids.pos[:n], asteroids.velocity[:n], asteroids.radius[:n], sim.width, sim.height)
+        rows = np.array([(a.pos.x, a.pos.y, a.velocity.x, a.velocity.y, a.radius) for a in asteroids], dtype=np.float64)
+        rows = rows.reshape(-1, 5)
+        return cls(rows[:, :2], rows[:, 2:4], rows[:, 4], sim.width, sim.height)
+
+    def __len__(self):
+        return len(self.radius)
+
+    def offsets(self, points):
+        """(M, N, 2) shortest offsets from each of M points to each asteroid"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        return wrapped_delta(self.pos[None], points[:, None], self.width, self.height)
+
+    def nearest(self, points, k=1):
+        """(indices, distances), each (M, k): the k nearest asteroid centres to each point, nearest first"""
+        offsets = self.offsets(points)
+        distances = np.hypot(offsets[..., 0], offsets[..., 1])
+        k = min(k, len(self))
+        if k < len(self):
+            # Partial sort: only the k smallest are ordered
+            candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(len(self)), distances.shape)
+        nearest = np.take_along_axis(distances, candidates, 1)
+        order = np.argsort(nearest, axis=1)
+        return np.take_along_axis(candidates, order, 1), np.take_along_axis(nearest, order, 1)
+
+    def within(self, points, radius):
+        """For each point, the indices of asteroids whose outline comes within radius of it, nearest first"""
+        offsets = self.offsets(points)
+        gaps = np.hypot(offsets[..., 0], offsets[..., 1]) - self.radius
+        rows, cols = np.nonzero(gaps <= radius)
+        order = np.lexsort((gaps[rows, cols], rows))
+        rows, cols = rows[order], cols[order]
+        return np.split(cols, np.searchsorted(rows, np.arange(1, len(gaps))))
+
+    def approach(self, pos, velocity, radius=0.0, horizon=HORIZON):
+        """Per asteroid against a body moving in a straight line: (impact tick, closest tick, closest distance)
+
+        Distances are between outlines; impact is inf when the two don't touch within
+        horizon ticks. Long relative paths are checked in legs short enough that no
+        other copy of the playfield can come near during one, each leg against the
+        copy nearest where it starts, so impacts are exact however far the path wraps
+        and closest passes are exact within a quarter of the playfield.
+        """
+        d = wrapped_delta(self.pos, np.asarray(pos, dtype=np.float64), self.width, self.height)
+        v = self.velocity - np.asarray(velocity, dtype=np.float64)
+        reach = self.radius + radius
+        impact, closest_t, closest_d = relative_approach(d[:, 0], d[:, 1], v[:, 0], v[:, 1], reach, horizon)
+
+        leg_length = min(self.width, self.height) / 4
+        travel = np.hypot(v[:, 0], v[:, 1]) * horizon + reach
+        far = np.flatnonzero(travel >= leg_length)
+        if len(far):
+            legs = math.ceil(travel[far].max() / leg_length)
+            duration = horizon / legs
+            starts = np.arange(legs) * duration
+            vx, vy = v[far, 0, None], v[far, 1, None]
+            dx = (d[far, 0, None] + vx * starts + self.width / 2) % self.width - self.width / 2
+            dy = (d[far, 1, None] + vy * starts + self.height / 2) % self.height - self.height / 2
+            leg_impact, leg_closest_t, leg_closest_d = relative_approach(dx, dy, vx, vy, reach[far, None], duration)
+            leg = np.argmin(leg_closest_d, axis=1)
+            rows = np.arange(len(far))
+            impact[far] = (leg_impact + starts).min(axis=1)
+            closest_t[far] = leg_closest_t[rows, leg] + starts[leg]
+            closest_d[far] = leg_closest_d[rows, leg]
+        return impact, closest_t, closest_d
+
+def relative_approach(dx, dy, vx, vy, reach, horizon):
+    """Element-wise (impact tick, closest tick, closest outline distance) for offsets d moving at v"""
+    a = vx * vx + vy * vy
+    b = dx * vx + dy * vy
+    c = dx * dx + dy * dy
+    moving = a > 1e-12
+    safe_a = np.where(moving, a, 1.0)
+    closest_t = np.where(moving, np.clip(-b / safe_a, 0, horizon), 0.0)
+    closest_d = np.hypot(dx + vx * closest_t, dy + vy * closest_t) - reach
+
+    # First root of |d + v t| = reach, while closing in
+    reach_squared = reach * reach
+    discriminant = b * b - a * (c - reach_squared)
+    root = (-b - np.sqrt(np.maximum(discriminant, 0))) / safe_a
+    impact = np.where((discriminant >= 0) & (b < 0) & moving & (root <= horizon), np.maximum(root, 0), np.inf)
+    impact = np.where(c <= reach_squared, 0.0, impact)
+    return impact, closest_t, closest_d
+
+def intercept_time(offset, velocity, speed):
+    """Ticks until a shot at speed from the origin meets a target at offset moving at velocity, or None"""
+    a = velocity @ velocity - speed * speed
+    b = 2 * offset @ velocity
+    c = offset @ offset
+    if abs(a) < 1e-9:
+        return -c / b if b < 0 else None
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return None
+    roots = [t for t in ((-b - math.sqrt(discriminant)) / (2 * a), (-b + math.sqrt(discriminant)) / (2 * a)) if t > 0]
+    return min(roots) if roots else None
+
+class Autopilot:
+    """Reference bot: dodges the most imminent impact, otherwise leads and shoots the nearest asteroid"""
+    def __init__(self, fire_every=8, danger_ticks=40, candidates=4):
+        self.fire_every = fire_every
+        self.danger_ticks = danger_ticks
+        self.candidates = candidates  # Nearest asteroids considered as targets
+        self.query_seconds = 0.0
+        self.calls = 0
+
+    def __call__(self, sim, tick):
+        start = time.perf_counter()
+        try:
+            return self.decide(sim, tick)
+        finally:
+            self.query_seconds += time.perf_counter() - start
+            self.calls += 1
+
+    def decide(self, sim, tick):
+        ship = sim.ship
+        here = np.array([ship.pos.x, ship.pos.y])
+        query = AsteroidQuery.from_simulation(sim)
+        if not len(query):
+            return InputState(aim=(ship.pos.x + math.cos(math.radians(ship.angle)), ship.pos.y + math.sin(math.radians(ship.angle))))
+
+        impact, _, _ = query.approach(here, (ship.velocity.x, ship.velocity.y), ship.radius, self.danger_ticks)
+        threat = int(np.argmin(impact))
+        if np.isfinite(impact[threat]):
+            # Thrust across the threat's path, on the side away from it
+            offset = query.offsets(here)[0, threat]
+            relative = query.velocity[threat] - (ship.velocity.x, ship.velocity.y)
+            across = np.array([-relative[1], relative[0]])
+            if not across.any():
+                across = -offset
+            if across @ offset > 0:
+                across = -across
+            aim = here + across / (np.hypot(*across) or 1.0) * 100
+            return InputState(aim=tuple(aim.tolist()), thrust=True, shoot=tick % self.fire_every == 0)
+
+        # Lead the nearest asteroid a bullet can reach
+        indices, _ = query.nearest(here, self.candidates)
+        offsets = query.offsets(here)[0]
+        aim = None
+        for i in indices[0].tolist():
+            t = intercept_time(offsets[i], query.velocity[i], BULLET_SPEED)
+            if t is not None and t < BULLET_LIFETIME:
+                aim = here + offsets[i] + query.velocity[i] * t
+                break
+        if aim is None:
+            aim = here + offsets[indices[0, 0]]
+        target_angle = math.degrees(math.atan2(aim[1] - here[1], aim[0] - here[0]))
+        aligned = abs((target_angle - ship.angle + 180) % 360 - 180) < 8
+        return InputState(aim=tuple(aim.tolist()), shoot=aligned and tick % self.fire_every == 0)
+
+if __name__ == "__main__":
+    # Query cost against asteroid count, then the autopilot playing a seeded game
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 3600
+    rng = np.random.default_rng(1)
+    ship_pos = np.array([SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2])
+    for n in (10, 100, 1000, 10000):
+        query = AsteroidQuery(
+            rng.uniform(0, (SCREEN_WIDTH, SCREEN_HEIGHT), (n, 2)), rng.uniform(-3, 3, (n, 2)), rng.choice([10.0, 20.0, 30.0], n))
+        timings = []
+        for call in (lambda: query.nearest(ship_pos, 5), lambda: query.within(ship_pos, 150), lambda: query.approach(ship_pos, (2, 0), 10)):
+            start = time.perf_counter()
+            for _ in range(100):
+                call()
+            timings.append((time.perf_counter() - start) * 10)
+        print(f"{n:>6} asteroids: nearest {timings[0]:.3f} ms, within {timings[1]:.3f} ms, approach {timings[2]:.3f} ms")
+
+    autopilot = Autopilot()
+    sim = Simulation(seed=1)
+    while not sim.game_over and sim.ticks < ticks:
+        sim.step(autopilot(sim, sim.ticks))
+    print(f"Autopilot: score {sim.score} over {sim.ticks} ticks, {sim.waves_cleared} waves cleared, "
+          f"{autopilot.query_seconds * 1000 / autopilot.calls:.3f} ms per decision")
@@ -0,0 +1,128 @@
+import math
+import os
+import random
+import sys
+import time
+import pygame
+import numpy as np
+
+from render import asteroid_arrays, draw_asteroids, draw_polygons, transform_polygons
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, Asteroid
+
+ROTATION_STEPS = 64
+ATLAS_BUDGET = 32 * 1024 * 1024  # Bytes of sprite pixels reserved across all asteroids
+
+class AtlasEntry:
+    __slots__ = ("surfaces", "outlines", "half", "step_bytes", "bytes")
+
+    def __init__(self, outlines, half):
+        self.outlines = outlines  # Outline points at every rotation step, centred in the sprite
+        self.surfaces = [None] * len(outlines)  # Rasterized on first use
+        self.half = half
+        side = 2 * half + 1
+        self.step_bytes = side * side * 4  # 32-bit pixels; the RLE copy is smaller
+        self.bytes = 0
+
+class AsteroidAtlas:
+    """Asteroid outlines pre-rendered at fixed rotation steps, drawn as blits
+
+    Each asteroid gets an entry keyed by a stable identity (the Asteroid itself,
+    or its serial in an AsteroidStore) the first time it is drawn, holding its
+    outline at every rotation step. A step is rasterized the first time the
+    asteroid turns to it, into an RLE colour-keyed surface that blits faster
+    than the polygon can be drawn. Entries for asteroids that are gone are
+    evicted on the next draw. When baking a step would go over the byte
+    budget, the asteroid is drawn as a polygon instead.
+    """
+    def __init__(self, steps=ROTATION_STEPS, budget=ATLAS_BUDGET, colour=WHITE, width=2):
+        self.steps = steps
+        self.budget = budget
+        self.colour = colour
+        self.width = width
+        self.entries = {}
+        self.bytes = 0
+        self.baked = 0
+        self.evicted = 0
+        self.fallbacks = 0  # Asteroids drawn as polygons in the last frame
+        angles = np.radians(np.arange(steps) * (360 / steps))
+        self.cos = np.cos(angles)[:, None]
+        self.sin = np.sin(angles)[:, None]
+
+    def add(self, key, points):
+        points = np.asarray(points, dtype=np.float64)
+        # Odd side length so the asteroid centre falls on a pixel
+        half = math.ceil(float(np.hypot(points[:, 0], points[:, 1]).max())) + self.width
+        # Every rotation at once; cheaper written out than through transform_polygons for one outline
+        x, y = points[:, 0], points[:, 1]
+        outlines = np.stack((self.cos * x - self.sin * y, self.sin * x + self.cos * y), -1) + half
+        entry = self.entries[key] = AtlasEntry(outlines, half)
+        return entry
+
+    def bake(self, entry, step):
+        """Rasterize one rotation step, or return None when it doesn't fit the budget"""
+        if self.bytes + entry.step_bytes > self.budget:
+            return None
+        side = 2 * entry.half + 1
+        surface = pygame.Surface((side, side)).convert()
+        pygame.draw.polygon(surface, self.colour, entry.outlines[step].tolist(), self.width)
+        surface.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        entry.surfaces[step] = surface
+        entry.bytes += entry.step_bytes
+        self.bytes += entry.step_bytes
+        self.baked += 1
+        return surface
+
+    def evict_missing(self, keys):
+        live = set(keys)
+        for key in [key for key in self.entries if key not in live]:
+            self.bytes -= self.entries.pop(key).bytes
+            self.evicted += 1
+
+    def draw(self, screen, keys, points, rotation, pos):
+        """Blit every asteroid's nearest rotation step; returns the rects drawn"""
+        if len(self.entries) > len(keys):
+            self.evict_missing(keys)
+
+        steps = (np.rint(rotation * (self.steps / 360)).astype(np.int64) % self.steps).tolist()
+        blits = []
+        fallback = []
+        for i, (key, step, (x, y)) in enumerate(zip(keys, steps, pos.tolist())):
+            entry = self.entries.get(key) or self.add(key, points[i])
+            surface = entry.surfaces[step] or self.bake(entry, step)
+            if surface is None:
+                fallback.append(i)
+            else:
+                blits.append((surface, (int(x) - entry.half, int(y) - entry.half)))
+
+        rects = screen.blits(blits)
+        self.fallbacks = len(fallback)
+        if fallback:
+            outlines = transform_polygons(np.asarray(points, dtype=np.float64)[fallback], rotation[fallback], pos[fallback])
+            rects.extend(draw_polygons(screen, self.colour, outlines, self.width))
+        return rects
+
+def time_draws(draw, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        draw()
+    return (time.perf_counter() - start) * 1000 / frames
+
+if __name__ == "__main__":
+    # Per-frame asteroid draw cost, atlas against polygons, for a static field of asteroids
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    frames = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    rng = random.Random(1)
+    asteroids = [Asteroid(rng.uniform(0, SCREEN_WIDTH), rng.uniform(0, SCREEN_HEIGHT), rng.randint(1, 3), rng) for _ in range(count)]
+    for asteroid in asteroids:
+        asteroid.rotation = rng.uniform(0, 360)
+
+    polygons = time_draws(lambda: draw_asteroids(screen, WHITE, asteroids), frames)
+    cold = time_draws(lambda: AsteroidAtlas().draw(screen, asteroids, *asteroid_arrays(asteroids)), 5)
+    atlas = AsteroidAtlas()
+    draw_asteroids(screen, WHITE, asteroids, atlas=atlas)
+    warm = time_draws(lambda: draw_asteroids(screen, WHITE, asteroids, atlas=atlas), frames)
+    print(f"{count} asteroids: polygons {polygons:.3f} ms, atlas {warm:.3f} ms warm, {cold:.3f} ms baking every sprite "
+          f"({atlas.bytes / 1024:.0f} KiB, {atlas.fallbacks} drawn as polygons)")
@@ -0,0 +1,265 @@
+"""Per-tick state streams and an offline parallel renderer for them
+
+A stream is a header followed by one frame per simulation tick: HUD values,
+the ship, then every bullet and asteroid as float32 rows. Frames are
+self-contained, so any range of them can be drawn without the ones before.
+Rendering loads each frame into the array stores and draws it with the same
+Ship, BulletStore, AsteroidStore and Hud draw methods the game uses, onto an
+offscreen surface, with frame ranges split across worker processes:
+
+    python state_stream.py record session.bin session.stream   # from an input log
+    python state_stream.py render session.stream frames/ [--format png|raw] [--workers N] [--first F] [--last L]
+
+PNG output is numbered frame_000000.png onwards. Raw output is a single
+frames.rgb of packed 24-bit frames, e.g. for
+ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -r 60 -i frames.rgb clip.mp4
+"""
+import os
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import multiprocessing
+import struct
+import time
+import pygame
+import numpy as np
+
+from entity_store import ASTEROID_POINTS, AsteroidStore, BulletStore
+from hud import Fonts, Hud, TextCache
+from replay import make_simulation, read_log
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, BLACK, FPS, Ship
+
+MAGIC = b"ASTS"
+VERSION = 1
+HEADER = struct.Struct("<4sBHHB")   # magic, version, width, height, ticks per second
+FRAME = struct.Struct("<IqqqBHH")   # tick, score, lives, high score, flags, bullet count, asteroid count
+SHIP = struct.Struct("<6f")         # x, y, vx, vy, angle, previous angle
+BULLET_COLUMNS = 4                  # x, y, vx, vy
+ASTEROID_COLUMNS = 6 + 2 * ASTEROID_POINTS  # x, y, vx, vy, rotation, rotation speed, outline points
+
+# Frame flags
+GAME_OVER = 1
+
+def entity_rows(sim):
+    """(bullets, asteroids) float32 row arrays from either list-based or store-based simulations"""
+    bullets, asteroids = sim.bullets, sim.asteroids
+    if isinstance(bullets, BulletStore):
+        n = bullets.count
+        bullet_rows = np.hstack((bullets.pos[:n], bullets.velocity[:n]))
+    else:
+        bullet_rows = np.array([(b.pos.x, b.pos.y, b.velocity.x, b.velocity.y) for b in bullets]).reshape(-1, BULLET_COLUMNS)
+    if isinstance(asteroids, AsteroidStore):
+        n = asteroids.count
+        asteroid_rows = np.hstack((
+            asteroids.pos[:n], asteroids.velocity[:n], asteroids.rotation[:n, None],
+            asteroids.rotation_speed[:n, None], asteroids.points[:n].reshape(n, -1),
+        ))
+    else:
+        asteroid_rows = np.array([
+            (a.pos.x, a.pos.y, a.velocity.x, a.velocity.y, a.rotation, a.rotation_speed, *np.ravel(a.points))
+            for a in asteroids
+        ]).reshape(-1, ASTEROID_COLUMNS)
+    return bullet_rows.astype(np.float32), asteroid_rows.astype(np.float32)
+
+class StateStreamWriter:
+    """Appends one frame per tick of a simulation to a state stream file"""
+    def __init__(self, path, sim):
+        # Frames hold playfield coordinates and are drawn as screen coordinates, so only a one-screen playfield fits
+        if (sim.width, sim.height) != (SCREEN_WIDTH, SCREEN_HEIGHT):
+            raise ValueError(f"a {sim.width}x{sim.height} playfield can't be streamed, only {SCREEN_WIDTH}x{SCREEN_HEIGHT}")
+        self.path = path
+        self.frames = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, SCREEN_WIDTH, SCREEN_HEIGHT, FPS))
+
+    def write(self, sim, high_score=0):
+        bullets, asteroids = entity_rows(sim)
+        ship = sim.ship
+        flags = GAME_OVER if sim.game_over else 0
+        self.file.write(FRAME.pack(sim.ticks, sim.score, sim.lives, high_score, flags, len(bullets), len(asteroids)))
+        self.file.write(SHIP.pack(ship.pos.x, ship.pos.y, ship.velocity.x, ship.velocity.y, ship.angle, ship.previous_angle))
+        self.file.write(bullets.tobytes())
+        self.file.write(asteroids.tobytes())
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+def frame_size(bullets, asteroids):
+    return FRAME.size + SHIP.size + (bullets * BULLET_COLUMNS + asteroids * ASTEROID_COLUMNS) * 4
+
+def index_stream(path):
+    """Byte offset where each whole frame starts, plus where the last one ends, read from the frame headers alone"""
+    offsets = []
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size or HEADER.unpack(header)[:2] != (MAGIC, VERSION):
+            raise ValueError(f"{path} is not a version {VERSION} state stream")
+        end = os.fstat(f.fileno()).st_size
+        offset = HEADER.size
+        # A stream cut short (crash, kill) still renders up to its last whole frame
+        while offset + FRAME.size <= end:
+            f.seek(offset)
+            *_, bullets, asteroids = FRAME.unpack(f.read(FRAME.size))
+            size = frame_size(bullets, asteroids)
+            if offset + size > end:
+                break
+            offsets.append(offset)
+            offset += size
+    offsets.append(offset)
+    return offsets
+
+class Frame:
+    """One decoded frame, held in the game's own entity types so their draw methods can be used"""
+    def __init__(self):
+        self.ship = Ship(0, 0)
+        self.bullets = BulletStore()
+        self.asteroids = AsteroidStore()
+        self.tick = self.score = self.lives = self.high_score = self.flags = 0
+
+    def load(self, data, offset=0):
+        self.tick, self.score, self.lives, self.high_score, self.flags, bullets, asteroids = FRAME.unpack_from(data, offset)
+        offset += FRAME.size
+        x, y, vx, vy, angle, previous_angle = SHIP.unpack_from(data, offset)
+        offset += SHIP.size
+        self.ship.pos.set(x, y)
+        self.ship.velocity.set(vx, vy)
+        self.ship.angle, self.ship.previous_angle = angle, previous_angle
+
+        rows = np.frombuffer(data, np.float32, bullets * BULLET_COLUMNS, offset).reshape(bullets, BULLET_COLUMNS)
+        offset += rows.nbytes
+        store = self.bullets
+        store.reserve(bullets)
+        store.count = bullets
+        store.pos[:bullets] = rows[:, :2]
+        store.velocity[:bullets] = rows[:, 2:]
+
+        rows = np.frombuffer(data, np.float32, asteroids * ASTEROID_COLUMNS, offset).reshape(asteroids, ASTEROID_COLUMNS)
+        store = self.asteroids
+        store.reserve(asteroids)
+        store.count = asteroids
+        store.pos[:asteroids] = rows[:, :2]
+        store.velocity[:asteroids] = rows[:, 2:4]
+        store.rotation[:asteroids] = rows[:, 4]
+        store.rotation_speed[:asteroids] = rows[:, 5]
+        store.points[:asteroids] = rows[:, 6:].reshape(asteroids, ASTEROID_POINTS, 2)
+
+class FrameRenderer:
+    """Draws frames onto an offscreen surface the way Game.draw shows them"""
+    def __init__(self):
+        if not pygame.font.get_init():
+            pygame.font.init()
+        self.surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.fonts = Fonts()
+        self.text = TextCache()
+        self.hud = Hud(self.text, self.fonts)
+        self.overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.overlay.set_alpha(128)
+        self.overlay.fill(BLACK)
+
+    def draw(self, frame):
+        screen = self.surface
+        screen.fill(BLACK)
+        frame.ship.draw(screen)
+        frame.bullets.draw(screen)
+        frame.asteroids.draw(screen)
+        if frame.flags & GAME_OVER:
+            screen.blit(self.overlay, (0, 0))
+            for font, text, y in ((self.fonts.large_font, "GAME OVER", SCREEN_HEIGHT // 2 - 100),
+                                  (self.fonts.font, f"Final Score: {frame.score}", SCREEN_HEIGHT // 2 - 20)):
+                line = self.text.render(font, text)
+                screen.blit(line, (SCREEN_WIDTH // 2 - line.get_width() // 2, y))
+        else:
+            self.hud.draw_status(screen, frame.score, frame.lives, frame.high_score)
+        return screen
+
+def render_range(job):
+    """Render the frames starting at the given offsets, numbered from first; runs inside a worker process"""
+    path, offsets, end, first, out_dir, raw = job
+    renderer = FrameRenderer()
+    frame = Frame()
+    frame_bytes = SCREEN_WIDTH * SCREEN_HEIGHT * 3
+    # The whole range in one read; frames are decoded straight out of it
+    with open(path, "rb") as f:
+        f.seek(offsets[0])
+        data = f.read(end - offsets[0])
+    out = open(os.path.join(out_dir, "frames.rgb"), "r+b") if raw else None
+    try:
+        for i, offset in enumerate(offsets):
+            frame.load(data, offset - offsets[0])
+            surface = renderer.draw(frame)
+            if raw:
+                out.seek((first + i) * frame_bytes)
+                out.write(pygame.image.tobytes(surface, "RGB"))
+            else:
+                pygame.image.save(surface, os.path.join(out_dir, f"frame_{first + i:06d}.png"))
+    finally:
+        if out is not None:
+            out.close()
+    return len(offsets)
+
+def render_stream(path, out_dir, first=0, last=None, raw=False, workers=None):
+    """Render frames [first, last) across a process pool; returns (frames, wall seconds)"""
+    bounds = index_stream(path)
+    frames = len(bounds) - 1
+    first = max(0, min(first, frames))
+    last = frames if last is None else max(first, min(last, frames))
+    if first == last:
+        return 0, 0.0
+    os.makedirs(out_dir, exist_ok=True)
+    if raw:
+        # Sized up front so each worker writes its frames in place
+        with open(os.path.join(out_dir, "frames.rgb"), "wb") as f:
+            f.truncate((last - first) * SCREEN_WIDTH * SCREEN_HEIGHT * 3)
+    workers = workers or os.cpu_count() or 1
+    # Several chunks per worker even out ranges that cost more (busy waves, game over text)
+    chunk = max(1, -(-(last - first) // (workers * 4)))
+    jobs = [
+        (path, bounds[start:min(start + chunk, last)], bounds[min(start + chunk, last)], start - first, out_dir, raw)
+        for start in range(first, last, chunk)
+    ]
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        rendered = sum(pool.imap_unordered(render_range, jobs))
+    return rendered, time.perf_counter() - start
+
+def record_log(log_path, stream_path):
+    """Replay an input log headlessly, writing every tick to a state stream"""
+    log = read_log(log_path)
+    sim = make_simulation(log.kind, log.seed, log.initial_asteroids)
+    writer = StateStreamWriter(stream_path, sim)
+    for tick_input in log.inputs():
+        sim.step(tick_input)
+        writer.write(sim)
+    writer.close()
+    return writer.frames
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="turn an input log into a state stream")
+    record_parser.add_argument("log")
+    record_parser.add_argument("stream")
+    render_parser = commands.add_parser("render", help="render a state stream to image files")
+    render_parser.add_argument("stream")
+    render_parser.add_argument("out_dir")
+    render_parser.add_argument("--format", choices=("png", "raw"), default="png")
+    render_parser.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    render_parser.add_argument("--first", type=int, default=0, help="First frame to render")
+    render_parser.add_argument("--last", type=int, help="Render up to, not including, this frame")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        try:
+            frames = record_log(args.log, args.stream)
+        except ValueError as e:
+            parser.error(f"{args.log}: {e}")
+        print(f"Wrote {frames} frames to {args.stream}")
+    else:
+        frames, seconds = render_stream(args.stream, args.out_dir, args.first, args.last, args.format == "raw", args.workers)
+        rate = frames / seconds if seconds > 0 else float("inf")
+        print(f"Rendered {frames} frames in {seconds:.2f} s: {rate:,.0f} frames/s, {rate / FPS:.1f}x real time")
+
+if __name__ == "__main__":
+    main()
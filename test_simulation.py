@@ -0,0 +1,104 @@
+import gc
+import math
+import os
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import simulation
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, Vector2D, Ship, Bullet, Asteroid, Simulation, scripted_input
+
+TICK_ALLOCATION_BUDGET = 32  # Bytes a tick may leave allocated in simulation.py, on average: less than one vector
+
+
+def tick_allocations(ticks=300, warmup=60, seed=1):
+    """Average bytes a tick leaves allocated in simulation.py, from tracemalloc snapshots around each tick
+
+    The entities' vectors are held across the tick, so a vector replaced by a
+    new one shows up as growth instead of handing its memory straight back.
+    A full collection after each tick empties the interpreter's free lists, so
+    objects parked there aren't counted. Ticks that add or remove entities are
+    skipped.
+    """
+    sim = Simulation(seed=seed)
+    # Inputs are built up front so only the simulation itself is measured
+    inputs = [scripted_input(tick) for tick in range(warmup + ticks)]
+    only_simulation = [tracemalloc.Filter(True, simulation.__file__)]
+    grown = []
+    held = []  # Last tick's vectors
+    # Objects that already exist are left out of the collections, which keeps them quick
+    gc.freeze()
+    tracemalloc.start()
+    try:
+        for tick in range(warmup + ticks):
+            if sim.game_over:
+                break
+            entities = [sim.ship, *sim.bullets, *sim.asteroids]
+            held[:] = [(entity.pos, entity.velocity) for entity in entities]
+            before = tracemalloc.take_snapshot().filter_traces(only_simulation)
+            sim.step(inputs[tick])
+            gc.collect()
+            after = tracemalloc.take_snapshot().filter_traces(only_simulation)
+            if tick >= warmup and [sim.ship, *sim.bullets, *sim.asteroids] == entities:
+                grown.append(sum(stat.size_diff for stat in after.compare_to(before, "filename")))
+    finally:
+        tracemalloc.stop()
+        gc.unfreeze()
+    return sum(grown) / len(grown)
+
+
+# The entity updates as they were before Vector2D gained in-place operators: every step builds new vectors
+def allocating_ship_update(self, inputs):
+    self.previous_angle = self.angle
+    dx = inputs.aim[0] - self.pos.x
+    dy = inputs.aim[1] - self.pos.y
+    target_angle = math.degrees(math.atan2(dy, dx))
+    angle_diff = target_angle - self.angle
+    while angle_diff > 180:
+        angle_diff -= 360
+    while angle_diff < -180:
+        angle_diff += 360
+    rotation_speed = 8
+    if abs(angle_diff) > rotation_speed:
+        self.angle += rotation_speed if angle_diff > 0 else -rotation_speed
+    else:
+        self.angle = target_angle
+    if inputs.thrust:
+        angle_rad = math.radians(self.angle)
+        self.velocity = self.velocity + Vector2D(math.cos(angle_rad) * self.thrust, math.sin(angle_rad) * self.thrust)
+    self.velocity = self.velocity * self.friction
+    if self.velocity.length() > self.max_speed:
+        self.velocity = self.velocity.normalize() * self.max_speed
+    self.pos = self.pos + self.velocity
+    self.pos.x %= SCREEN_WIDTH
+    self.pos.y %= SCREEN_HEIGHT
+
+def allocating_bullet_update(self):
+    self.pos = self.pos + self.velocity
+    self.lifetime -= 1
+    self.pos.x %= SCREEN_WIDTH
+    self.pos.y %= SCREEN_HEIGHT
+    return self.lifetime > 0
+
+def allocating_asteroid_update(self):
+    self.pos = self.pos + self.velocity
+    self.rotation += self.rotation_speed
+    self.pos.x %= SCREEN_WIDTH
+    self.pos.y %= SCREEN_HEIGHT
+
+
+def test_tick_allocation_budget():
+    assert tick_allocations() <= TICK_ALLOCATION_BUDGET
+
+
+def test_allocating_updates_exceed_budget(monkeypatch):
+    monkeypatch.setattr(Ship, "update", allocating_ship_update)
+    monkeypatch.setattr(Bullet, "update", allocating_bullet_update)
+    monkeypatch.setattr(Asteroid, "update", allocating_asteroid_update)
+    assert tick_allocations() > TICK_ALLOCATION_BUDGET
+
+
+def test_one_allocating_update_exceeds_budget(monkeypatch):
+    # A single entity type slipping back to new vectors is enough to fail
+    monkeypatch.setattr(Bullet, "update", allocating_bullet_update)
+    assert tick_allocations() > TICK_ALLOCATION_BUDGET
@@ -0,0 +1,378 @@
+"""N independent Asteroids worlds stepped in lockstep from batched arrays
+
+Reproduces the rules of Ship.update, Bullet.update, Asteroid.update/split,
+the bullet and ship collision checks, the (4 - size) * 20 scoring and the
+wave respawn, with every world's state held in (N, ...) arrays so a step is a
+fixed number of NumPy calls however many worlds there are.
+
+Actions are an (N, 4) array of [aim_x, aim_y, thrust, shoot]. Worlds that are
+done ignore actions until reset() is called for them. Each world draws from
+its own counter-based random stream (SplitMix64 over the world's key and a
+running draw count), so a world's game depends only on its seed and its
+actions, not on how many worlds there are or what the others do, and every
+world's draws for a step come from one batched call.
+"""
+import sys
+import time
+import numpy as np
+
+from collision import wrapped_delta
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT
+
+SCREEN_SIZE = np.array([SCREEN_WIDTH, SCREEN_HEIGHT], dtype=np.float64)
+CENTRE = SCREEN_SIZE / 2
+
+# Ship constants, as in Ship
+SHIP_RADIUS = 10
+SHIP_THRUST = 0.3
+SHIP_MAX_SPEED = 8
+SHIP_FRICTION = 0.98
+SHIP_ROTATION_SPEED = 8
+STARTING_LIVES = 3
+
+# Bullet constants, as in Bullet
+BULLET_SPEED = 10
+BULLET_LIFETIME = 60
+BULLET_RADIUS = 2
+
+SPAWN_CLEARANCE = 100  # Asteroids never spawn closer than this to the ship
+
+# New asteroid angle, speed and rotation speed are uniform over [low, high)
+ASTEROID_LOW = np.array([0, 1, -3], dtype=np.float64)
+ASTEROID_HIGH = np.array([360, 3, 3], dtype=np.float64)
+
+# SplitMix64 constants
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX_2 = np.uint64(0x94D049BB133111EB)
+
+def wrap(pos):
+    """Wrap positions moved by less than a screen back onto it, in place"""
+    pos -= SCREEN_SIZE * (pos >= SCREEN_SIZE)
+    pos += SCREEN_SIZE * (pos < 0)
+    return pos
+
+def wrapped_offset(delta):
+    """Shortest offset across the wrapping screen edges, for offsets between on-screen points"""
+    delta -= SCREEN_SIZE * (delta > CENTRE)
+    delta += SCREEN_SIZE * (delta < -CENTRE)
+    return delta
+
+def squared_length(delta):
+    return delta[..., 0] * delta[..., 0] + delta[..., 1] * delta[..., 1]
+
+def mix64(x):
+    """SplitMix64's finaliser: scramble uint64s so nearby inputs give unrelated outputs"""
+    x = (x ^ (x >> np.uint64(30))) * MIX_1
+    x = (x ^ (x >> np.uint64(27))) * MIX_2
+    return x ^ (x >> np.uint64(31))
+
+class VecEnv:
+    def __init__(self, num_envs, max_asteroids=64, max_bullets=64):
+        n = num_envs
+        self.num_envs = n
+        self.max_asteroids = max_asteroids
+        self.max_bullets = max_bullets
+        # Random streams: a world's k-th random word is mix64(key + (k + 1) * GOLDEN_GAMMA)
+        self.keys = np.random.SeedSequence().generate_state(n, np.uint64)
+        self.draws = np.zeros(n, dtype=np.uint64)  # Words each world has used
+
+        # Ship
+        self.ship_pos = np.zeros((n, 2))
+        self.ship_vel = np.zeros((n, 2))
+        self.ship_angle = np.zeros(n)
+        self.lives = np.zeros(n, dtype=np.int64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.waves_cleared = np.zeros(n, dtype=np.int64)
+        self.done = np.ones(n, dtype=bool)
+
+        # Asteroids; serial preserves the spawn order the list-based game iterates in
+        self.ast_alive = np.zeros((n, max_asteroids), dtype=bool)
+        self.ast_pos = np.zeros((n, max_asteroids, 2))
+        self.ast_vel = np.zeros((n, max_asteroids, 2))
+        self.ast_rotation = np.zeros((n, max_asteroids))
+        self.ast_rotation_speed = np.zeros((n, max_asteroids))
+        self.ast_size = np.zeros((n, max_asteroids), dtype=np.int64)
+        self.ast_serial = np.zeros((n, max_asteroids), dtype=np.int64)
+        self.next_serial = np.zeros(n, dtype=np.int64)
+
+        # Bullets; all share one lifetime, so a lower remaining lifetime means fired earlier
+        self.bullet_alive = np.zeros((n, max_bullets), dtype=bool)
+        self.bullet_pos = np.zeros((n, max_bullets, 2))
+        self.bullet_vel = np.zeros((n, max_bullets, 2))
+        self.bullet_life = np.zeros((n, max_bullets), dtype=np.int64)
+
+    def reset(self, seeds=None, mask=None):
+        """Start fresh games in the masked worlds (all by default) and return observations
+
+        seeds, when given, holds one seed per reset world in world order; other
+        worlds, and reset worlds without seeds, carry on with their own streams.
+        """
+        if mask is None:
+            mask = np.ones(self.num_envs, dtype=bool)
+        mask = np.asarray(mask, dtype=bool)
+        if seeds is not None:
+            worlds = np.nonzero(mask)[0]
+            seeds = np.asarray(seeds, dtype=np.uint64)
+            if seeds.shape != worlds.shape:
+                raise ValueError(f"{len(worlds)} worlds to reset but {seeds.size} seeds")
+            self.keys[worlds] = mix64(seeds)
+            self.draws[worlds] = 0
+
+        self.ship_pos[mask] = CENTRE
+        self.ship_vel[mask] = 0
+        self.ship_angle[mask] = 0
+        self.lives[mask] = STARTING_LIVES
+        self.score[mask] = 0
+        self.ticks[mask] = 0
+        self.waves_cleared[mask] = 0
+        self.done[mask] = False
+        self.ast_alive[mask] = False
+        self.bullet_alive[mask] = False
+        self.next_serial[mask] = 0
+
+        self.spawn_waves(np.where(mask, 5, 0))
+        return self.observations()
+
+    def observations(self):
+        return {
+            "ship": np.column_stack((self.ship_pos, self.ship_vel, self.ship_angle)).astype(np.float32),
+            "asteroids": np.concatenate((self.ast_pos, self.ast_vel, self.ast_size[..., None]), axis=-1).astype(np.float32),
+            "asteroid_mask": self.ast_alive.copy(),
+            "bullets": self.bullet_pos.astype(np.float32),
+            "bullet_mask": self.bullet_alive.copy(),
+            "lives": self.lives.copy(),
+            "score": self.score.copy(),
+        }
+
+    def step(self, actions):
+        """Advance every live world one tick; returns (observations, rewards, dones)
+
+        rewards are the points scored this tick, dones flag worlds whose game ended this tick.
+        """
+        actions = np.asarray(actions, dtype=np.float64)
+        active = ~self.done
+        score_before = self.score.copy()
+        self.ticks[active] += 1
+
+        # Shooting happens before the ship moves, as in Game
+        self.fire(active & (actions[:, 3] > 0))
+        self.update_ships(actions, active)
+        self.update_bullets(active)
+        self.update_asteroids(active)
+        self.collide_bullets()
+        newly_done = self.collide_ships(active)
+
+        # Check if all asteroids destroyed
+        cleared = active & ~self.ast_alive.any(axis=1)
+        self.waves_cleared[cleared] += 1
+        self.spawn_waves(np.where(cleared, np.minimum(5 + self.score // 1000, 10), 0))
+
+        rewards = (self.score - score_before).astype(np.float32)
+        return self.observations(), rewards, newly_done
+
+    def fire(self, shooting):
+        free = ~self.bullet_alive
+        can_fire = shooting & free.any(axis=1)
+        worlds = np.nonzero(can_fire)[0]
+        slots = np.argmax(free[worlds], axis=1)
+        angle = np.radians(self.ship_angle[worlds])
+        self.bullet_alive[worlds, slots] = True
+        self.bullet_pos[worlds, slots] = self.ship_pos[worlds]
+        self.bullet_vel[worlds, slots] = np.column_stack((np.cos(angle), np.sin(angle))) * BULLET_SPEED
+        self.bullet_life[worlds, slots] = BULLET_LIFETIME
+
+    def update_ships(self, actions, active):
+        delta = actions[:, :2] - self.ship_pos
+        target = np.degrees(np.arctan2(delta[:, 1], delta[:, 0]))
+
+        # Normalize angle difference to [-180, 180] the way the while loops in Ship.update do
+        diff = target - self.ship_angle
+        diff = np.where(diff > 180, diff - 360 * np.ceil((diff - 180) / 360), diff)
+        diff = np.where(diff < -180, diff + 360 * np.ceil((-180 - diff) / 360), diff)
+        turned = np.where(
+            np.abs(diff) > SHIP_ROTATION_SPEED,
+            self.ship_angle + np.where(diff > 0, SHIP_ROTATION_SPEED, -SHIP_ROTATION_SPEED),
+            target,
+        )
+        self.ship_angle = np.where(active, turned, self.ship_angle)
+
+        angle = np.radians(self.ship_angle)
+        thrust = (active & (actions[:, 2] > 0))[:, None] * SHIP_THRUST
+        vel = (self.ship_vel + np.column_stack((np.cos(angle), np.sin(angle))) * thrust) * SHIP_FRICTION
+        speed = np.hypot(vel[:, 0], vel[:, 1])
+        vel *= np.where(speed > SHIP_MAX_SPEED, SHIP_MAX_SPEED / np.maximum(speed, 1e-12), 1.0)[:, None]
+        self.ship_vel = np.where(active[:, None], vel, self.ship_vel)
+        self.ship_pos = np.where(active[:, None], wrap(self.ship_pos + self.ship_vel), self.ship_pos)
+
+    # Per-entity work gathers just the live slots; most slots of a world are empty
+
+    def update_bullets(self, active):
+        worlds, slots = np.nonzero(self.bullet_alive & active[:, None])
+        self.bullet_pos[worlds, slots] = wrap(self.bullet_pos[worlds, slots] + self.bullet_vel[worlds, slots])
+        life = self.bullet_life[worlds, slots] - 1
+        self.bullet_life[worlds, slots] = life
+        self.bullet_alive[worlds, slots] = life > 0
+
+    def update_asteroids(self, active):
+        worlds, slots = np.nonzero(self.ast_alive & active[:, None])
+        self.ast_pos[worlds, slots] = wrap(self.ast_pos[worlds, slots] + self.ast_vel[worlds, slots])
+        self.ast_rotation[worlds, slots] += self.ast_rotation_speed[worlds, slots]
+
+    def collide_bullets(self):
+        """Each bullet, oldest first, destroys the first-spawned surviving asteroid it overlaps"""
+        # Pair every live bullet with every live asteroid of its own world
+        ast_worlds, ast_slots = np.nonzero(self.ast_alive)
+        counts = np.bincount(ast_worlds, minlength=self.num_envs)
+        starts = np.cumsum(counts) - counts
+        bullet_worlds, bullet_slots = np.nonzero(self.bullet_alive)
+        per_bullet = counts[bullet_worlds]
+        pair_bullet = np.repeat(np.arange(len(bullet_worlds)), per_bullet)
+        pair_ast = np.arange(len(pair_bullet)) - np.repeat(np.cumsum(per_bullet) - per_bullet, per_bullet)
+        pair_ast += starts[bullet_worlds[pair_bullet]]
+
+        worlds = bullet_worlds[pair_bullet]
+        bullets = bullet_slots[pair_bullet]
+        asteroids = ast_slots[pair_ast]
+        delta = wrapped_offset(self.bullet_pos[worlds, bullets] - self.ast_pos[worlds, asteroids])
+        reach = BULLET_RADIUS + self.ast_size[worlds, asteroids] * 10
+        hit = squared_length(delta) < reach * reach
+        if not hit.any():
+            return
+
+        # Overlapping pairs, oldest bullet first, then first-spawned asteroid, within each world
+        worlds, bullets, asteroids = worlds[hit], bullets[hit], asteroids[hit]
+        order = np.lexsort((self.ast_serial[worlds, asteroids], self.bullet_life[worlds, bullets], worlds))
+        worlds, bullets, asteroids = worlds[order], bullets[order], asteroids[order]
+
+        chosen_bullet = np.full(self.num_envs, -1)
+        chosen_ast = np.full(self.num_envs, -1)
+        destroyed_worlds = []
+        destroyed_slots = []
+        # Each round resolves the first remaining pair of every world; usually there is one round
+        while len(worlds):
+            first = np.unique(worlds, return_index=True)[1]
+            round_worlds, round_bullets, round_asts = worlds[first], bullets[first], asteroids[first]
+            self.bullet_alive[round_worlds, round_bullets] = False
+            self.ast_alive[round_worlds, round_asts] = False
+            self.score[round_worlds] += (4 - self.ast_size[round_worlds, round_asts]) * 20
+            destroyed_worlds.append(round_worlds)
+            destroyed_slots.append(round_asts)
+
+            # Drop every pair involving a bullet or asteroid that was just used up
+            chosen_bullet[round_worlds] = round_bullets
+            chosen_ast[round_worlds] = round_asts
+            keep = (bullets != chosen_bullet[worlds]) & (asteroids != chosen_ast[worlds])
+            chosen_bullet[round_worlds] = -1
+            chosen_ast[round_worlds] = -1
+            worlds, bullets, asteroids = worlds[keep], bullets[keep], asteroids[keep]
+
+        self.split(np.concatenate(destroyed_worlds), np.concatenate(destroyed_slots))
+
+    def split(self, worlds, slots):
+        """Two children per destroyed asteroid above size 1, in destruction order"""
+        sizes = self.ast_size[worlds, slots]
+        parents = sizes > 1
+        parent_worlds = worlds[parents]
+        parent_slots = slots[parents]
+        self.spawn_asteroids(
+            np.repeat(parent_worlds, 2),
+            np.repeat(self.ast_pos[parent_worlds, parent_slots], 2, axis=0),
+            np.repeat(sizes[parents] - 1, 2),
+        )
+
+    def collide_ships(self, active):
+        worlds, slots = np.nonzero(self.ast_alive & active[:, None])
+        delta = wrapped_offset(self.ast_pos[worlds, slots] - self.ship_pos[worlds])
+        reach = SHIP_RADIUS + self.ast_size[worlds, slots] * 10
+        hit = np.zeros(self.num_envs, dtype=bool)
+        hit[worlds[squared_length(delta) < reach * reach]] = True
+
+        self.lives -= hit
+        newly_done = hit & (self.lives <= 0)
+        self.done |= newly_done
+        respawn = hit & ~newly_done
+        self.ship_pos[respawn] = CENTRE
+        self.ship_vel[respawn] = 0
+        return newly_done
+
+    def spawn_waves(self, counts):
+        """Spawn counts[w] size-3 asteroids in each world, away from its ship"""
+        worlds = np.repeat(np.arange(self.num_envs), counts)
+        pos = np.empty((len(worlds), 2))
+        pending = np.arange(len(worlds))
+        while len(pending):
+            # Rejection-sample integer positions until every asteroid lands clear of its ship
+            candidates = np.floor(self.sample_per_world(worlds[pending], 2) * (SCREEN_SIZE + 1))
+            # Measured the short way across the wrapping edges, like the collision tests
+            offset = wrapped_delta(candidates, self.ship_pos[worlds[pending]], SCREEN_WIDTH, SCREEN_HEIGHT)
+            ok = np.hypot(offset[:, 0], offset[:, 1]) > SPAWN_CLEARANCE
+            pos[pending[ok]] = candidates[ok]
+            pending = pending[~ok]
+        self.spawn_asteroids(worlds, pos, np.full(len(worlds), 3))
+
+    def spawn_asteroids(self, worlds, pos, sizes):
+        """Place new asteroids into free slots, keeping their order within each world"""
+        if not len(worlds):
+            return
+        # Rank of each new asteroid within its world, then the rank-th free slot of that world
+        order = np.argsort(worlds, kind="stable")
+        worlds, pos, sizes = worlds[order], pos[order], sizes[order]
+        first = np.searchsorted(worlds, worlds)
+        rank = np.arange(len(worlds)) - first
+        free_slots = np.argsort(self.ast_alive, axis=1, kind="stable")
+        fits = rank < (~self.ast_alive).sum(axis=1)[worlds]  # Overflow beyond max_asteroids is dropped
+        worlds, pos, sizes, rank = worlds[fits], pos[fits], sizes[fits], rank[fits]
+        if not len(worlds):
+            return
+        slots = free_slots[worlds, rank]
+
+        uniform = self.sample_per_world(worlds, 3)
+        angle, speed, rotation_speed = (ASTEROID_LOW + (ASTEROID_HIGH - ASTEROID_LOW) * uniform).T
+        angle = np.radians(angle)
+        self.ast_alive[worlds, slots] = True
+        self.ast_pos[worlds, slots] = pos
+        self.ast_vel[worlds, slots] = np.column_stack((np.cos(angle), np.sin(angle))) * speed[:, None]
+        self.ast_rotation[worlds, slots] = 0
+        self.ast_rotation_speed[worlds, slots] = rotation_speed
+        self.ast_size[worlds, slots] = sizes
+        self.ast_serial[worlds, slots] = self.next_serial[worlds] + rank
+        np.add.at(self.next_serial, worlds, 1)
+
+    def sample_per_world(self, worlds, columns):
+        """(len(worlds), columns) floats uniform over [0, 1), each row from its world's stream
+
+        Rows of the same world take consecutive words in the order they appear.
+        """
+        counts = np.bincount(worlds, minlength=self.num_envs)
+        order = np.argsort(worlds, kind="stable")
+        rank = np.empty(len(worlds), dtype=np.uint64)
+        rank[order] = np.arange(len(worlds)) - (np.cumsum(counts) - counts)[worlds[order]]
+        words = (self.draws[worlds] + rank * np.uint64(columns))[:, None] + np.arange(1, columns + 1, dtype=np.uint64)
+        self.draws += counts.astype(np.uint64) * np.uint64(columns)
+        bits = mix64(self.keys[worlds][:, None] + words * GOLDEN_GAMMA)
+        return (bits >> np.uint64(11)) * 2.0 ** -53
+
+def random_actions(rng, num_envs):
+    return np.column_stack((
+        rng.uniform(0, SCREEN_WIDTH, num_envs),
+        rng.uniform(0, SCREEN_HEIGHT, num_envs),
+        rng.random(num_envs) < 0.3,
+        rng.random(num_envs) < 0.2,
+    ))
+
+if __name__ == "__main__":
+    num_envs = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    env = VecEnv(num_envs)
+    env.reset(np.arange(num_envs))
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, dones = env.step(random_actions(rng, num_envs))
+        if dones.any():
+            env.reset(mask=dones)
+    elapsed = time.perf_counter() - start
+    print(f"{steps} steps of {num_envs} worlds at {steps / elapsed:,.0f} steps/s "
+          f"({num_envs * steps / elapsed:,.0f} world-ticks/s)")
@@ -0,0 +1,246 @@
+"""A scrolling world many screens across, simulated only near the ship
+
+The world is a wrapping grid of WORLD_COLS x WORLD_ROWS chunks, CHUNK_SIZE
+pixels square. Asteroids in the chunks within ACTIVE_RADIUS of the ship's
+chunk are active: the usual Simulation code moves, collides and draws them,
+and they are all it sees in self.asteroids. The rest sit dormant in
+per-chunk buckets and cost nothing per tick. Asteroids fly straight and never
+hit each other, so a dormant asteroid is brought up to date analytically
+(position and rotation after the ticks it missed) whenever it is looked at:
+
+- when the ship brings its chunk into the active area, and
+- by a sweep that rebuckets SWEEP_CHUNKS_PER_TICK buckets a tick, visiting
+  each one every SWEEP_TICKS ticks. An asteroid therefore never strays more
+  than SWEEP_TICKS * 3 px (less than a chunk) from the bucket it is filed
+  under, and one that drifts into the active area is picked up while still
+  well off screen.
+
+The Camera keeps the ship centred and draws only what is in view, so
+per-tick cost follows what is near the ship rather than the world's
+population:
+
+    python world.py [ticks]
+"""
+import os
+import sys
+import time
+import pygame
+import numpy as np
+
+from render import asteroid_arrays, draw_polygons, ship_polygon, transform_polygons
+from simulation import (
+    SCREEN_WIDTH, SCREEN_HEIGHT, WHITE,
+    Ship, Bullet, Asteroid, Simulation, scripted_input, wrapped_distance,
+)
+
+CHUNK_SIZE = 400
+WORLD_COLS = 16
+WORLD_ROWS = 12
+WORLD_WIDTH = WORLD_COLS * CHUNK_SIZE    # 8 screens across
+WORLD_HEIGHT = WORLD_ROWS * CHUNK_SIZE   # and 8 down
+WORLD_SCREENS = (WORLD_WIDTH * WORLD_HEIGHT) // (SCREEN_WIDTH * SCREEN_HEIGHT)
+ACTIVE_RADIUS = 2  # Chunks around the ship's that are simulated: covers the view plus bullet range
+SWEEP_TICKS = 60
+SWEEP_CHUNKS_PER_TICK = -(-(WORLD_COLS * WORLD_ROWS) // SWEEP_TICKS)
+VIEW_MARGIN = 40   # Beyond the largest asteroid radius, so nothing pops in at the screen edge
+
+class WorldShip(Ship):
+    bounds = (WORLD_WIDTH, WORLD_HEIGHT)
+
+class WorldBullet(Bullet):
+    bounds = (WORLD_WIDTH, WORLD_HEIGHT)
+
+class WorldAsteroid(Asteroid):
+    bounds = (WORLD_WIDTH, WORLD_HEIGHT)
+
+def chunk_of(x, y):
+    return int(y // CHUNK_SIZE) % WORLD_ROWS * WORLD_COLS + int(x // CHUNK_SIZE) % WORLD_COLS
+
+class WorldSimulation(Simulation):
+    """Simulation over the whole world, with only the chunks around the ship active"""
+    width = WORLD_WIDTH
+    height = WORLD_HEIGHT
+    active_radius = ACTIVE_RADIUS
+    rewindable = False  # Dormant chunks aren't snapshotted
+
+    def __init__(self, initial_asteroids=5, seed=None):
+        self.chunks = [[] for _ in range(WORLD_COLS * WORLD_ROWS)]  # Dormant asteroids, filed by chunk
+        self.dormant = 0
+        self.ship_chunk = None
+        self.active_chunks = set()
+        self.next_sweep = 0
+        self.woken = 0  # Asteroids brought up to date from dormancy, for stats
+        super().__init__(initial_asteroids, seed)
+
+    def make_ship(self):
+        return WorldShip(self.width // 2, self.height // 2)
+
+    def spawn_wave(self, count):
+        """Spawn count asteroids per screen's worth of world, away from the ship"""
+        self.follow_ship()
+        for _ in range(count * WORLD_SCREENS):
+            while True:
+                x = self.rng.randint(0, self.width)
+                y = self.rng.randint(0, self.height)
+                # Make sure asteroid doesn't spawn on ship, including across the wrapping edges
+                if wrapped_distance(x, y, self.ship.pos.x, self.ship.pos.y, self.width, self.height) > 100:
+                    self.place(WorldAsteroid(x, y, rng=self.rng))
+                    break
+
+    def shoot_bullet(self):
+        self.bullets.append(WorldBullet(self.ship.pos.x, self.ship.pos.y, self.ship.angle))
+
+    def asteroids_left(self):
+        return len(self.asteroids) + self.dormant
+
+    def move_entities(self):
+        super().move_entities()
+        self.follow_ship()
+        self.retire_inactive()
+        for _ in range(SWEEP_CHUNKS_PER_TICK):
+            chunk = self.next_sweep
+            self.next_sweep = (chunk + 1) % len(self.chunks)
+            self.wake(chunk)
+
+    def place(self, asteroid):
+        """File an up-to-date asteroid as active or dormant according to its chunk"""
+        chunk = chunk_of(asteroid.pos.x, asteroid.pos.y)
+        if chunk in self.active_chunks:
+            self.asteroids.append(asteroid)
+        else:
+            asteroid.since = self.ticks  # Tick its position and rotation are correct for
+            self.chunks[chunk].append(asteroid)
+            self.dormant += 1
+
+    def wake(self, chunk):
+        """Bring a bucket's asteroids up to date and refile them"""
+        bucket = self.chunks[chunk]
+        if not bucket:
+            return
+        self.chunks[chunk] = []
+        self.dormant -= len(bucket)
+        self.woken += len(bucket)
+        for asteroid in bucket:
+            missed = self.ticks - asteroid.since
+            if missed:
+                asteroid.pos.add_xy(asteroid.velocity.x * missed, asteroid.velocity.y * missed)
+                asteroid.pos.wrap(*asteroid.bounds)
+                asteroid.rotation += asteroid.rotation_speed * missed
+            self.place(asteroid)
+
+    def follow_ship(self):
+        """Move the active area with the ship, waking chunks that come into it"""
+        chunk = chunk_of(self.ship.pos.x, self.ship.pos.y)
+        if chunk == self.ship_chunk:
+            return
+        self.ship_chunk = chunk
+        col, row = chunk % WORLD_COLS, chunk // WORLD_COLS
+        reach = range(-self.active_radius, self.active_radius + 1)
+        active = {(row + dr) % WORLD_ROWS * WORLD_COLS + (col + dc) % WORLD_COLS for dr in reach for dc in reach}
+        entered = active - self.active_chunks
+        self.active_chunks = active
+        for chunk in entered:
+            self.wake(chunk)
+
+    def retire_inactive(self):
+        """Send active asteroids that are now outside the active area to sleep"""
+        active = self.active_chunks
+        if all(chunk_of(asteroid.pos.x, asteroid.pos.y) in active for asteroid in self.asteroids):
+            return
+        asteroids = self.asteroids
+        self.asteroids = []
+        for asteroid in asteroids:
+            self.place(asteroid)
+
+class Camera:
+    """The screen's view of a WorldSimulation, centred on the ship"""
+    def __init__(self, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.width = width
+        self.height = height
+        self.drawn = 0  # Asteroids drawn last frame
+
+    def origin(self, sim, lag=0.0):
+        """World point at the screen's top-left corner"""
+        ship = sim.ship
+        return (ship.pos.x - ship.velocity.x * lag - self.width / 2,
+                ship.pos.y - ship.velocity.y * lag - self.height / 2)
+
+    def to_world(self, sim, point):
+        """World position under a screen point; left unwrapped so aiming across the world edge still works"""
+        x, y = self.origin(sim)
+        return (x + point[0], y + point[1])
+
+    def to_screen(self, pos, origin, world):
+        """Screen positions of world positions, taking the short way around the wrapping edges"""
+        pos = (pos - origin) % world
+        # Just past the far edge is just before the screen's left or top edge
+        pos -= world * (pos > world - VIEW_MARGIN)
+        return pos
+
+    def draw(self, screen, sim, lag=0.0, atlas=None):
+        """Draw the ship, bullets and asteroids in view; returns the rects drawn"""
+        origin = np.array(self.origin(sim, lag))
+        world = np.array([sim.width, sim.height], dtype=np.float64)
+        ship = sim.ship
+        turn = (ship.angle - ship.previous_angle + 180) % 360 - 180
+        rects = [pygame.draw.polygon(screen, WHITE, ship_polygon(self.width / 2, self.height / 2, ship.angle - turn * lag).tolist(), 2)]
+
+        if sim.bullets:
+            bullets = np.array([(b.pos.x - b.velocity.x * lag, b.pos.y - b.velocity.y * lag) for b in sim.bullets])
+            for x, y in self.to_screen(bullets, origin, world).astype(np.int32).tolist():
+                if 0 <= x < self.width and 0 <= y < self.height:
+                    rects.append(pygame.draw.circle(screen, WHITE, (x, y), 2))
+
+        self.drawn = 0
+        if sim.asteroids:
+            points, rotation, pos = asteroid_arrays(sim.asteroids, lag)
+            pos = self.to_screen(pos, origin, world)
+            visible = np.flatnonzero(
+                (pos[:, 0] > -VIEW_MARGIN) & (pos[:, 0] < self.width + VIEW_MARGIN)
+                & (pos[:, 1] > -VIEW_MARGIN) & (pos[:, 1] < self.height + VIEW_MARGIN))
+            self.drawn = len(visible)
+            if len(visible):
+                if atlas is not None:
+                    keys = [sim.asteroids[i] for i in visible.tolist()]
+                    rects.extend(atlas.draw(screen, keys, points[visible], rotation[visible], pos[visible]))
+                else:
+                    rects.extend(draw_polygons(screen, WHITE, transform_polygons(points[visible], rotation[visible], pos[visible])))
+        return rects
+
+class FullWorldSimulation(WorldSimulation):
+    """Every chunk always active, for comparison"""
+    active_radius = max(WORLD_COLS, WORLD_ROWS)
+
+def time_world(simulation_factory, per_screen, ticks, screen, camera):
+    """(step ms, draw ms, mean active asteroids, mean drawn asteroids) per tick over a scripted run"""
+    sim = simulation_factory(per_screen, seed=1)
+    step_time = draw_time = 0.0
+    active = drawn = 0
+    for tick in range(ticks):
+        inputs = scripted_input(tick)
+        inputs.aim = camera.to_world(sim, inputs.aim)
+        start = time.perf_counter()
+        sim.step(inputs)
+        step_time += time.perf_counter() - start
+        screen.fill((0, 0, 0))
+        start = time.perf_counter()
+        camera.draw(screen, sim)
+        draw_time += time.perf_counter() - start
+        active += len(sim.asteroids)
+        drawn += camera.drawn
+        if sim.game_over:
+            sim = simulation_factory(per_screen, seed=tick)
+    return step_time * 1000 / ticks, draw_time * 1000 / ticks, active / ticks, drawn / ticks
+
+if __name__ == "__main__":
+    # Per-tick cost as the world's population grows, chunked against everything active
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    camera = Camera()
+    for per_screen in (2, 5, 20):
+        print(f"{per_screen * WORLD_SCREENS} asteroids in the world:")
+        for name, factory in (("chunked", WorldSimulation), ("all active", FullWorldSimulation)):
+            step, draw, active, drawn = time_world(factory, per_screen, ticks, screen, camera)
+            print(f"  {name:>10}: step {step:.3f} ms, draw {draw:.3f} ms per tick ({active:.0f} active, {drawn:.0f} drawn)")